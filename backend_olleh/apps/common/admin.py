@@ -1,3 +1,38 @@
-from django.contrib import admin
+from django.contrib import messages
 
-# Register your models here.
+# Per-row failure messages shown after a bulk action (the rest are summarized)
+MAX_FAILURE_MESSAGES = 20
+
+
+def report_bulk_result(modeladmin, request, result, noun, done, failed):
+    """
+    Admin messages for a bulk transition result ({"updated": n, "failed": [{"id",
+    "reason", optional "user"}]}): one error per failed row (capped), then totals.
+    e.g. noun="layaway", done="activated", failed="activate".
+    """
+    for failure in result["failed"][:MAX_FAILURE_MESSAGES]:
+        if "user" in failure:
+            row = f"{failure['user']} (#{failure['id']})"
+        else:
+            row = f"{noun.capitalize()} #{failure['id']}"
+        modeladmin.message_user(
+            request, f"{row}: {failure['reason']}", level=messages.ERROR
+        )
+    hidden = len(result["failed"]) - MAX_FAILURE_MESSAGES
+    if hidden > 0:
+        modeladmin.message_user(
+            request, f"...and {hidden} more failure(s).", level=messages.ERROR
+        )
+
+    if result["updated"] > 0:
+        modeladmin.message_user(
+            request,
+            f"Successfully {done} {result['updated']} {noun}(s).",
+            level=messages.SUCCESS,
+        )
+    if result["failed"]:
+        modeladmin.message_user(
+            request,
+            f"Failed to {failed} {len(result['failed'])} {noun}(s).",
+            level=messages.WARNING,
+        )
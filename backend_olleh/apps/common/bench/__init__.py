@@ -0,0 +1,12 @@
+"""
+Benchmark harness for the OLLEH API: seed a synthetic population, drive the real
+endpoints and report latency percentiles, throughput and queries per request as JSON.
+
+Run with: python manage.py bench (uses a throwaway test database)
+"""
+
+from apps.common.bench.population import Population, seed_population
+from apps.common.bench.runner import run_benchmark
+from apps.common.bench.scenarios import SCENARIOS
+
+__all__ = ["SCENARIOS", "Population", "run_benchmark", "seed_population"]
@@ -0,0 +1,179 @@
+"""
+Synthetic benchmark population, bulk inserted (no per-row save/full_clean).
+Deterministic for a given seed so runs on different commits see the same data.
+"""
+
+import random
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.memberships.models import Membership, UserMembership
+from apps.orders.models import Layaway, compute_service_fee_rwf
+from apps.orders.services import rebuild_layaway_exposure
+from apps.payments.models import LayawayPayment
+from apps.savings.models import SavingsAccount, SavingsTransaction
+from users.models import User
+
+BENCH_EMAIL_DOMAIN = "bench.olleh.test"
+BENCH_PASSWORD = "bench-password"
+BENCH_TIER_NAME = "Bench Tier"
+
+
+@dataclass
+class Population:
+    staff: User
+    tier: Membership
+    members: list
+    layaway_ids: dict  # user_id -> [active layaway ids]
+    _auth_headers: dict = field(default_factory=dict, repr=False)
+
+    def auth_headers(self, user):
+        """Authorization header for user (JWT access token, minted once per user)."""
+        if user is None:
+            return {}
+        if user.pk not in self._auth_headers:
+            token = AccessToken.for_user(user)
+            self._auth_headers[user.pk] = {"Authorization": f"JWT {token}"}
+        return self._auth_headers[user.pk]
+
+    def counts(self):
+        return {
+            "members": len(self.members),
+            "layaways": sum(len(ids) for ids in self.layaway_ids.values()),
+        }
+
+
+def seed_population(
+    users=200, layaways_per_user=2, transactions_per_user=20, seed=42, batch_size=1000
+):
+    """
+    Create users with an active membership, active layaways (one confirmed payment each)
+    and a savings ledger. Returns a Population describing what was created.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    tier, _ = Membership.objects.get_or_create(
+        name=BENCH_TIER_NAME,
+        defaults={
+            "price": 10_000,
+            "max_order_price": 50_000_000,
+            "description": "Benchmark tier (high limit so layaway creates never run out)",
+            "duration_days": 365,
+            "is_available": True,
+        },
+    )
+    staff = User.objects.create_user(
+        email=f"staff@{BENCH_EMAIL_DOMAIN}", password=BENCH_PASSWORD, is_staff=True
+    )
+
+    # One hash for everyone: hashing per user would dominate seeding time
+    password = make_password(BENCH_PASSWORD)
+    User.objects.bulk_create(
+        [
+            User(email=f"member-{i:06d}@{BENCH_EMAIL_DOMAIN}", password=password)
+            for i in range(users)
+        ],
+        batch_size=batch_size,
+    )
+    member_qs = User.objects.filter(
+        email__startswith="member-", email__endswith=f"@{BENCH_EMAIL_DOMAIN}"
+    )
+    members = list(member_qs.order_by("pk"))
+
+    memberships = []
+    for user in members:
+        start = now - timedelta(days=rng.randrange(0, 300))
+        memberships.append(
+            UserMembership(
+                user=user,
+                membership=tier,
+                status=UserMembership.STATUS_ACTIVE,
+                start_date=start,
+                end_date=start + timedelta(days=tier.duration_days),
+                payment_mode=UserMembership.PAYMENT_CASH,
+                amount_paid=tier.price,
+                payment_confirmed_by=staff,
+                payment_confirmed_at=start,
+            )
+        )
+    UserMembership.objects.bulk_create(memberships, batch_size=batch_size)
+
+    layaways = []
+    for user in members:
+        for _ in range(layaways_per_user):
+            item_value = rng.randrange(5_000, 60_000, 500)
+            service_fee = compute_service_fee_rwf(item_value)
+            start = now - timedelta(days=rng.randrange(0, 14))
+            layaways.append(
+                Layaway(
+                    user=user,
+                    item_description="Benchmark item",
+                    item_value_rwf=item_value,
+                    service_fee_rwf=service_fee,
+                    total_rwf=item_value + service_fee,
+                    status=Layaway.STATUS_ACTIVE,
+                    confirmed_at=start,
+                    cooling_off_until=start + timedelta(hours=48),
+                    start_date=start,
+                    end_date=start + timedelta(days=30),
+                    duration_days=30,
+                    amount_paid_rwf=1_000,
+                )
+            )
+    Layaway.objects.bulk_create(layaways, batch_size=batch_size)
+    layaway_ids = {user.pk: [] for user in members}
+    for layaway_id, user_id in Layaway.objects.filter(user__in=member_qs).values_list(
+        "pk", "user_id"
+    ):
+        layaway_ids[user_id].append(layaway_id)
+    LayawayPayment.objects.bulk_create(
+        [
+            LayawayPayment(
+                layaway_id=layaway_id,
+                amount_rwf=1_000,
+                reference=f"BENCH-SEED-{layaway_id}",
+                confirmed_at=now,
+                confirmed_by=staff,
+            )
+            for ids in layaway_ids.values()
+            for layaway_id in ids
+        ],
+        batch_size=batch_size,
+    )
+    # bulk_create skips Layaway.save, so rebuild the exposure rows in one pass
+    rebuild_layaway_exposure()
+
+    deposits = {
+        user.pk: [rng.randrange(500, 20_000, 500) for _ in range(transactions_per_user)]
+        for user in members
+    }
+    SavingsAccount.objects.bulk_create(
+        [
+            SavingsAccount(user=user, balance_rwf=sum(deposits[user.pk]))
+            for user in members
+        ],
+        batch_size=batch_size,
+    )
+    accounts = SavingsAccount.objects.filter(user__in=member_qs).values_list(
+        "pk", "user_id"
+    )
+    SavingsTransaction.objects.bulk_create(
+        [
+            SavingsTransaction(
+                account_id=account_id,
+                kind=SavingsTransaction.KIND_DEPOSIT,
+                amount_rwf=amount,
+                reference="BENCH-SEED",
+            )
+            for account_id, user_id in accounts
+            for amount in deposits[user_id]
+        ],
+        batch_size=batch_size,
+    )
+
+    return Population(staff=staff, tier=tier, members=members, layaway_ids=layaway_ids)
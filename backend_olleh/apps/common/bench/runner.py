@@ -0,0 +1,257 @@
+"""
+Benchmark runner: sends each scenario's requests through a transport (Django test client
+in-process, or a local threaded WSGI server over HTTP) with N concurrent workers.
+Query counts come from the Server-Timing header of RequestTimingMiddleware, which is
+switched on for the run.
+"""
+
+import http.client
+import platform
+import random
+import re
+import subprocess
+import threading
+import time
+
+import django
+from django.conf import settings
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from apps.common.bench.scenarios import SCENARIOS
+
+SERVER_TIMING_DB_RE = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+class ClientTransport:
+    """In-process requests through django.test.Client (one client per worker thread)."""
+
+    name = "client"
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def send(self, request):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            # A server error is a 500 sample, as over HTTP, not an exception here
+            client = self._local.client = Client(raise_request_exception=False)
+        response = client.generic(
+            request.method,
+            request.path,
+            data=request.body,
+            content_type="application/json",
+            headers=request.headers,
+        )
+        return response.status_code, response.get("Server-Timing", "")
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class WSGITransport:
+    """Real HTTP against a threaded WSGI server on an ephemeral localhost port."""
+
+    name = "wsgi"
+
+    def __enter__(self):
+        self.server = ThreadedWSGIServer(("127.0.0.1", 0), _QuietRequestHandler)
+        self.server.set_app(get_wsgi_application())
+        self.host, self.port = self.server.server_address[:2]
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        self._thread.join()
+        return False
+
+    def send(self, request):
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        try:
+            conn.request(
+                request.method,
+                request.path,
+                body=request.body or None,
+                headers={"Content-Type": "application/json", **request.headers},
+            )
+            response = conn.getresponse()
+            response.read()
+            return response.status, response.getheader("Server-Timing", "")
+        finally:
+            conn.close()
+
+
+TRANSPORTS = {"client": ClientTransport, "wsgi": WSGITransport}
+
+
+def percentile(sorted_values, pct):
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (
+        rank - low
+    )
+
+
+def _timed_send(transport, request):
+    """
+    (latency_ms, status, queries, db_ms, error); status 0 and the exception's type name
+    in error when the request itself failed (connection refused, reset, bad response).
+    """
+    start = time.perf_counter()
+    try:
+        status, server_timing = transport.send(request)
+    except (OSError, http.client.HTTPException) as exc:
+        return (time.perf_counter() - start) * 1000, 0, None, None, type(exc).__name__
+    latency_ms = (time.perf_counter() - start) * 1000
+    match = SERVER_TIMING_DB_RE.search(server_timing)
+    if match is None:
+        return latency_ms, status, None, None, None
+    return latency_ms, status, int(match.group(2)), float(match.group(1)), None
+
+
+def _send_all(transport, requests, concurrency):
+    """Send requests with `concurrency` workers; returns (samples, wall_seconds)."""
+    if concurrency <= 1:
+        start = time.perf_counter()
+        samples = [_timed_send(transport, request) for request in requests]
+        return samples, time.perf_counter() - start
+
+    # Round-robin requests over worker threads; each closes its own DB connections
+    samples = [None] * len(requests)
+
+    def worker(offset):
+        try:
+            for i in range(offset, len(requests), concurrency):
+                samples[i] = _timed_send(transport, requests[i])
+        finally:
+            connections.close_all()
+
+    threads = [
+        threading.Thread(target=worker, args=(offset,)) for offset in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - start
+
+
+def _round(value, digits=3):
+    return None if value is None else round(value, digits)
+
+
+def summarize(samples, wall_seconds):
+    latencies = sorted(sample[0] for sample in samples)
+    statuses = {}
+    transport_errors = {}
+    for sample in samples:
+        statuses[str(sample[1])] = statuses.get(str(sample[1]), 0) + 1
+        if sample[4] is not None:
+            transport_errors[sample[4]] = transport_errors.get(sample[4], 0) + 1
+    queries = [sample[2] for sample in samples if sample[2] is not None]
+    db_ms = [sample[3] for sample in samples if sample[3] is not None]
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for sample in samples if not 200 <= sample[1] < 400),
+        "status_codes": statuses,
+        "transport_errors": transport_errors,
+        "wall_seconds": round(wall_seconds, 4),
+        "throughput_rps": round(len(samples) / wall_seconds, 2)
+        if wall_seconds
+        else None,
+        "latency_ms": {
+            "p50": _round(percentile(latencies, 50)),
+            "p95": _round(percentile(latencies, 95)),
+            "p99": _round(percentile(latencies, 99)),
+            "mean": _round(sum(latencies) / len(latencies) if latencies else None),
+            "max": _round(latencies[-1] if latencies else None),
+        },
+        "queries_per_request": {
+            "mean": _round(sum(queries) / len(queries) if queries else None, 2),
+            "max": max(queries) if queries else None,
+        },
+        "db_ms_mean": _round(sum(db_ms) / len(db_ms) if db_ms else None),
+    }
+
+
+def _git_revision():
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+    except OSError:
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def run_benchmark(
+    population,
+    scenarios=None,
+    requests_per_scenario=200,
+    warmup=10,
+    concurrency=1,
+    transport="client",
+    seed=42,
+):
+    """
+    Run the named scenarios (default: all) against the current database and return
+    a JSON-serializable report: run metadata plus per-scenario latency p50/p95/p99,
+    throughput, status codes and queries per request.
+    """
+    rng = random.Random(seed)
+    names = list(scenarios or SCENARIOS)
+    report = {
+        "meta": {
+            "timestamp": timezone.now().isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "transport": transport,
+            "concurrency": concurrency,
+            "requests_per_scenario": requests_per_scenario,
+            "warmup": warmup,
+            "seed": seed,
+            "population": population.counts(),
+        },
+        "scenarios": {},
+    }
+    with (
+        override_settings(
+            REQUEST_TIMING_ENABLED=True,
+            # Report through Server-Timing only; no slow-request logging during the run
+            REQUEST_TIMING_SLOW_MS=float("inf"),
+            REQUEST_TIMING_MAX_QUERIES=float("inf"),
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver", "127.0.0.1"],
+        ),
+        TRANSPORTS[transport]() as sender,
+    ):
+        for name in names:
+            requests = SCENARIOS[name](population, warmup + requests_per_scenario, rng)
+            _send_all(sender, requests[:warmup], concurrency)
+            samples, wall_seconds = _send_all(sender, requests[warmup:], concurrency)
+            report["scenarios"][name] = summarize(samples, wall_seconds)
+    return report
@@ -0,0 +1,133 @@
+"""
+Benchmark scenarios: each builds the list of requests it will send against a Population.
+Anything a scenario needs up front (e.g. unconfirmed payments to confirm) is created while
+building, outside the timed section.
+"""
+
+import json
+from dataclasses import dataclass, field
+
+from django.urls import reverse
+
+from apps.payments.models import LayawayPayment
+
+
+@dataclass(frozen=True)
+class BenchRequest:
+    method: str
+    path: str
+    headers: dict = field(default_factory=dict)
+    body: bytes = b""
+
+
+def _json_body(data):
+    return json.dumps(data).encode()
+
+
+def _member_layaway(population, rng):
+    user = rng.choice(population.members)
+    return user, rng.choice(population.layaway_ids[user.pk])
+
+
+def policies(population, count, rng):
+    path = reverse("policies-list")
+    return [BenchRequest("GET", path) for _ in range(count)]
+
+
+def eligibility(population, count, rng):
+    path = reverse("orders:layaway-eligibility")
+    return [
+        BenchRequest(
+            "GET", path, population.auth_headers(rng.choice(population.members))
+        )
+        for _ in range(count)
+    ]
+
+
+def layaway_create(population, count, rng):
+    path = reverse("orders:layaway-list")
+    return [
+        BenchRequest(
+            "POST",
+            path,
+            population.auth_headers(rng.choice(population.members)),
+            _json_body({"item_value_rwf": 1_000, "collection_type": "pickup"}),
+        )
+        for _ in range(count)
+    ]
+
+
+def payment_report(population, count, rng):
+    requests = []
+    for i in range(count):
+        user, layaway_id = _member_layaway(population, rng)
+        requests.append(
+            BenchRequest(
+                "POST",
+                reverse("orders:layaway-payments", kwargs={"pk": layaway_id}),
+                population.auth_headers(user),
+                _json_body({"amount_rwf": 100, "reference": f"BENCH-REPORT-{i}"}),
+            )
+        )
+    return requests
+
+
+def payment_confirm(population, count, rng):
+    # Every confirm needs its own unconfirmed payment (bulk_create sets pks on SQLite/PostgreSQL)
+    payments = LayawayPayment.objects.bulk_create(
+        [
+            LayawayPayment(
+                layaway_id=_member_layaway(population, rng)[1],
+                amount_rwf=100,
+                reference=f"BENCH-CONFIRM-{i}",
+            )
+            for i in range(count)
+        ]
+    )
+    staff_headers = population.auth_headers(population.staff)
+    return [
+        BenchRequest(
+            "POST",
+            reverse(
+                "orders:layaway-confirm-payment",
+                kwargs={"pk": payment.layaway_id, "payment_id": payment.pk},
+            ),
+            staff_headers,
+        )
+        for payment in payments
+    ]
+
+
+def savings_deposit(population, count, rng):
+    path = reverse("savings-deposit-list")
+    return [
+        BenchRequest(
+            "POST",
+            path,
+            population.auth_headers(rng.choice(population.members)),
+            _json_body({"amount_rwf": 500, "reference": f"BENCH-DEPOSIT-{i}"}),
+        )
+        for i in range(count)
+    ]
+
+
+def savings_transactions(population, count, rng):
+    path = reverse("savings-transactions-list")
+    return [
+        BenchRequest(
+            "GET", path, population.auth_headers(rng.choice(population.members))
+        )
+        for _ in range(count)
+    ]
+
+
+# name -> builder(population, count, rng) -> [BenchRequest]
+SCENARIOS = {
+    "policies": policies,
+    "eligibility": eligibility,
+    "layaway_create": layaway_create,
+    "payment_report": payment_report,
+    "payment_confirm": payment_confirm,
+    "savings_deposit": savings_deposit,
+    "savings_transactions": savings_transactions,
+}
@@ -0,0 +1,222 @@
+"""
+Staff exports: layaways, layaway payments, user memberships and savings transactions as
+CSV or JSONL. Rows are read with a server-side cursor (QuerySet.iterator) and written out
+chunk by chunk, so an export of any size runs in constant memory.
+"""
+
+import csv
+import io
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from apps.memberships.models import UserMembership
+from apps.orders.models import Layaway
+from apps.payments.models import LayawayPayment
+from apps.savings.models import SavingsTransaction
+
+EXPORT_CHUNK_SIZE = 2000  # rows per cursor fetch and per streamed chunk
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+}
+
+
+@dataclass(frozen=True)
+class ExportDataset:
+    model: type
+    columns: tuple  # (output name, values() lookup)
+    statuses: dict  # ?status= value -> Q
+
+    def queryset(self, date_from=None, date_to=None, statuses=()):
+        """Rows as value tuples in created_at order, filtered on the creation date."""
+        queryset = self.model.objects.order_by("created_at", "id")
+        if date_from:
+            queryset = queryset.filter(created_at__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(created_at__lt=date_to)
+        if statuses:
+            queryset = queryset.filter(
+                reduce(or_, (self.statuses[value] for value in statuses))
+            )
+        return queryset.values_list(*(lookup for _, lookup in self.columns))
+
+
+def _choice_statuses(field, choices):
+    return {value: Q(**{field: value}) for value, _ in choices}
+
+
+EXPORT_DATASETS = {
+    "layaways": ExportDataset(
+        model=Layaway,
+        columns=(
+            ("id", "id"),
+            ("user_email", "user__email"),
+            ("status", "status"),
+            ("item_description", "item_description"),
+            ("item_value_rwf", "item_value_rwf"),
+            ("service_fee_rwf", "service_fee_rwf"),
+            ("total_rwf", "total_rwf"),
+            ("amount_paid_rwf", "amount_paid_rwf"),
+            ("collection_type", "collection_type"),
+            ("duration_days", "duration_days"),
+            ("confirmed_at", "confirmed_at"),
+            ("start_date", "start_date"),
+            ("end_date", "end_date"),
+            ("cancellation_penalty_rwf", "cancellation_penalty_rwf"),
+            ("default_penalty_rwf", "default_penalty_rwf"),
+            ("created_at", "created_at"),
+        ),
+        statuses=_choice_statuses("status", Layaway.STATUS_CHOICES),
+    ),
+    "layaway-payments": ExportDataset(
+        model=LayawayPayment,
+        columns=(
+            ("id", "id"),
+            ("layaway_id", "layaway_id"),
+            ("user_email", "layaway__user__email"),
+            ("amount_rwf", "amount_rwf"),
+            ("reference", "reference"),
+            ("created_at", "created_at"),
+            ("confirmed_at", "confirmed_at"),
+            ("confirmed_by", "confirmed_by__email"),
+        ),
+        # No status column: confirmation is confirmed_at being set
+        statuses={
+            "confirmed": Q(confirmed_at__isnull=False),
+            "unconfirmed": Q(confirmed_at__isnull=True),
+        },
+    ),
+    "memberships": ExportDataset(
+        model=UserMembership,
+        columns=(
+            ("id", "id"),
+            ("user_email", "user__email"),
+            ("membership", "membership__name"),
+            ("status", "status"),
+            ("payment_mode", "payment_mode"),
+            ("payment_reference", "payment_reference"),
+            ("amount_paid", "amount_paid"),
+            ("payment_confirmed_at", "payment_confirmed_at"),
+            ("start_date", "start_date"),
+            ("end_date", "end_date"),
+            ("created_at", "created_at"),
+        ),
+        statuses=_choice_statuses("status", UserMembership.STATUS_CHOICES),
+    ),
+    "savings-transactions": ExportDataset(
+        model=SavingsTransaction,
+        columns=(
+            ("id", "id"),
+            ("account_id", "account_id"),
+            ("user_email", "account__user__email"),
+            ("kind", "kind"),
+            ("amount_rwf", "amount_rwf"),
+            ("reference", "reference"),
+            ("layaway_id", "layaway_id"),
+            ("created_at", "created_at"),
+        ),
+        # The ledger has no status; filter on the transaction kind
+        statuses=_choice_statuses("kind", SavingsTransaction.KIND_CHOICES),
+    ),
+}
+
+
+def parse_export_filters(dataset, params):
+    """
+    (date_from, date_to, statuses) from query params: from/to are inclusive YYYY-MM-DD
+    dates in the current timezone; status may repeat or be comma-separated.
+    """
+    bounds = []
+    for name in ("from", "to"):
+        value = params.get(name)
+        day = parse_date(value) if value else None
+        if value and day is None:
+            raise ValidationError(f"'{name}' must be a date (YYYY-MM-DD).")
+        bounds.append(day)
+    date_from, date_to = bounds
+    if date_from and date_to and date_from > date_to:
+        raise ValidationError("'from' must not be after 'to'.")
+
+    statuses = [
+        value.strip()
+        for param in params.getlist("status")
+        for value in param.split(",")
+        if value.strip()
+    ]
+    unknown = sorted(set(statuses) - set(dataset.statuses))
+    if unknown:
+        raise ValidationError(
+            f"Unknown status {', '.join(unknown)}; expected one of "
+            f"{', '.join(dataset.statuses)}."
+        )
+
+    def start_of(day):
+        return timezone.make_aware(datetime.combine(day, time.min))
+
+    return (
+        start_of(date_from) if date_from else None,
+        start_of(date_to + timedelta(days=1)) if date_to else None,
+        statuses,
+    )
+
+
+def _chunks(rows, chunk_size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# Leading characters that make spreadsheet apps evaluate a cell as a formula
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _iso(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _csv_cell(value):
+    """
+    CSV cell for a value. Member-entered text such as an item description is prefixed
+    with ' when it would otherwise be read as a formula by Excel or LibreOffice.
+    """
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return _iso(value)
+
+
+def iter_csv(dataset, queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Header line, then one string per chunk of rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in dataset.columns])
+    yield buffer.getvalue()
+    for chunk in _chunks(queryset.iterator(chunk_size=chunk_size), chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([[_csv_cell(value) for value in row] for row in chunk])
+        yield buffer.getvalue()
+
+
+def iter_jsonl(dataset, queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """One JSON object per line; one string per chunk of rows."""
+    names = [name for name, _ in dataset.columns]
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for chunk in _chunks(queryset.iterator(chunk_size=chunk_size), chunk_size):
+        yield "".join(encoder.encode(dict(zip(names, row))) + "\n" for row in chunk)
+
+
+EXPORT_WRITERS = {"csv": iter_csv, "jsonl": iter_jsonl}
@@ -0,0 +1,548 @@
+"""
+Synthetic production-scale data for local query-plan and load testing.
+
+Members get a profile, a membership history across every status (with fee payments),
+layaways across the whole lifecycle (with installments) and a savings ledger whose
+balance matches its transactions. Rows are built in memory per chunk of members and
+written with bulk_create (no save()/full_clean()); LayawayExposure is rebuilt at the end.
+Each member is generated from its own RNG seeded by (seed, member index), so the data
+is identical for a given seed whatever the chunk size, and reruns append new members.
+"""
+
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import pairwise
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from apps.memberships.models import Membership, UserMembership
+from apps.orders.models import (
+    CANCELLATION_PENALTY_RWF,
+    COOLING_OFF_HOURS,
+    DEFAULT_PENALTY_RWF,
+    LAYAWAY_MAX_DAYS,
+    LAYAWAY_MIN_DAYS,
+    Layaway,
+    compute_service_fee_rwf,
+)
+from apps.orders.services import rebuild_layaway_exposure
+from apps.payments.models import LayawayPayment, Payment
+from apps.savings.models import SavingsAccount, SavingsTransaction
+from users.models import MemberProfile, User
+
+LOAD_EMAIL_DOMAIN = "load.olleh.test"
+LOAD_PASSWORD = "load-password"
+DEFAULT_CHUNK_SIZE = 5_000
+BULK_BATCH_SIZE = 1_000
+CLOSED_LAYAWAY_MARGIN_DAYS = 5
+
+FIRST_NAMES = [
+    "Aline", "Claudine", "Diane", "Eric", "Grace", "Innocent", "Jean", "Josiane",
+    "Kevin", "Olivier", "Patrick", "Sandrine", "Yves", "Alice", "Emmanuel", "Divine",
+]  # fmt: skip
+LAST_NAMES = [
+    "Habimana", "Uwase", "Mugisha", "Niyonzima", "Ishimwe", "Mukamana", "Nshimiyimana",
+    "Uwimana", "Hakizimana", "Iradukunda", "Niyonsaba", "Kayitesi", "Bizimana",
+]  # fmt: skip
+DISTRICTS = [
+    "Gasabo", "Kicukiro", "Nyarugenge", "Musanze", "Huye", "Rubavu", "Rwamagana",
+    "Muhanga", "Nyagatare", "Rusizi",
+]  # fmt: skip
+
+# Relative weights of each member's membership history
+MEMBERSHIP_HISTORIES = {
+    "none": 8,
+    "pending": 10,
+    "paid": 5,
+    "active": 50,
+    "expired": 17,
+    "canceled": 10,
+}
+# Relative weights of layaway statuses (open ones are capped at one per member)
+LAYAWAY_STATUSES = {
+    Layaway.STATUS_PENDING_CONFIRMATION: 10,
+    Layaway.STATUS_COOLING_OFF: 8,
+    Layaway.STATUS_ACTIVE: 25,
+    Layaway.STATUS_COMPLETED: 35,
+    Layaway.STATUS_CANCELED: 12,
+    Layaway.STATUS_DEFAULTED: 10,
+}
+LOAD_MODELS = [
+    User,
+    MemberProfile,
+    UserMembership,
+    Payment,
+    Layaway,
+    LayawayPayment,
+    SavingsAccount,
+    SavingsTransaction,
+]
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    Let bulk_create keep the created_at/updated_at values we set (auto_now/auto_now_add
+    would overwrite them with now), so generated history spreads over time.
+    """
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, "auto_now", False) or getattr(
+                field, "auto_now_add", False
+            ):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _weighted(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _days(rng, low, high):
+    return timedelta(days=rng.uniform(low, high))
+
+
+def _split_amount(rng, amount, parts):
+    """Split amount into `parts` positive integers."""
+    parts = max(1, min(parts, amount))
+    cuts = sorted(rng.sample(range(1, amount), parts - 1)) if parts > 1 else []
+    bounds = [0, *cuts, amount]
+    return [high - low for low, high in pairwise(bounds)]
+
+
+class MemberPlan:
+    """In-memory rows for one synthetic member (FKs point at unsaved objects)."""
+
+    def __init__(self, index, rng, now, tiers, staff, password):
+        self.index = index
+        self.rng = rng
+        self.now = now
+        self.staff = staff
+        self.rows = {model: [] for model in LOAD_MODELS}
+
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        self.joined = now - _days(rng, 1, 3 * 365)
+        self.user = User(
+            email=f"load-{index:07d}@{LOAD_EMAIL_DOMAIN}",
+            password=password,
+            first_name=first,
+            last_name=last,
+            date_joined=self.joined,
+        )
+        self.rows[User].append(self.user)
+        self.rows[MemberProfile].append(
+            MemberProfile(
+                user=self.user,
+                olleh_code=f"LOAD-{index:07d}",
+                reputation=_weighted(
+                    rng,
+                    {
+                        MemberProfile.REPUTATION_STARTER: 70,
+                        MemberProfile.REPUTATION_TRUSTED: 22,
+                        MemberProfile.REPUTATION_ELITE: 8,
+                    },
+                ),
+                full_name=f"{first} {last}",
+                phone=f"07{rng.choice('2389')}{rng.randrange(10**7):07d}",
+                district=rng.choice(DISTRICTS),
+                created_at=self.joined,
+                updated_at=self.joined,
+            )
+        )
+        self.plan_memberships(rng.choice(tiers))
+        self.plan_layaways()
+        if rng.random() < 0.75:
+            self.plan_savings()
+
+    # ---------- Memberships ----------
+
+    def add_membership(self, tier, status, requested_at):
+        rng = self.rng
+        mode = rng.choice(
+            [
+                UserMembership.PAYMENT_MOBILE_MONEY,
+                UserMembership.PAYMENT_MOBILE_MONEY,
+                UserMembership.PAYMENT_CASH,
+                UserMembership.PAYMENT_BANK,
+            ]
+        )
+        number = len(self.rows[UserMembership])
+        membership = UserMembership(
+            user=self.user,
+            membership=tier,
+            status=status,
+            payment_mode=mode,
+            payment_reference=""
+            if mode == UserMembership.PAYMENT_CASH
+            else f"LOAD{self.index:07d}M{number}",
+            amount_paid=tier.price,
+            created_at=requested_at,
+            updated_at=requested_at,
+        )
+        if status in (
+            UserMembership.STATUS_PAID,
+            UserMembership.STATUS_ACTIVE,
+            UserMembership.STATUS_EXPIRED,
+        ):
+            membership.payment_confirmed_by = self.staff
+            membership.payment_confirmed_at = requested_at + timedelta(
+                hours=rng.uniform(1, 48)
+            )
+            membership.updated_at = membership.payment_confirmed_at
+        if status in (UserMembership.STATUS_ACTIVE, UserMembership.STATUS_EXPIRED):
+            membership.start_date = membership.payment_confirmed_at
+            membership.end_date = membership.start_date + timedelta(
+                days=tier.duration_days
+            )
+            if status == UserMembership.STATUS_EXPIRED:
+                membership.updated_at = membership.end_date
+        self.rows[UserMembership].append(membership)
+        self.rows[Payment].append(
+            Payment(
+                user=self.user,
+                membership=membership,
+                amount=tier.price,
+                reference=f"LOAD-{self.index:07d}-M{number}",
+                status={
+                    UserMembership.STATUS_PENDING: "pending",
+                    UserMembership.STATUS_CANCELED: "failed",
+                }.get(status, "completed"),
+                created_at=requested_at,
+                paid_at=membership.payment_confirmed_at,
+            )
+        )
+        return membership
+
+    def plan_memberships(self, tier):
+        rng, now = self.rng, self.now
+        age_days = (now - self.joined).days
+        term = tier.duration_days
+        history = _weighted(rng, MEMBERSHIP_HISTORIES)
+        if history == "expired" and age_days < term + 3:
+            history = "active"
+
+        if history == "active" and age_days > 2 * term and rng.random() < 0.5:
+            # Renewal: one expired term, then the current one
+            self.add_membership(tier, UserMembership.STATUS_EXPIRED, self.joined)
+            history = "active"
+        if history == "active":
+            # At least 2 days ago so the (up to 48h later) confirmation is in the past
+            requested_at = now - _days(rng, 2, max(2, min(age_days, term - 3)))
+            self.add_membership(tier, UserMembership.STATUS_ACTIVE, requested_at)
+        elif history == "expired":
+            requested_at = self.joined + _days(rng, 0, age_days - term - 3)
+            self.add_membership(tier, UserMembership.STATUS_EXPIRED, requested_at)
+        elif history == "pending":
+            self.add_membership(tier, history, now - _days(rng, 0, 5))
+        elif history == "paid":
+            self.add_membership(tier, history, now - _days(rng, 2, 7))
+        elif history == "canceled":
+            self.add_membership(
+                tier,
+                UserMembership.STATUS_CANCELED,
+                self.joined + _days(rng, 0, age_days),
+            )
+
+    # ---------- Layaways ----------
+
+    def plan_layaways(self):
+        rng = self.rng
+        terms = [
+            m
+            for m in self.rows[UserMembership]
+            if m.status in (UserMembership.STATUS_ACTIVE, UserMembership.STATUS_EXPIRED)
+        ]
+        if not terms:
+            return
+        has_active = terms[-1].status == UserMembership.STATUS_ACTIVE
+        window_start = terms[0].start_date
+        max_order = max(terms[-1].membership.max_order_price, 5_000)
+        open_used = not has_active  # open layaways need a current membership
+        # Closed layaways need a full term of history behind them
+        closed_allowed = (
+            self.now - window_start
+        ).days > LAYAWAY_MAX_DAYS + CLOSED_LAYAWAY_MARGIN_DAYS
+        count = rng.choices([0, 1, 2, 3, 4], weights=[25, 35, 20, 12, 8])[0]
+        for _ in range(count):
+            status = _weighted(rng, LAYAWAY_STATUSES)
+            if status not in Layaway.OPEN_STATUSES and not closed_allowed:
+                continue
+            if status in Layaway.OPEN_STATUSES:
+                if open_used:
+                    status = rng.choice(
+                        [
+                            Layaway.STATUS_COMPLETED,
+                            Layaway.STATUS_CANCELED,
+                            Layaway.STATUS_DEFAULTED,
+                        ]
+                    )
+                else:
+                    open_used = True
+            self.add_layaway(status, window_start, max_order)
+
+    def add_layaway(self, status, window_start, max_order):
+        rng, now = self.rng, self.now
+        item_value = rng.randrange(5_000, max_order + 1, 500)
+        service_fee = compute_service_fee_rwf(item_value)
+        delivery_fee = rng.choice([0, 0, 0, 2_000, 3_000])
+        duration = rng.randint(LAYAWAY_MIN_DAYS, LAYAWAY_MAX_DAYS)
+        cooling = timedelta(hours=COOLING_OFF_HOURS)
+        layaway = Layaway(
+            user=self.user,
+            item_description=f"Item {rng.randrange(10**6):06d}",
+            item_value_rwf=item_value,
+            service_fee_rwf=service_fee,
+            delivery_fee_rwf=delivery_fee,
+            total_rwf=item_value + service_fee + delivery_fee,
+            collection_type=Layaway.COLLECTION_DELIVERY
+            if delivery_fee
+            else Layaway.COLLECTION_PICKUP,
+            status=status,
+        )
+        total = layaway.total_rwf
+
+        if status == Layaway.STATUS_PENDING_CONFIRMATION:
+            layaway.created_at = now - _days(rng, 0, 3)
+            layaway.updated_at = layaway.created_at
+        elif status == Layaway.STATUS_COOLING_OFF:
+            layaway.confirmed_at = now - timedelta(
+                hours=rng.uniform(0, COOLING_OFF_HOURS)
+            )
+            layaway.cooling_off_until = layaway.confirmed_at + cooling
+            layaway.created_at = layaway.confirmed_at - _days(rng, 0.1, 2)
+            layaway.updated_at = layaway.confirmed_at
+        elif status == Layaway.STATUS_ACTIVE:
+            # Some are already past end_date (overdue, awaiting the default sweep)
+            layaway.confirmed_at = now - _days(rng, 2, duration + 5)
+            layaway.created_at = layaway.confirmed_at - _days(rng, 0.1, 2)
+            self._schedule(layaway, duration)
+            layaway.amount_paid_rwf = rng.randrange(0, total, 500)
+            layaway.updated_at = layaway.confirmed_at
+        else:
+            # Closed: created somewhere in the member's window, at least a term ago
+            span = (
+                (now - window_start).days
+                - LAYAWAY_MAX_DAYS
+                - CLOSED_LAYAWAY_MARGIN_DAYS
+            )
+            layaway.created_at = window_start + _days(rng, 0, span)
+            layaway.confirmed_at = layaway.created_at + _days(rng, 0.1, 3)
+            self._schedule(layaway, duration)
+            if status == Layaway.STATUS_DEFAULTED and layaway.end_date >= now:
+                status = layaway.status = Layaway.STATUS_CANCELED
+            if status == Layaway.STATUS_COMPLETED:
+                layaway.amount_paid_rwf = total
+                layaway.updated_at = min(
+                    layaway.start_date + _days(rng, 1, duration), now
+                )
+            elif status == Layaway.STATUS_DEFAULTED:
+                layaway.amount_paid_rwf = rng.randrange(0, total, 500)
+                layaway.default_penalty_rwf = DEFAULT_PENALTY_RWF
+                layaway.updated_at = min(layaway.end_date + _days(rng, 0, 1), now)
+            else:
+                if rng.random() < 0.5:
+                    # Canceled before OLLEH confirmed
+                    layaway.confirmed_at = layaway.cooling_off_until = None
+                    layaway.start_date = layaway.end_date = None
+                    layaway.duration_days = LAYAWAY_MAX_DAYS
+                    layaway.updated_at = layaway.created_at + _days(rng, 0, 2)
+                else:
+                    layaway.cancellation_penalty_rwf = CANCELLATION_PENALTY_RWF
+                    layaway.updated_at = min(
+                        layaway.start_date + _days(rng, 2, duration), now
+                    )
+        self.rows[Layaway].append(layaway)
+        self.plan_installments(layaway)
+
+    @staticmethod
+    def _schedule(layaway, duration):
+        layaway.cooling_off_until = layaway.confirmed_at + timedelta(
+            hours=COOLING_OFF_HOURS
+        )
+        layaway.start_date = layaway.confirmed_at
+        layaway.duration_days = duration
+        layaway.end_date = layaway.start_date + timedelta(days=duration)
+
+    def plan_installments(self, layaway):
+        rng, now = self.rng, self.now
+        paid = layaway.amount_paid_rwf
+        if paid and layaway.start_date:
+            last = (
+                now if layaway.status == Layaway.STATUS_ACTIVE else layaway.updated_at
+            )
+            span = max((last - layaway.start_date).total_seconds(), 1)
+            times = sorted(
+                layaway.start_date + timedelta(seconds=rng.uniform(0, span))
+                for _ in range(rng.randint(1, 4))
+            )
+            for number, (amount, at) in enumerate(
+                zip(_split_amount(rng, paid, len(times)), times)
+            ):
+                self.rows[LayawayPayment].append(
+                    LayawayPayment(
+                        layaway=layaway,
+                        amount_rwf=amount,
+                        reference=f"LOAD-{self.index:07d}-L{len(self.rows[Layaway])}-{number}",
+                        created_at=at - timedelta(hours=rng.uniform(0, 12)),
+                        confirmed_at=at,
+                        confirmed_by=self.staff,
+                    )
+                )
+        remaining = layaway.total_rwf - paid
+        if (
+            layaway.status == Layaway.STATUS_ACTIVE
+            and remaining > 0
+            and rng.random() < 0.3
+        ):
+            # Reported by the member, not yet confirmed by staff
+            self.rows[LayawayPayment].append(
+                LayawayPayment(
+                    layaway=layaway,
+                    amount_rwf=rng.randint(1, remaining),
+                    reference=f"LOAD-{self.index:07d}-L{len(self.rows[Layaway])}-U",
+                    created_at=now - _days(rng, 0, 2),
+                )
+            )
+
+    # ---------- Savings ----------
+
+    def plan_savings(self):
+        rng, now = self.rng, self.now
+        age = (now - self.joined).total_seconds()
+        events = [
+            (
+                self.joined + timedelta(seconds=rng.uniform(0, age)),
+                SavingsTransaction.KIND_DEPOSIT,
+                rng.randrange(500, 50_001, 500),
+                None,
+            )
+            for _ in range(rng.randint(1, 25))
+        ]
+        events += [
+            (
+                self.joined + timedelta(seconds=rng.uniform(0, age)),
+                SavingsTransaction.KIND_WITHDRAWAL,
+                -rng.randrange(500, 30_001, 500),
+                None,
+            )
+            for _ in range(rng.randint(0, 3))
+        ]
+        for layaway in self.rows[Layaway]:
+            if layaway.default_penalty_rwf:
+                events.append(
+                    (
+                        layaway.updated_at,
+                        SavingsTransaction.KIND_PENALTY,
+                        -layaway.default_penalty_rwf,
+                        layaway,
+                    )
+                )
+            elif layaway.cancellation_penalty_rwf:
+                events.append(
+                    (
+                        layaway.updated_at,
+                        SavingsTransaction.KIND_CANCEL_PENALTY,
+                        -layaway.cancellation_penalty_rwf,
+                        layaway,
+                    )
+                )
+        events.sort(key=lambda event: event[0])
+
+        account = SavingsAccount(user=self.user, created_at=events[0][0])
+        balance = 0
+        for at, kind, amount, layaway in events:
+            if balance + amount < 0:
+                continue  # debits never overdraw (as SavingsAccount.post_entry)
+            balance += amount
+            self.rows[SavingsTransaction].append(
+                SavingsTransaction(
+                    account=account,
+                    kind=kind,
+                    amount_rwf=amount,
+                    reference=f"LOAD-{self.index:07d}-S{len(self.rows[SavingsTransaction])}",
+                    layaway=layaway,
+                    created_at=at,
+                    updated_at=at,
+                )
+            )
+        account.balance_rwf = balance
+        account.updated_at = self.rows[SavingsTransaction][-1].created_at
+        self.rows[SavingsAccount].append(account)
+
+
+def _write_chunk(plans):
+    """bulk_create every row of these plans, parents first. Returns {model name: count}."""
+    counts = {}
+    for model in LOAD_MODELS:
+        rows = [row for plan in plans for row in plan.rows[model]]
+        # FKs to parents saved earlier in this loop are resolved by bulk_create
+        model.objects.bulk_create(rows, batch_size=BULK_BATCH_SIZE)
+        counts[model._meta.label] = len(rows)
+    return counts
+
+
+def generate_load_data(users, seed=42, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Append `users` synthetic members (see module docstring). Returns a summary dict:
+    first_index, users, rows ({model label: count}), chunks, elapsed_seconds.
+    Raises ValueError if there are no membership tiers to assign.
+    """
+    started = time.monotonic()
+    now = timezone.now()
+    tiers = list(Membership.objects.filter(is_available=True).order_by("price"))
+    if not tiers:
+        raise ValueError(
+            "No available membership tiers. Run create_sample_memberships first."
+        )
+    staff, _ = User.objects.get_or_create(
+        email=f"staff@{LOAD_EMAIL_DOMAIN}",
+        defaults={"is_staff": True, "password": make_password(LOAD_PASSWORD)},
+    )
+    # One hash for everyone: hashing per user would dominate generation time
+    password = make_password(LOAD_PASSWORD)
+    first_index = User.objects.filter(
+        email__startswith="load-", email__endswith=f"@{LOAD_EMAIL_DOMAIN}"
+    ).count()
+
+    rows = Counter()
+    chunks = 0
+    with explicit_timestamps(*LOAD_MODELS):
+        for start in range(first_index, first_index + users, chunk_size):
+            stop = min(start + chunk_size, first_index + users)
+            plans = [
+                MemberPlan(
+                    index,
+                    random.Random(f"{seed}:{index}"),
+                    now,
+                    tiers,
+                    staff,
+                    password,
+                )
+                for index in range(start, stop)
+            ]
+            with transaction.atomic():
+                rows.update(_write_chunk(plans))
+            chunks += 1
+            if progress is not None:
+                progress(stop - first_index, users)
+
+    # bulk_create skipped Layaway.save; rebuild per-member exposure in one pass
+    rebuild_layaway_exposure()
+    return {
+        "first_index": first_index,
+        "users": users,
+        "rows": dict(rows),
+        "chunks": chunks,
+        "elapsed_seconds": round(time.monotonic() - started, 2),
+    }
@@ -0,0 +1,114 @@
+"""
+Benchmark the OLLEH API. Creates a throwaway test database, seeds a synthetic population,
+drives the real endpoints and writes latency p50/p95/p99, throughput and queries per
+request to a JSON file so runs can be compared across commits.
+
+    python manage.py bench --users 1000 --requests 500 --concurrency 8 --transport wsgi
+
+SQLite serializes writers: use --concurrency 1 there, PostgreSQL for concurrent runs.
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.utils import setup_databases, teardown_databases
+
+from apps.common.bench import SCENARIOS, run_benchmark, seed_population
+from apps.common.bench.runner import TRANSPORTS
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark API endpoints against a synthetic population; writes a JSON report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--layaways-per-user", type=int, default=2)
+        parser.add_argument("--transactions-per-user", type=int, default=20)
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Timed requests per scenario (default: 200).",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=10,
+            help="Untimed requests sent before each scenario (default: 10).",
+        )
+        parser.add_argument("--concurrency", type=int, default=1)
+        parser.add_argument(
+            "--transport",
+            choices=sorted(TRANSPORTS),
+            default="client",
+            help="client: in-process test client; wsgi: HTTP to a local threaded WSGI server.",
+        )
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=list(SCENARIOS),
+            dest="scenarios",
+            help="Scenario to run (repeatable; default: all).",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--output",
+            default="bench-results.json",
+            help="Where to write the JSON report (default: bench-results.json).",
+        )
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory(prefix="olleh-bench-") as tmpdir:
+            # In-memory SQLite cannot be shared by concurrent workers; use a file
+            for alias in connections:
+                conn = connections[alias]
+                if conn.vendor == "sqlite" and not conn.settings_dict["TEST"].get(
+                    "NAME"
+                ):
+                    conn.settings_dict["TEST"]["NAME"] = os.path.join(
+                        tmpdir, f"bench_{alias}.sqlite3"
+                    )
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                self.stdout.write(f"Seeding {options['users']:,} members...")
+                population = seed_population(
+                    users=options["users"],
+                    layaways_per_user=options["layaways_per_user"],
+                    transactions_per_user=options["transactions_per_user"],
+                    seed=options["seed"],
+                )
+                report = run_benchmark(
+                    population,
+                    scenarios=options["scenarios"],
+                    requests_per_scenario=options["requests"],
+                    warmup=options["warmup"],
+                    concurrency=options["concurrency"],
+                    transport=options["transport"],
+                    seed=options["seed"],
+                )
+            finally:
+                teardown_databases(old_config, verbosity=0)
+
+        self.stdout.write(
+            f"\n{'scenario':<22}{'n':>6}{'err':>6}{'p50 ms':>9}{'p95 ms':>9}"
+            f"{'p99 ms':>9}{'req/s':>9}{'q/req':>7}"
+        )
+        for name, result in report["scenarios"].items():
+            latency = result["latency_ms"]
+            queries = result["queries_per_request"]["mean"]
+            self.stdout.write(
+                f"{name:<22}{result['requests']:>6}{result['errors']:>6}"
+                f"{latency['p50']:>9.1f}{latency['p95']:>9.1f}{latency['p99']:>9.1f}"
+                f"{result['throughput_rps']:>9.1f}"
+                f"{queries if queries is None else round(queries, 1)!s:>7}"
+            )
+
+        output = Path(options["output"])
+        output.write_text(json.dumps(report, indent=2) + "\n")
+        self.stdout.write(self.style.SUCCESS(f"\nDone. Report written to {output}"))
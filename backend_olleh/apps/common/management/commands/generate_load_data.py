@@ -0,0 +1,63 @@
+"""
+Bulk-generate production-scale synthetic data (members with profiles, memberships in every
+status, layaways across the lifecycle, payments and savings ledgers) for local query-plan
+and load testing. Deterministic per --seed; reruns append further members.
+
+    python manage.py generate_load_data --users 100000
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.common.load_data import DEFAULT_CHUNK_SIZE, generate_load_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-generate synthetic members, memberships, layaways, payments and savings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=10_000,
+            help="Number of members to add (default: 10000).",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=42,
+            help="Random seed; the same seed reproduces the same members (default: 42).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f"Members built and inserted per transaction (default: {DEFAULT_CHUNK_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["chunk_size"] < 1:
+            raise CommandError("--users and --chunk-size must be positive.")
+
+        def progress(done, total):
+            self.stdout.write(f"  {done:,}/{total:,} members")
+
+        try:
+            result = generate_load_data(
+                users=options["users"],
+                seed=options["seed"],
+                chunk_size=options["chunk_size"],
+                progress=progress,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for label, count in result["rows"].items():
+            self.stdout.write(f"{label:<32}{count:>12,}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nDone. {result['users']:,} member(s) from index {result['first_index']:,} "
+                f"in {result['chunks']} chunk(s), {result['elapsed_seconds']}s."
+            )
+        )
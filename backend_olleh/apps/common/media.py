@@ -0,0 +1,157 @@
+"""
+Protected file delivery. Views check permissions, then serve_protected_file hands the
+byte transfer to the front web server according to settings.MEDIA_DELIVERY:
+
+- "x-accel-redirect" (nginx): an empty response whose X-Accel-Redirect header points at
+  an internal location, e.g. `location /protected-media/ { internal; alias /srv/media/; }`.
+- "x-sendfile" (Apache mod_xsendfile, lighttpd): X-Sendfile with the absolute path.
+- "python": Django streams the file itself, with ETag/Last-Modified, conditional requests
+  (304/412) and single byte ranges (206/416). For development and servers with neither.
+
+With either header the web server also answers Range and conditional requests, so Python
+workers never copy file bytes.
+"""
+
+import mimetypes
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.static import serve
+
+STREAM_BLOCK_SIZE = 64 * 1024
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header, size):
+    """
+    Inclusive (start, end) for a single-range Range header. None means send the whole
+    file (no header, multiple ranges or an invalid one, which RFC 9110 says to ignore);
+    ValueError means the range cannot be satisfied (416).
+    """
+    match = _RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        if int(last) == 0 or size == 0:
+            raise ValueError("Empty suffix range.")
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError("Range starts past the end of the file.")
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+def _if_range_matches(value, etag, last_modified):
+    if value.startswith(('"', "W/")):
+        # Strong comparison: a weak validator never matches
+        return value == etag
+    return parse_http_date_safe(value) == last_modified
+
+
+def _iter_range(file, start, length):
+    try:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(STREAM_BLOCK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def _stream_file(request, storage, name, content_type):
+    size = storage.size(name)
+    modified = storage.get_modified_time(name)
+    last_modified = int(modified.timestamp())
+    etag = quote_etag(f"{size:x}-{int(modified.timestamp() * 1_000_000):x}")
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(last_modified),
+        "Accept-Ranges": "bytes",
+    }
+    # 304 for a matching If-None-Match/If-Modified-Since, 412 for a failed If-Match;
+    # otherwise Django hands back the response it was given
+    unconditional = HttpResponse(headers=headers)
+    conditional = get_conditional_response(request, etag, last_modified, unconditional)
+    if conditional is not unconditional:
+        return conditional
+
+    byte_range = None
+    if_range = request.headers.get("If-Range")
+    if "Range" in request.headers and (
+        not if_range or _if_range_matches(if_range, etag, last_modified)
+    ):
+        try:
+            byte_range = parse_range(request.headers["Range"], size)
+        except ValueError:
+            response = HttpResponse(status=416, headers=headers)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    file = storage.open(name, "rb")
+    if byte_range is None:
+        return FileResponse(file, content_type=content_type, headers=headers)
+    start, end = byte_range
+    response = StreamingHttpResponse(
+        _iter_range(file, start, end - start + 1),
+        status=206,
+        content_type=content_type,
+        headers=headers,
+    )
+    response["Content-Length"] = end - start + 1
+    response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return response
+
+
+def serve_protected_file(request, file, cache_control="private, no-cache"):
+    """
+    Response delivering `file` (a FieldFile on FileSystemStorage) to a request that has
+    already been authorized. Raises FileNotFoundError when the file is missing.
+    """
+    content_type = mimetypes.guess_type(file.name)[0] or "application/octet-stream"
+    mode = settings.MEDIA_DELIVERY
+    if mode == "x-accel-redirect":
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_REDIRECT_PREFIX + quote(
+            file.name
+        )
+    elif mode == "x-sendfile":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = file.path
+    elif mode == "python":
+        if not file.storage.exists(file.name):
+            raise FileNotFoundError(file.name)
+        response = _stream_file(request, file.storage, file.name, content_type)
+    else:
+        raise ImproperlyConfigured(
+            "MEDIA_DELIVERY must be 'python', 'x-accel-redirect' or 'x-sendfile'."
+        )
+    response["Cache-Control"] = cache_control
+    return response
+
+
+def serve_public_media(request, path, document_root=None, show_indexes=False):
+    """
+    Development MEDIA_URL view (DEBUG only, see config.urls): django.views.static.serve
+    minus MEDIA_PROTECTED_PREFIXES, whose files only go out through serve_protected_file.
+    """
+    # The path serve() will open, so //, ./ and ../ cannot route around the check
+    normalized = posixpath.normpath(path).lstrip("/")
+    if normalized.startswith(tuple(settings.MEDIA_PROTECTED_PREFIXES)):
+        raise Http404("Protected media is served by its API endpoint.")
+    return serve(request, path, document_root, show_indexes)
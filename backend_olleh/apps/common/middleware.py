@@ -0,0 +1,182 @@
+"""
+Per-request DB / serializer / view / total timing, reported as Server-Timing headers.
+Enable with REQUEST_TIMING_ENABLED; requests over REQUEST_TIMING_SLOW_MS or
+REQUEST_TIMING_MAX_QUERIES are logged with their SQL grouped by fingerprint.
+
+view runs from process_view to process_template_response (DRF responses), or to the end
+of the inner stack for plain responses. A streamed body (exports, protected files) is
+sent after the header: its queries are not in the header, but are still counted and
+the slow-request check runs when the response is closed.
+
+Serializer time is measured by wrapping Serializer.data and ListSerializer.data for the
+whole process. The wrapper is only installed when the middleware loads with
+REQUEST_TIMING_ENABLED set, and does nothing outside a timed request.
+"""
+
+import logging
+import re
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework import serializers
+
+logger = logging.getLogger("olleh.request_timing")
+
+_current_timings = ContextVar("request_timings", default=None)
+
+# Collapse "IN (%s, %s, ...)" so queries differing only in list length share a fingerprint
+_IN_LIST_RE = re.compile(r"\bIN \((?:%s, )*%s\)", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def sql_fingerprint(sql):
+    """Parameterized SQL with whitespace and IN-lists normalized."""
+    return _IN_LIST_RE.sub("IN (...)", _WHITESPACE_RE.sub(" ", sql).strip())
+
+
+class RequestTimings:
+    def __init__(self):
+        self.queries = []  # (sql, seconds)
+        self.serializer_seconds = 0.0
+        self._serializer_depth = 0
+        self.view_started = None
+        self.view_finished = None
+
+    @property
+    def query_count(self):
+        return len(self.queries)
+
+    @property
+    def db_seconds(self):
+        return sum(seconds for _, seconds in self.queries)
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+    def grouped_queries(self, limit=5):
+        """[(fingerprint, count, total_seconds)] most expensive first."""
+        groups = defaultdict(lambda: [0, 0.0])
+        for sql, seconds in self.queries:
+            group = groups[sql_fingerprint(sql)]
+            group[0] += 1
+            group[1] += seconds
+        ranked = sorted(groups.items(), key=lambda item: item[1][1], reverse=True)
+        return [(sql, count, total) for sql, (count, total) in ranked[:limit]]
+
+
+def _timed_data(fget):
+    def data(self):
+        timings = _current_timings.get()
+        if timings is None or timings._serializer_depth:
+            return fget(self)
+        timings._serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return fget(self)
+        finally:
+            timings.serializer_seconds += time.perf_counter() - start
+            timings._serializer_depth -= 1
+
+    return property(data)
+
+
+def _install_serializer_timing():
+    """
+    Time root Serializer/ListSerializer .data (nested fields are included in the root).
+    Patches the DRF classes process-wide, once; only called with REQUEST_TIMING_ENABLED.
+    """
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        if not getattr(cls.data.fget, "_request_timed", False):
+            cls.data = _timed_data(cls.data.fget)
+            cls.data.fget._request_timed = True
+
+
+class RequestTimingMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, "REQUEST_TIMING_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, "REQUEST_TIMING_SLOW_MS", 500)
+        self.max_queries = getattr(settings, "REQUEST_TIMING_MAX_QUERIES", 50)
+        _install_serializer_timing()
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        stack = ExitStack()
+        start = time.perf_counter()
+        try:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timings))
+            response = self.get_response(request)
+        except BaseException:
+            stack.close()
+            raise
+        finally:
+            _current_timings.reset(token)
+        end = time.perf_counter()
+        total_ms = (end - start) * 1000
+
+        metrics = [
+            f'db;dur={timings.db_seconds * 1000:.1f};desc="{timings.query_count} queries"',
+            f"serialize;dur={timings.serializer_seconds * 1000:.1f}",
+        ]
+        if timings.view_started is not None:
+            view_end = timings.view_finished or end
+            metrics.append(f"view;dur={(view_end - timings.view_started) * 1000:.1f}")
+        # Everything below this (outermost) middleware, rendering included
+        metrics.append(f'total;dur={total_ms:.1f};desc="middleware and view"')
+        response["Server-Timing"] = ", ".join(metrics)
+
+        if response.streaming:
+            # Keep counting while the body is iterated; Django runs these on close()
+            def finish():
+                stack.close()
+                self.check_request(
+                    request, response, timings, (time.perf_counter() - start) * 1000
+                )
+
+            response._resource_closers.append(finish)
+        else:
+            stack.close()
+            self.check_request(request, response, timings, total_ms)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Called right after the view returns, before the response is rendered
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.view_finished = time.perf_counter()
+        return response
+
+    def check_request(self, request, response, timings, total_ms):
+        if total_ms >= self.slow_ms or timings.query_count >= self.max_queries:
+            self.log_slow_request(request, response, timings, total_ms)
+
+    def log_slow_request(self, request, response, timings, total_ms):
+        lines = [
+            (
+                f"{request.method} {request.path} -> {response.status_code}: "
+                f"{total_ms:.0f}ms total, {timings.query_count} queries / "
+                f"{timings.db_seconds * 1000:.0f}ms db, "
+                f"{timings.serializer_seconds * 1000:.0f}ms serialize"
+            )
+        ]
+        for sql, count, seconds in timings.grouped_queries():
+            lines.append(f"  {count}x {seconds * 1000:.1f}ms  {sql}")
+        logger.warning("\n".join(lines))
@@ -0,0 +1,83 @@
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination, newest first, on (created_at, id). The cursor holds the last row's
+    created_at and id, and a page is WHERE (created_at, id) < cursor ORDER BY created_at
+    DESC, id DESC LIMIT n + 1: no COUNT and no OFFSET, so every page costs the same however
+    large the table is and however many rows share a timestamp (idx_*_created indexes).
+    ?ordering=created_at pages oldest first the same way.
+    Page size: ?page_size= (default 50, max 200).
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.ordering = self.get_ordering(request, queryset, view)
+        if self.ordering[0].lstrip("-") != "created_at":
+            # Another ?ordering= field: DRF's single-column cursor
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        descending = self.ordering[0].startswith("-")
+        self.ordering = ("-created_at", "-id") if descending else ("created_at", "id")
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.cursor.position if self.cursor else None
+
+        # Reverse cursors (previous page) read backwards from the position
+        backwards = descending != reverse
+        prefix = "-" if backwards else ""
+        queryset = queryset.order_by(f"{prefix}created_at", f"{prefix}id")
+        if position is not None:
+            created_at, pk = self._parse_position(position)
+            op = "lt" if backwards else "gt"
+            queryset = queryset.filter(
+                Q(**{f"created_at__{op}": created_at})
+                | Q(created_at=created_at, **{f"id__{op}": pk})
+            )
+
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        following = (
+            self._get_position_from_instance(results[-1], self.ordering)
+            if len(results) > self.page_size
+            else None
+        )
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.next_position = position is not None, position
+            self.has_previous, self.previous_position = following is not None, following
+        else:
+            self.has_next, self.next_position = following is not None, following
+            self.has_previous, self.previous_position = position is not None, position
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def _get_position_from_instance(self, instance, ordering):
+        if ordering[0].lstrip("-") != "created_at":
+            return super()._get_position_from_instance(instance, ordering)
+        # Unique per row, so DRF's next/previous links never need an offset
+        if isinstance(instance, dict):
+            return f"{instance['created_at'].isoformat()}|{instance['id']}"
+        return f"{instance.created_at.isoformat()}|{instance.pk}"
+
+    def _parse_position(self, position):
+        try:
+            created_at, pk = position.rsplit("|", 1)
+            return datetime.fromisoformat(created_at), int(pk)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message) from None
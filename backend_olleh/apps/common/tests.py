@@ -1,3 +1,305 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from apps.common.middleware import sql_fingerprint
+
+
+@override_settings(REQUEST_TIMING_ENABLED=True, REQUEST_TIMING_SLOW_MS=0)
+class RequestTimingMiddlewareTestCase(TestCase):
+    """Test cases for Server-Timing instrumentation"""
+
+    def test_server_timing_header_and_slow_log(self):
+        """Responses carry db/serialize/view/total timings; slow requests are logged"""
+        with self.assertLogs("olleh.request_timing", level="WARNING") as logs:
+            response = self.client.get(reverse("policies-list"))
+        header = response["Server-Timing"]
+        self.assertIn("db;dur=", header)
+        self.assertIn("serialize;dur=", header)
+        self.assertIn("view;dur=", header)
+        self.assertIn("total;dur=", header)
+        self.assertIn("GET /api/policies/", logs.output[0])
+
+    def test_streamed_body_queries_are_counted_on_close(self):
+        """Export queries run while streaming; the request is judged once it closes"""
+        import re
+
+        from rest_framework.test import APIClient
+
+        from apps.orders.models import Layaway
+        from users.models import User
+
+        staff = User.objects.create_user(
+            email="staff@example.com", password="x", is_staff=True
+        )
+        Layaway.objects.create(user=staff, item_value_rwf=10_000, service_fee_rwf=0)
+        client = APIClient()
+        client.force_authenticate(user=staff)
+        url = reverse("exports", kwargs={"dataset": "layaways", "extension": "csv"})
+
+        with self.assertNoLogs("olleh.request_timing"):
+            response = client.get(url)
+        header_queries = int(
+            re.search(r'"(\d+) queries"', response["Server-Timing"])[1]
+        )
+        with self.assertLogs("olleh.request_timing", level="WARNING") as logs:
+            b"".join(response.streaming_content)
+        logged_queries = int(re.search(r"(\d+) queries", logs.output[0])[1])
+        self.assertGreater(logged_queries, header_queries)
+
+    def test_sql_fingerprint_collapses_in_lists(self):
+        """IN lists of any length share a fingerprint"""
+        self.assertEqual(
+            sql_fingerprint('SELECT * FROM "t" WHERE id IN (%s, %s,\n %s)'),
+            sql_fingerprint('SELECT * FROM "t" WHERE id IN (%s)'),
+        )
+
+
+class PoliciesCacheTestCase(TestCase):
+    """Test cases for the cached, ETag-validated policies endpoint"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_steady_state_costs_no_queries(self):
+        """Second request is served from cache; If-None-Match gives 304"""
+        url = reverse("policies-list")
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("max-age=", first["Cache-Control"])
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_etag_varies_with_rendering(self):
+        """JSON and browsable renderings get different ETags and Vary: Accept"""
+        url = reverse("policies-list")
+        json_response = self.client.get(url, HTTP_ACCEPT="application/json")
+        html_response = self.client.get(url, HTTP_ACCEPT="text/html")
+        self.assertIn("Accept", json_response["Vary"])
+        self.assertNotEqual(json_response["ETag"], html_response["ETag"])
+        response = self.client.get(
+            url, HTTP_ACCEPT="text/html", HTTP_IF_NONE_MATCH=json_response["ETag"]
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_tier_change_invalidates(self):
+        """Saving a tier bumps the version and changes the ETag"""
+        from apps.memberships.models import Membership
+
+        url = reverse("policies-list")
+        etag = self.client.get(url)["ETag"]
+        Membership.objects.create(
+            name="Test Tier",
+            price=5_000,
+            max_order_price=20_000,
+            description="Test tier (annual)",
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        names = [tier["name"] for tier in response.json()["membership_tiers"]["tiers"]]
+        self.assertIn("Test Tier", names)
+
+
+class BenchmarkTestCase(TestCase):
+    """Smoke test for the benchmark harness (manage.py bench)"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_every_scenario_runs_and_reports(self):
+        """All scenarios succeed against a tiny population; report is JSON-serializable"""
+        import json
+
+        from apps.common.bench import SCENARIOS, run_benchmark, seed_population
+
+        population = seed_population(
+            users=3, layaways_per_user=1, transactions_per_user=2
+        )
+        report = run_benchmark(population, requests_per_scenario=3, warmup=1)
+        json.dumps(report)
+        self.assertEqual(set(report["scenarios"]), set(SCENARIOS))
+        for name, result in report["scenarios"].items():
+            self.assertEqual(result["errors"], 0, name)
+            self.assertEqual(result["requests"], 3)
+            self.assertIsNotNone(result["latency_ms"]["p99"])
+        self.assertGreater(
+            report["scenarios"]["eligibility"]["queries_per_request"]["mean"], 0
+        )
+
+    def test_transport_failures_are_recorded_by_type(self):
+        """Connection errors become status-0 samples; other exceptions propagate"""
+        from apps.common.bench.runner import _timed_send, summarize
+
+        class Failing:
+            def __init__(self, exc):
+                self.exc = exc
+
+            def send(self, request):
+                raise self.exc
+
+        sample = _timed_send(Failing(ConnectionResetError()), None)
+        result = summarize([sample], 1.0)
+        self.assertEqual(result["errors"], 1)
+        self.assertEqual(result["transport_errors"], {"ConnectionResetError": 1})
+        with self.assertRaises(KeyError):
+            _timed_send(Failing(KeyError("bug")), None)
+
+
+class GenerateLoadDataTestCase(TestCase):
+    """Test cases for the synthetic scale-test data generator"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_generated_data_is_consistent(self):
+        """Ledgers balance, exposure needs no repair, and reruns append members"""
+        from django.db.models import F, Sum
+
+        from apps.common.load_data import generate_load_data
+        from apps.orders.services import rebuild_layaway_exposure
+        from apps.savings.models import SavingsAccount
+        from users.models import MemberProfile
+
+        result = generate_load_data(users=40, chunk_size=15)
+        self.assertEqual(result["chunks"], 3)
+        self.assertEqual(result["rows"]["users.MemberProfile"], 40)
+        self.assertEqual(
+            SavingsAccount.objects.annotate(total=Sum("transactions__amount_rwf"))
+            .exclude(balance_rwf=F("total"))
+            .count(),
+            0,
+        )
+        self.assertEqual(rebuild_layaway_exposure(dry_run=True)["drift"], [])
+
+        again = generate_load_data(users=5)
+        self.assertEqual(again["first_index"], 40)
+        self.assertEqual(MemberProfile.objects.count(), 45)
+
+    def test_members_are_deterministic_per_seed(self):
+        """The same (seed, index) always plans the same member"""
+        import random
+
+        from django.utils import timezone
+
+        from apps.common.load_data import MemberPlan
+        from apps.memberships.models import Membership
+        from apps.orders.models import Layaway
+
+        now = timezone.now()
+        tiers = [
+            Membership(id=1, price=10_000, max_order_price=50_000, duration_days=365)
+        ]
+
+        def plan(seed):
+            member = MemberPlan(7, random.Random(f"{seed}:7"), now, tiers, None, "x")
+            return [
+                (layaway.status, layaway.total_rwf, layaway.amount_paid_rwf)
+                for layaway in member.rows[Layaway]
+            ] + [member.joined]
+
+        self.assertEqual(plan(42), plan(42))
+        self.assertNotEqual(plan(42), plan(43))
+
+
+class ExportTestCase(TestCase):
+    """Test cases for the streaming staff exports"""
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+
+        from apps.orders.models import Layaway
+        from users.models import User
+
+        self.staff = User.objects.create_user(
+            email="staff@example.com", password="x", is_staff=True
+        )
+        self.member = User.objects.create_user(email="member@example.com", password="x")
+        self.layaways = [
+            Layaway.objects.create(
+                user=self.member, item_value_rwf=10_000 * (i + 1), service_fee_rwf=0
+            )
+            for i in range(3)
+        ]
+        Layaway.objects.filter(pk=self.layaways[0].pk).update(
+            status=Layaway.STATUS_ACTIVE
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.staff)
+
+    def _url(self, dataset, extension):
+        return reverse("exports", kwargs={"dataset": dataset, "extension": extension})
+
+    def test_csv_streams_filtered_rows(self):
+        """CSV is streamed in created_at order and filtered by status"""
+        import csv
+
+        response = self.client.get(
+            self._url("layaways", "csv"), {"status": "pending_confirmation"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn("attachment;", response["Content-Disposition"])
+        rows = list(
+            csv.DictReader(b"".join(response.streaming_content).decode().splitlines())
+        )
+        self.assertEqual(
+            [int(row["id"]) for row in rows],
+            [layaway.pk for layaway in self.layaways[1:]],
+        )
+        self.assertEqual(rows[0]["user_email"], "member@example.com")
+
+    def test_csv_neutralizes_formulas(self):
+        """Text cells that a spreadsheet would evaluate are prefixed with a quote"""
+        import csv
+
+        from apps.orders.models import Layaway
+
+        descriptions = ['=HYPERLINK("http://x.test","x")', "+1", "-2+3", "@SUM(A1)"]
+        for layaway, description in zip(self.layaways, descriptions):
+            Layaway.objects.filter(pk=layaway.pk).update(item_description=description)
+        Layaway.objects.create(
+            user=self.member,
+            item_value_rwf=5_000,
+            service_fee_rwf=0,
+            item_description=descriptions[3],
+        )
+
+        response = self.client.get(self._url("layaways", "csv"))
+        rows = list(
+            csv.DictReader(b"".join(response.streaming_content).decode().splitlines())
+        )
+        self.assertEqual(
+            [row["item_description"] for row in rows],
+            ["'" + description for description in descriptions],
+        )
+        self.assertEqual(rows[0]["item_value_rwf"], "10000")
+
+    def test_jsonl_with_date_range(self):
+        """JSONL has one object per row; dates bound created_at inclusively"""
+        import json
+
+        from django.utils import timezone
+
+        today = timezone.localdate().isoformat()
+        response = self.client.get(
+            self._url("layaways", "jsonl"), {"from": today, "to": today}
+        )
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[0])["item_value_rwf"], 10_000)
+
+        response = self.client.get(self._url("layaways", "jsonl"), {"to": "2000-01-01"})
+        self.assertEqual(b"".join(response.streaming_content), b"")
+
+    def test_rejects_bad_filters_and_non_staff(self):
+        """Bad filters are 400, unknown exports 404, members 403"""
+        url = self._url("layaway-payments", "csv")
+        self.assertEqual(self.client.get(url, {"status": "paid"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"from": "yesterday"}).status_code, 400)
+        self.assertEqual(self.client.get(self._url("users", "csv")).status_code, 404)
+        self.client.force_authenticate(user=self.member)
+        self.assertEqual(self.client.get(url).status_code, 403)
@@ -1,3 +1,18 @@
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from rest_framework import status
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 from drf_spectacular.utils import extend_schema
@@ -12,7 +27,94 @@ from apps.orders.models import (
     CANCELLATION_PENALTY_RWF,
     DEFAULT_PENALTY_RWF,
 )
+from apps.common.exports import (
+    EXPORT_DATASETS,
+    EXPORT_FORMATS,
+    EXPORT_WRITERS,
+    parse_export_filters,
+)
 from apps.memberships.models import Membership
+from apps.memberships.tiers import get_available_tiers
+
+
+POLICIES_CACHE_KEY = "policies:payload:{constants}:{version}"
+POLICIES_MAX_AGE = 300  # seconds browsers/CDNs may reuse before revalidating
+# Entries of superseded tier versions are never read again; let them expire
+POLICIES_CACHE_TIMEOUT = 24 * 60 * 60  # seconds
+# Changes when a deploy changes the policy constants, so old shared-cache entries are not reused
+_POLICIES_CONSTANTS_TAG = hashlib.sha256(
+    repr(
+        (
+            LAYAWAY_MIN_DAYS,
+            LAYAWAY_MAX_DAYS,
+            COOLING_OFF_HOURS,
+            SERVICE_FEE_FLAT_THRESHOLD_RWF,
+            SERVICE_FEE_FLAT_AMOUNT_RWF,
+            SERVICE_FEE_PERCENT_ABOVE_THRESHOLD,
+            CANCELLATION_PENALTY_RWF,
+            DEFAULT_PENALTY_RWF,
+        )
+    ).encode()
+).hexdigest()[:12]
+
+# In-process copy: (tier version, payload, payload digest)
+_policies_local = (None, None, None)
+
+
+def build_policies_payload():
+    # Membership tiers from DB (via the tier catalog): name, price, max layaway
+    membership_tiers = [
+        {
+            "name": tier.name,
+            "price": tier.price,
+            "max_order_price": tier.max_order_price,
+            "duration_days": tier.duration_days,
+        }
+        for tier in get_available_tiers()
+    ]
+    return {
+        "layaway": {
+            "min_days": LAYAWAY_MIN_DAYS,
+            "max_days": LAYAWAY_MAX_DAYS,
+            "cooling_off_hours": COOLING_OFF_HOURS,
+        },
+        "service_fee": {
+            "item_value_threshold_rwf": SERVICE_FEE_FLAT_THRESHOLD_RWF,
+            "flat_fee_rwf": SERVICE_FEE_FLAT_AMOUNT_RWF,
+            "percent_above_threshold": SERVICE_FEE_PERCENT_ABOVE_THRESHOLD,
+            "description": f"Items ≤{SERVICE_FEE_FLAT_THRESHOLD_RWF:,} RWF: {SERVICE_FEE_FLAT_AMOUNT_RWF:,} RWF flat. Above: {SERVICE_FEE_PERCENT_ABOVE_THRESHOLD}%.",
+        },
+        "penalties": {
+            "cancellation_penalty_rwf": CANCELLATION_PENALTY_RWF,
+            "default_penalty_rwf": DEFAULT_PENALTY_RWF,
+        },
+        "membership_tiers": {
+            "description": "Max layaway (item value) = max_order_price of the active membership tier. Edit tiers in Admin to change.",
+            "tiers": membership_tiers,
+        },
+    }
+
+
+def get_policies_payload():
+    """
+    Return (payload, digest). Served from the process, then the shared cache, keyed by
+    the tier table version (bumped on Membership save/delete); the DB is only hit on a miss.
+    """
+    global _policies_local
+    version = Membership.tiers_version()
+    local_version, payload, digest = _policies_local
+    if local_version == version:
+        return payload, digest
+
+    key = POLICIES_CACHE_KEY.format(constants=_POLICIES_CONSTANTS_TAG, version=version)
+    cached = cache.get(key)
+    if cached is None:
+        payload = build_policies_payload()
+        body = json.dumps(payload, sort_keys=True).encode()
+        cached = (payload, hashlib.sha256(body).hexdigest()[:32])
+        cache.set(key, cached, timeout=POLICIES_CACHE_TIMEOUT)
+    _policies_local = (version, *cached)
+    return cached
 
 
 class PoliciesViewSet(GenericViewSet):
@@ -25,37 +127,60 @@ class PoliciesViewSet(GenericViewSet):
 
     @extend_schema(
         summary="Get OLLEH policies",
-        description="Returns policy constants and current membership tiers (from DB). Edit tiers in Admin to change limits.",
+        description="Returns policy constants and current membership tiers (from DB). Edit tiers in Admin to change limits. "
+        "Supports If-None-Match: an unchanged payload returns 304 Not Modified.",
         tags=["Public - Policies"],
         responses={200: None},
     )
     def list(self, request):
-        # Membership tiers from DB: name, price, max layaway (no hardcoded tier names or limits)
-        membership_tiers = list(
-            Membership.objects.filter(is_available=True)
-            .order_by("price")
-            .values("name", "price", "max_order_price", "duration_days")
-        )
-        return Response(
-            {
-                "layaway": {
-                    "min_days": LAYAWAY_MIN_DAYS,
-                    "max_days": LAYAWAY_MAX_DAYS,
-                    "cooling_off_hours": COOLING_OFF_HOURS,
-                },
-                "service_fee": {
-                    "item_value_threshold_rwf": SERVICE_FEE_FLAT_THRESHOLD_RWF,
-                    "flat_fee_rwf": SERVICE_FEE_FLAT_AMOUNT_RWF,
-                    "percent_above_threshold": SERVICE_FEE_PERCENT_ABOVE_THRESHOLD,
-                    "description": f"Items ≤{SERVICE_FEE_FLAT_THRESHOLD_RWF:,} RWF: {SERVICE_FEE_FLAT_AMOUNT_RWF:,} RWF flat. Above: {SERVICE_FEE_PERCENT_ABOVE_THRESHOLD}%.",
-                },
-                "penalties": {
-                    "cancellation_penalty_rwf": CANCELLATION_PENALTY_RWF,
-                    "default_penalty_rwf": DEFAULT_PENALTY_RWF,
-                },
-                "membership_tiers": {
-                    "description": "Max layaway (item value) = max_order_price of the active membership tier. Edit tiers in Admin to change.",
-                    "tiers": membership_tiers,
-                },
-            }
+        payload, digest = get_policies_payload()
+        # JSON and the browsable API are different bytes: one validator per rendering
+        etag = f'"{digest}-{request.accepted_renderer.format}"'
+        response = get_conditional_response(request, etag=etag) or Response(payload)
+        response["ETag"] = etag
+        patch_vary_headers(response, ["Accept"])
+        patch_cache_control(response, public=True, max_age=POLICIES_MAX_AGE)
+        return response
+
+
+class ExportViewSet(GenericViewSet):
+    """
+    Staff exports streamed as CSV or JSONL (/api/exports/<dataset>.<csv|jsonl>).
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def perform_content_negotiation(self, request, force=False):
+        # The body is CSV/JSONL whatever the Accept header; errors still render as JSON
+        return super().perform_content_negotiation(request, force=True)
+
+    @extend_schema(
+        summary="Export records (staff)",
+        description="Datasets: layaways, layaway-payments, memberships, savings-transactions. "
+        "Query params: from/to (YYYY-MM-DD, inclusive, on created_at) and status (repeatable or "
+        "comma-separated; confirmed/unconfirmed for payments, kind for savings transactions). "
+        "Streamed in created_at order.",
+        tags=["Staff - Exports"],
+        responses={200: None},
+    )
+    def list(self, request, dataset, extension):
+        export = EXPORT_DATASETS.get(dataset)
+        if export is None or extension not in EXPORT_FORMATS:
+            raise NotFound("Unknown export.")
+        try:
+            date_from, date_to, statuses = parse_export_filters(
+                export, request.query_params
+            )
+        except ValidationError as e:
+            return Response(
+                {"detail": "; ".join(e.messages)}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rows = EXPORT_WRITERS[extension](
+            export, export.queryset(date_from, date_to, statuses)
         )
+        response = StreamingHttpResponse(rows, content_type=EXPORT_FORMATS[extension])
+        filename = f"{dataset}-{timezone.localdate():%Y%m%d}.{extension}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        response["Cache-Control"] = "no-store"
+        return response
@@ -1,9 +1,15 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
-from django.contrib import messages
-from .models import Membership, UserMembership
 
+from apps.common.admin import report_bulk_result
+
+from .models import Membership, UserMembership
+from .services import (
+    bulk_activate_memberships,
+    bulk_cancel_memberships,
+    bulk_mark_memberships_paid,
+)
 
 # --- Membership Admin ---
 
@@ -75,6 +81,7 @@ class UserMembershipAdmin(admin.ModelAdmin):
         "payment_confirmed_at",
     )
     ordering = ("-created_at",)
+    list_select_related = ("user", "membership")
     actions = ["mark_as_paid", "activate_membership", "cancel_membership"]
 
     fieldsets = (
@@ -161,71 +168,24 @@ class UserMembershipAdmin(admin.ModelAdmin):
 
     def mark_as_paid(self, request, queryset):
         """Admin action to mark memberships as paid"""
-        count = 0
-        errors = 0
-
-        for membership in queryset:
-            try:
-                membership.mark_as_paid(request.user)
-                count += 1
-            except Exception as e:
-                errors += 1
-                messages.error(
-                    request, f"Error marking {membership.user.email} as paid: {str(e)}"
-                )
-
-        if count > 0:
-            messages.success(
-                request, f"Successfully marked {count} membership(s) as paid."
-            )
-        if errors > 0:
-            messages.warning(request, f"Failed to mark {errors} membership(s) as paid.")
+        result = bulk_mark_memberships_paid(queryset, request.user)
+        report_bulk_result(
+            self, request, result, "membership", "marked as paid", "mark as paid"
+        )
 
     mark_as_paid.short_description = "Mark selected as PAID"
 
     def activate_membership(self, request, queryset):
         """Admin action to activate memberships"""
-        count = 0
-        errors = 0
-
-        for membership in queryset:
-            try:
-                membership.activate(request.user)
-                count += 1
-            except Exception as e:
-                errors += 1
-                messages.error(
-                    request,
-                    f"Error activating membership for {membership.user.email}: {str(e)}",
-                )
-
-        if count > 0:
-            messages.success(request, f"Successfully activated {count} membership(s).")
-        if errors > 0:
-            messages.warning(request, f"Failed to activate {errors} membership(s).")
+        result = bulk_activate_memberships(queryset, request.user)
+        report_bulk_result(self, request, result, "membership", "activated", "activate")
 
     activate_membership.short_description = "Activate selected memberships"
 
     def cancel_membership(self, request, queryset):
         """Admin action to cancel memberships"""
-        count = 0
-        errors = 0
-
-        for membership in queryset:
-            try:
-                membership.cancel()
-                count += 1
-            except Exception as e:
-                errors += 1
-                messages.error(
-                    request,
-                    f"Error canceling membership for {membership.user.email}: {str(e)}",
-                )
-
-        if count > 0:
-            messages.success(request, f"Successfully canceled {count} membership(s).")
-        if errors > 0:
-            messages.warning(request, f"Failed to cancel {errors} membership(s).")
+        result = bulk_cancel_memberships(queryset)
+        report_bulk_result(self, request, result, "membership", "canceled", "cancel")
 
     cancel_membership.short_description = "Cancel selected memberships"
 
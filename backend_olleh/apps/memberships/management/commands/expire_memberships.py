@@ -0,0 +1,52 @@
+"""
+Expire all overdue active memberships in chunked set-based UPDATEs.
+Safe to run nightly (cron); idempotent. Use --dry-run to only count.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.memberships.services import (
+    DEFAULT_EXPIRE_CHUNK_SIZE,
+    expire_overdue_memberships,
+)
+
+
+class Command(BaseCommand):
+    help = "Expire active memberships whose end_date has passed (batched, uses idx_status_end_date)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_EXPIRE_CHUNK_SIZE,
+            help=f"Rows per UPDATE statement (default {DEFAULT_EXPIRE_CHUNK_SIZE}).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count overdue memberships; do not change anything.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            stats = expire_overdue_memberships(
+                chunk_size=options["chunk_size"],
+                dry_run=options["dry_run"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if stats["dry_run"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Dry run: {stats['matched']} membership(s) overdue as of {stats['cutoff']:%Y-%m-%d %H:%M}."
+                )
+            )
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done. {stats['expired']} of {stats['matched']} overdue membership(s) expired "
+                f"in {stats['chunks']} chunk(s), {stats['elapsed_seconds']}s."
+            )
+        )
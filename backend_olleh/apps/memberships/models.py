@@ -1,7 +1,11 @@
+import uuid
 from datetime import timedelta
 
+from django.core.cache import cache
 from django.db import models, transaction
 from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 
@@ -16,6 +20,16 @@ from users.models import User
 # Default duration: 1 year (per OLLEH agreement)
 DEFAULT_MEMBERSHIP_DURATION_DAYS = 365
 
+# Tier table version (cache token); changes on every Membership save/delete so
+# anything derived from the tiers can be cached under it.
+MEMBERSHIP_TIERS_VERSION_KEY = "memberships:tiers:version"
+
+# Active membership lookup cache (per user id). Entries never outlive end_date and are
+# tagged with the tier version, since they carry the tier (max_order_price) along.
+ACTIVE_MEMBERSHIP_CACHE_KEY = "memberships:active:{user_id}"
+ACTIVE_MEMBERSHIP_CACHE_TIMEOUT = 300  # seconds
+_NOT_CACHED = object()
+
 
 class Membership(BaseModel):
     """
@@ -46,6 +60,23 @@ class Membership(BaseModel):
     def __str__(self):
         return f"{self.name} ({self.price:,} RWF/year)"
 
+    @staticmethod
+    def tiers_version():
+        """Current tier table version token (random, so a cache flush never reuses one)."""
+        version = cache.get(MEMBERSHIP_TIERS_VERSION_KEY)
+        if version is None:
+            cache.add(MEMBERSHIP_TIERS_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+            version = cache.get(MEMBERSHIP_TIERS_VERSION_KEY)
+        return version
+
+    @staticmethod
+    def bump_tiers_version():
+        def bump():
+            cache.set(MEMBERSHIP_TIERS_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+        bump()
+        transaction.on_commit(bump)
+
 
 # =========================
 # User Membership
@@ -171,6 +202,8 @@ class UserMembership(BaseModel):
             # Payment lookups
             models.Index(fields=["payment_reference"], name="idx_payment_reference"),
             models.Index(fields=["payment_mode"], name="idx_payment_mode"),
+            # Staff list cursor pagination (-created_at, -id)
+            models.Index(fields=["created_at", "id"], name="idx_membership_created"),
         ]
 
     # =========================
@@ -192,32 +225,65 @@ class UserMembership(BaseModel):
 
         # Payment validation
         if self.status in [self.STATUS_PAID, self.STATUS_ACTIVE]:
-            if not self.payment_mode:
-                raise ValidationError("Payment mode is required.")
-
-            if (
-                self.payment_mode
-                in [
-                    self.PAYMENT_MOBILE_MONEY,
-                    self.PAYMENT_BANK,
-                ]
-                and not self.payment_reference
-            ):
-                raise ValidationError(
-                    "Payment reference is required for Mobile Money or Bank payments."
-                )
-
-            if not self.amount_paid:
-                raise ValidationError("Amount paid is required.")
+            error = self.payment_error(
+                self.payment_mode, self.payment_reference, self.amount_paid
+            )
+            if error:
+                raise ValidationError(error)
 
         # Date validation
         if self.start_date and self.end_date:
             if self.start_date >= self.end_date:
                 raise ValidationError("End date must be after start date.")
 
+    @classmethod
+    def payment_error(cls, payment_mode, payment_reference, amount_paid):
+        """Why payment details are insufficient for a paid/active membership, or None."""
+        if not payment_mode:
+            return "Payment mode is required."
+        if (
+            payment_mode
+            in [
+                cls.PAYMENT_MOBILE_MONEY,
+                cls.PAYMENT_BANK,
+            ]
+            and not payment_reference
+        ):
+            return "Payment reference is required for Mobile Money or Bank payments."
+        if not amount_paid:
+            return "Amount paid is required."
+        return None
+
     def save(self, *args, **kwargs):
         self.full_clean()
         super().save(*args, **kwargs)
+        self.invalidate_active_cache(self.user_id)
+        if "user" in self._state.fields_cache:
+            self.user.__dict__.pop("_active_membership_cache", None)
+
+    # =========================
+    # Active Membership Cache
+    # =========================
+
+    @staticmethod
+    def active_cache_key(user_id):
+        return ACTIVE_MEMBERSHIP_CACHE_KEY.format(user_id=user_id)
+
+    @classmethod
+    def invalidate_active_cache(cls, *user_ids):
+        """
+        Drop cached active-membership lookups for these users, now and again on commit
+        (so a concurrent read cannot re-cache pre-commit data).
+        """
+        keys = [cls.active_cache_key(user_id) for user_id in user_ids]
+        if not keys:
+            return
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+    @staticmethod
+    def _active_cache_is_fresh(active):
+        return active is None or active.end_date > timezone.now()
 
     # =========================
     # Business Logic
@@ -227,6 +293,42 @@ class UserMembership(BaseModel):
     def get_active_for_user(cls, user):
         """
         Return the single active (non-expired) membership for this user, or None.
+        Memoized on the user object (per request) and in the cache framework (across
+        requests); invalidated on save and on tier edits, and never served past the
+        membership's end_date.
+        """
+        if user.pk is None:
+            return None
+
+        active = getattr(user, "_active_membership_cache", _NOT_CACHED)
+        if active is not _NOT_CACHED and cls._active_cache_is_fresh(active):
+            return active
+
+        key = cls.active_cache_key(user.pk)
+        # Read the version before querying: a concurrent tier edit then orphans the entry
+        version = Membership.tiers_version()
+        cached = cache.get(key)
+        if (
+            cached is not None
+            and cached[0] == version
+            and cls._active_cache_is_fresh(cached[1])
+        ):
+            active = cached[1]
+        else:
+            active = cls._query_active_for_user(user)
+            timeout = ACTIVE_MEMBERSHIP_CACHE_TIMEOUT
+            if active is not None:
+                remaining = (active.end_date - timezone.now()).total_seconds()
+                timeout = max(1, min(timeout, int(remaining)))
+            # A tuple, so a cached "no membership" is distinguishable from a miss
+            cache.set(key, (version, active), timeout)
+
+        user._active_membership_cache = active
+        return active
+
+    @classmethod
+    def _query_active_for_user(cls, user):
+        """
         At most one active membership per user (enforced by unique_active_membership_per_user).
         Raises RuntimeError if duplicate actives exist (data integrity).
         """
@@ -323,3 +425,13 @@ class UserMembership(BaseModel):
         if self.status == self.STATUS_ACTIVE and self.end_date <= timezone.now():
             self.status = self.STATUS_EXPIRED
             self.save()
+
+
+@receiver(post_delete, sender=UserMembership)
+def _invalidate_active_cache_on_delete(sender, instance, **kwargs):
+    UserMembership.invalidate_active_cache(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Membership)
+def _bump_tiers_version(sender, **kwargs):
+    Membership.bump_tiers_version()
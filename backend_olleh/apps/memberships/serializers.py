@@ -3,6 +3,7 @@ from django.db import IntegrityError
 from django.core.exceptions import ValidationError as DjangoValidationError
 
 from apps.memberships.models import Membership, UserMembership
+from apps.memberships.tiers import get_tier
 
 
 # =========================
@@ -122,9 +123,26 @@ class UserMembershipDetailSerializer(serializers.ModelSerializer):
         ]
 
 
+class TierField(serializers.PrimaryKeyRelatedField):
+    """Membership primary key resolved from the tier catalog (no query) to a Tier record"""
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool) or not isinstance(data, (int, str)):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            tier = get_tier(int(data))
+        except ValueError:
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if tier is None:
+            self.fail("does_not_exist", pk_value=data)
+        return tier
+
+
 class UserMembershipCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating a new membership request"""
 
+    membership = TierField(queryset=Membership.objects.all())
+
     class Meta:
         model = UserMembership
         fields = [
@@ -190,14 +208,16 @@ class UserMembershipCreateSerializer(serializers.ModelSerializer):
         """Create a new membership request"""
         # Set the user from the request context
         user = self.context["request"].user
-        membership = validated_data["membership"]
+        # Tier record from the catalog; the model only needs its id
+        membership = validated_data.pop("membership")
+        validated_data["membership_id"] = membership.id
         validated_data["user"] = user
         validated_data["status"] = UserMembership.STATUS_PENDING
 
         # Check if user already has a pending membership for this tier
         existing_pending = UserMembership.objects.filter(
             user=user,
-            membership=membership,
+            membership_id=membership.id,
             status=UserMembership.STATUS_PENDING,
         ).first()
 
@@ -268,10 +288,11 @@ class UserMembershipUpdateSerializer(serializers.ModelSerializer):
 
         # Validate amount paid matches membership price if provided
         amount_paid = attrs.get("amount_paid")
-        if amount_paid and amount_paid != self.instance.membership.price:
+        membership = get_tier(self.instance.membership_id)
+        if amount_paid and amount_paid != membership.price:
             raise serializers.ValidationError(
                 {
-                    "amount_paid": f"Amount paid must match the annual membership price of {self.instance.membership.price:,} RWF."
+                    "amount_paid": f"Amount paid must match the annual membership price of {membership.price:,} RWF."
                 }
             )
 
@@ -0,0 +1,207 @@
+"""
+Membership batch operations (expiry sweeps, bulk admin transitions). Per-row transitions
+stay on UserMembership; these work on whole querysets with set-based UPDATEs.
+"""
+
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.memberships.models import UserMembership
+from apps.memberships.tiers import get_tier
+
+DEFAULT_EXPIRE_CHUNK_SIZE = 1000
+
+
+def expire_overdue_memberships(
+    now=None, chunk_size=DEFAULT_EXPIRE_CHUNK_SIZE, dry_run=False
+):
+    """
+    Expire every active membership whose end_date has passed.
+    Walks (status, end_date) via idx_status_end_date in chunks of chunk_size and
+    flips each chunk with a single UPDATE (no save()/full_clean() per row).
+    Returns dict: matched, expired, chunks, dry_run, cutoff, elapsed_seconds.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive.")
+    now = now or timezone.now()
+    started = time.monotonic()
+
+    overdue = UserMembership.objects.filter(
+        status=UserMembership.STATUS_ACTIVE,
+        end_date__lte=now,
+    )
+    matched = overdue.count()
+    expired = 0
+    chunks = 0
+
+    if not dry_run:
+        while True:
+            with transaction.atomic():
+                rows = list(
+                    overdue.order_by("end_date", "pk").values_list("pk", "user_id")[
+                        :chunk_size
+                    ]
+                )
+                if not rows:
+                    break
+                pks = [pk for pk, _ in rows]
+                # Re-check status in the UPDATE so rows changed meanwhile are skipped
+                expired += UserMembership.objects.filter(
+                    pk__in=pks,
+                    status=UserMembership.STATUS_ACTIVE,
+                ).update(
+                    status=UserMembership.STATUS_EXPIRED,
+                    updated_at=timezone.now(),
+                )
+                UserMembership.invalidate_active_cache(*{uid for _, uid in rows})
+            chunks += 1
+
+    return {
+        "matched": matched,
+        "expired": expired,
+        "chunks": chunks,
+        "dry_run": dry_run,
+        "cutoff": now,
+        "elapsed_seconds": round(time.monotonic() - started, 3),
+    }
+
+
+# =========================
+# Bulk transitions (admin actions)
+# =========================
+# Each validates the whole selection up front (same rules as the per-row methods), then
+# applies the transition with a fixed number of UPDATEs. Returns dict: selected, updated,
+# failed (list of {id, user, reason}).
+
+PAYMENT_FIELDS = ("status", "payment_mode", "payment_reference", "amount_paid")
+
+
+def _lock_selection(queryset, *fields):
+    """The selected rows, locked, in pk order: one SELECT ... FOR UPDATE."""
+    return list(
+        UserMembership.objects.filter(pk__in=queryset.order_by().values("pk"))
+        .select_for_update(of=("self",))
+        .order_by("pk")
+        .values("pk", "user_id", "user__email", *fields)
+    )
+
+
+def _failure(row, reason):
+    return {"id": row["pk"], "user": row["user__email"], "reason": reason}
+
+
+def _payment_error(row):
+    return UserMembership.payment_error(
+        row["payment_mode"], row["payment_reference"], row["amount_paid"]
+    )
+
+
+@transaction.atomic
+def bulk_mark_memberships_paid(queryset, admin_user):
+    """Pending -> paid for the selection (as UserMembership.mark_as_paid)."""
+    rows = _lock_selection(queryset, *PAYMENT_FIELDS)
+    failed = []
+    valid = []
+    for row in rows:
+        if row["status"] != UserMembership.STATUS_PENDING:
+            failed.append(
+                _failure(row, "Only pending memberships can be marked as paid.")
+            )
+        elif error := _payment_error(row):
+            failed.append(_failure(row, error))
+        else:
+            valid.append(row["pk"])
+
+    now = timezone.now()
+    updated = UserMembership.objects.filter(
+        pk__in=valid, status=UserMembership.STATUS_PENDING
+    ).update(
+        status=UserMembership.STATUS_PAID,
+        payment_confirmed_by=admin_user,
+        payment_confirmed_at=now,
+        updated_at=now,
+    )
+    return {"selected": len(rows), "updated": updated, "failed": failed}
+
+
+@transaction.atomic
+def bulk_activate_memberships(queryset, admin_user):
+    """
+    Pending/paid -> active for the selection (as UserMembership.activate): other active
+    memberships of these members are expired first, then one UPDATE per tier sets the
+    period (end date depends on the tier's duration).
+    """
+    rows = _lock_selection(queryset, "membership_id", *PAYMENT_FIELDS)
+    failed = []
+    by_tier = defaultdict(list)
+    users = set()
+    for row in rows:
+        if row["status"] not in (
+            UserMembership.STATUS_PAID,
+            UserMembership.STATUS_PENDING,
+        ):
+            failed.append(_failure(row, "Membership must be paid before activation."))
+        elif error := _payment_error(row):
+            failed.append(_failure(row, error))
+        elif row["user_id"] in users:
+            failed.append(
+                _failure(
+                    row,
+                    "Another selected membership for this user is being activated.",
+                )
+            )
+        else:
+            users.add(row["user_id"])
+            by_tier[row["membership_id"]].append(row["pk"])
+
+    now = timezone.now()
+    activating = [pk for pks in by_tier.values() for pk in pks]
+    # Only one active membership per user
+    UserMembership.objects.filter(
+        user_id__in=users, status=UserMembership.STATUS_ACTIVE
+    ).exclude(pk__in=activating).update(
+        status=UserMembership.STATUS_EXPIRED,
+        end_date=now,
+        updated_at=now,
+    )
+    updated = 0
+    for membership_id, pks in by_tier.items():
+        updated += UserMembership.objects.filter(
+            pk__in=pks,
+            status__in=[UserMembership.STATUS_PAID, UserMembership.STATUS_PENDING],
+        ).update(
+            status=UserMembership.STATUS_ACTIVE,
+            start_date=now,
+            end_date=now + timedelta(days=get_tier(membership_id).duration_days),
+            payment_confirmed_by=admin_user,
+            payment_confirmed_at=now,
+            updated_at=now,
+        )
+    UserMembership.invalidate_active_cache(*users)
+    return {"selected": len(rows), "updated": updated, "failed": failed}
+
+
+@transaction.atomic
+def bulk_cancel_memberships(queryset):
+    """Pending/paid -> canceled for the selection (as UserMembership.cancel)."""
+    rows = _lock_selection(queryset, "status")
+    cancelable = (UserMembership.STATUS_PENDING, UserMembership.STATUS_PAID)
+    failed = [
+        _failure(row, "Only pending or paid memberships can be canceled.")
+        for row in rows
+        if row["status"] not in cancelable
+    ]
+    now = timezone.now()
+    updated = UserMembership.objects.filter(
+        pk__in=[row["pk"] for row in rows if row["status"] in cancelable],
+        status__in=cancelable,
+    ).update(
+        status=UserMembership.STATUS_CANCELED,
+        end_date=now,
+        updated_at=now,
+    )
+    return {"selected": len(rows), "updated": updated, "failed": failed}
@@ -187,7 +187,7 @@ class MembershipAPITestCase(TestCase):
         response = self.client_api.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 0)
+        self.assertEqual(len(response.data["results"]), 0)
 
     def test_unauthenticated_access_denied(self):
         """Test that unauthenticated users cannot access endpoints"""
@@ -300,3 +300,379 @@ class UserMembershipModelTestCase(TestCase):
 
         # Second membership should be active
         self.assertEqual(second_membership.status, UserMembership.STATUS_ACTIVE)
+
+
+class ExpireMembershipsTestCase(TestCase):
+    """Test cases for the batch expiry sweep"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email="admin@example.com",
+            password="adminpass123",
+            is_staff=True,
+        )
+        self.membership = Membership.objects.create(
+            name="Test Tier",
+            price=10_000,
+            max_order_price=100_000,
+            description="Test tier (annual)",
+            duration_days=365,
+            is_available=True,
+        )
+
+    def _active_membership(self, email):
+        user = User.objects.create_user(email=email, password="testpass123")
+        user_membership = UserMembership.objects.create(
+            user=user,
+            membership=self.membership,
+            payment_mode=UserMembership.PAYMENT_CASH,
+            amount_paid=self.membership.price,
+            status=UserMembership.STATUS_PENDING,
+        )
+        user_membership.activate(self.admin)
+        return user_membership
+
+    def test_expire_overdue_memberships_in_chunks(self):
+        """Overdue actives are expired; current ones are left alone"""
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from apps.memberships.services import expire_overdue_memberships
+
+        overdue = [self._active_membership(f"old{i}@example.com") for i in range(3)]
+        current = self._active_membership("current@example.com")
+        UserMembership.objects.filter(pk__in=[m.pk for m in overdue]).update(
+            end_date=timezone.now() - timedelta(days=1)
+        )
+
+        stats = expire_overdue_memberships(dry_run=True)
+        self.assertEqual(stats["matched"], 3)
+        self.assertEqual(stats["expired"], 0)
+
+        stats = expire_overdue_memberships(chunk_size=2)
+        self.assertEqual(stats["expired"], 3)
+        self.assertEqual(stats["chunks"], 2)
+        self.assertEqual(
+            UserMembership.objects.filter(status=UserMembership.STATUS_EXPIRED).count(),
+            3,
+        )
+        current.refresh_from_db()
+        self.assertEqual(current.status, UserMembership.STATUS_ACTIVE)
+
+
+class ActiveMembershipCacheTestCase(TestCase):
+    """Test cases for the cached get_active_for_user lookup"""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",
+        )
+        self.admin = User.objects.create_user(
+            email="admin@example.com",
+            password="adminpass123",
+            is_staff=True,
+        )
+        self.membership = Membership.objects.create(
+            name="Test Tier",
+            price=10_000,
+            max_order_price=100_000,
+            description="Test tier (annual)",
+            duration_days=365,
+            is_available=True,
+        )
+        self.user_membership = UserMembership.objects.create(
+            user=self.user,
+            membership=self.membership,
+            payment_mode=UserMembership.PAYMENT_CASH,
+            amount_paid=self.membership.price,
+            status=UserMembership.STATUS_PENDING,
+        )
+
+    def test_lookup_is_cached_across_requests(self):
+        """Second lookup (fresh user object) hits the cache, not the DB"""
+        self.user_membership.activate(self.admin)
+        self.assertEqual(
+            UserMembership.get_active_for_user(self.user), self.user_membership
+        )
+        fresh_user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            active = UserMembership.get_active_for_user(fresh_user)
+        self.assertEqual(active, self.user_membership)
+        self.assertEqual(active.membership.max_order_price, 100_000)
+
+    def test_activate_invalidates_cached_lookup(self):
+        """Cached 'no membership' is dropped when the membership is activated"""
+        self.assertIsNone(UserMembership.get_active_for_user(self.user))
+        self.user_membership.activate(self.admin)
+        fresh_user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(
+            UserMembership.get_active_for_user(fresh_user), self.user_membership
+        )
+
+    def test_tier_edit_invalidates_cached_lookup(self):
+        """A cached lookup does not keep serving the tier's old max_order_price"""
+        self.user_membership.activate(self.admin)
+        UserMembership.get_active_for_user(self.user)
+        self.membership.max_order_price = 250_000
+        self.membership.save()
+        fresh_user = User.objects.get(pk=self.user.pk)
+        active = UserMembership.get_active_for_user(fresh_user)
+        self.assertEqual(active.membership.max_order_price, 250_000)
+
+
+class UserMembershipListQueryCountTestCase(TestCase):
+    """Guard against N+1 queries on membership listings"""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.admin = User.objects.create_user(
+            email="admin@example.com",
+            password="adminpass123",
+            is_staff=True,
+        )
+        self.membership = Membership.objects.create(
+            name="Test Tier",
+            price=10_000,
+            max_order_price=100_000,
+            description="Test tier (annual)",
+            duration_days=365,
+            is_available=True,
+        )
+        self.client_api = APIClient()
+        self.client_api.force_authenticate(user=self.admin)
+
+    def _add_memberships(self, count):
+        start = UserMembership.objects.count()
+        for i in range(start, start + count):
+            user = User.objects.create_user(
+                email=f"member{i}@example.com", password="testpass123"
+            )
+            UserMembership.objects.create(
+                user=user,
+                membership=self.membership,
+                payment_mode=UserMembership.PAYMENT_CASH,
+                amount_paid=self.membership.price,
+                status=UserMembership.STATUS_PENDING,
+            )
+
+    def _count_queries(self, client, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries)
+
+    def test_staff_list_query_count_is_constant(self):
+        """Listing 2 or 10 memberships costs the same number of queries"""
+        for name in ("list", "pending"):
+            url = reverse(f"memberships:user-membership-{name}")
+            self._add_memberships(2)
+            small = self._count_queries(self.client_api, url)
+            self._add_memberships(8)
+            large = self._count_queries(self.client_api, url)
+            self.assertEqual(small, large, f"{name} queries grow with row count")
+
+    def test_pending_is_paginated(self):
+        """Staff see every member's pending requests, one page at a time"""
+        self._add_memberships(3)
+        url = reverse("memberships:user-membership-pending") + "?page_size=2"
+        first = self.client_api.get(url)
+        self.assertEqual(len(first.data["results"]), 2)
+        second = self.client_api.get(first.data["next"])
+        self.assertEqual(len(second.data["results"]), 1)
+        self.assertIsNone(second.data["next"])
+
+    def test_admin_changelist_query_count_is_constant(self):
+        """Admin changelist selects user and membership in the same query"""
+        self.admin.is_superuser = True
+        self.admin.save()
+        self.client.force_login(self.admin)
+        url = reverse("admin:memberships_usermembership_changelist")
+        self._add_memberships(2)
+        small = self._count_queries(self.client, url)
+        self._add_memberships(8)
+        large = self._count_queries(self.client, url)
+        self.assertEqual(small, large)
+
+
+class TierCatalogTestCase(TestCase):
+    """Test cases for the in-process membership tier catalog"""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",
+        )
+        self.membership = Membership.objects.create(
+            name="Test Tier",
+            price=10_000,
+            max_order_price=100_000,
+            description="Test tier (annual)",
+            duration_days=365,
+            is_available=True,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_tier_list_served_from_catalog(self):
+        """After the first load, listing tiers does not query the DB"""
+        url = reverse("memberships:membership-list")
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url + "?ordering=-price")
+        prices = [tier["price"] for tier in response.data]
+        self.assertEqual(prices, sorted(prices, reverse=True))
+        self.assertIn("Test Tier", [tier["name"] for tier in response.data])
+
+    def test_tier_change_reloads_catalog(self):
+        """Saving a tier bumps the version; the next lookup sees the change"""
+        from apps.memberships.tiers import get_tier
+
+        self.assertEqual(get_tier(self.membership.id).price, 10_000)
+        self.membership.price = 12_000
+        self.membership.save()
+        tier = get_tier(self.membership.id)
+        self.assertEqual(tier.price, 12_000)
+        with self.assertRaises(AttributeError):
+            tier.price = 1
+
+    def test_create_request_validates_against_catalog(self):
+        """Unavailable tiers and wrong amounts are rejected"""
+        url = reverse("memberships:user-membership-list")
+        data = {
+            "membership": self.membership.id,
+            "payment_mode": UserMembership.PAYMENT_CASH,
+            "amount_paid": 9_000,
+        }
+        response = self.client.post(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("amount_paid", response.data)
+
+        data["amount_paid"] = 10_000
+        response = self.client.post(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["membership"], self.membership.id)
+
+        Membership.objects.filter(pk=self.membership.pk).update(is_available=False)
+        Membership.bump_tiers_version()
+        response = self.client.post(url, data, format="json")
+        self.assertIn("membership", response.data)
+
+
+class BulkMembershipActionsTestCase(TestCase):
+    """Test cases for the bulk admin transitions"""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.admin_user = User.objects.create_user(
+            email="admin@example.com",
+            password="adminpass123",
+            is_staff=True,
+        )
+        self.membership = Membership.objects.create(
+            name="Test Tier",
+            price=10_000,
+            max_order_price=100_000,
+            description="Test tier (annual)",
+            duration_days=365,
+            is_available=True,
+        )
+        self.users = [
+            User.objects.create_user(email=f"member{i}@example.com", password="x")
+            for i in range(4)
+        ]
+
+    def _request(self, user, **fields):
+        request = UserMembership.objects.create(
+            user=user,
+            membership=self.membership,
+            payment_mode=UserMembership.PAYMENT_CASH,
+            amount_paid=10_000,
+        )
+        if fields:
+            UserMembership.objects.filter(pk=request.pk).update(**fields)
+        return request
+
+    def test_mark_paid_reports_failures_per_row(self):
+        """Valid rows move together; invalid ones are reported, not raised"""
+        from apps.memberships.services import bulk_mark_memberships_paid
+
+        ok = [self._request(user) for user in self.users[:2]]
+        no_reference = self._request(
+            self.users[2], payment_mode=UserMembership.PAYMENT_MOBILE_MONEY
+        )
+        canceled = self._request(self.users[3], status=UserMembership.STATUS_CANCELED)
+
+        with self.assertNumQueries(4):
+            result = bulk_mark_memberships_paid(
+                UserMembership.objects.all(), self.admin_user
+            )
+
+        self.assertEqual(result["selected"], 4)
+        self.assertEqual(result["updated"], 2)
+        self.assertEqual(
+            {failure["id"] for failure in result["failed"]},
+            {no_reference.pk, canceled.pk},
+        )
+        self.assertEqual(
+            set(
+                UserMembership.objects.filter(
+                    status=UserMembership.STATUS_PAID,
+                    payment_confirmed_by=self.admin_user,
+                ).values_list("pk", flat=True)
+            ),
+            {request.pk for request in ok},
+        )
+
+    def test_activate_expires_previous_and_rejects_duplicates(self):
+        """One active membership per member, including within the selection"""
+        from apps.memberships.services import bulk_activate_memberships
+
+        previous = self._request(self.users[0], status=UserMembership.STATUS_ACTIVE)
+        renewal = self._request(self.users[0], status=UserMembership.STATUS_PAID)
+        first = self._request(self.users[1], status=UserMembership.STATUS_PAID)
+        duplicate = self._request(self.users[1])
+
+        result = bulk_activate_memberships(
+            UserMembership.objects.filter(pk__in=[renewal.pk, first.pk, duplicate.pk]),
+            self.admin_user,
+        )
+
+        self.assertEqual(result["updated"], 2)
+        self.assertEqual(
+            [failure["id"] for failure in result["failed"]], [duplicate.pk]
+        )
+        previous.refresh_from_db()
+        renewal.refresh_from_db()
+        self.assertEqual(previous.status, UserMembership.STATUS_EXPIRED)
+        self.assertEqual(renewal.status, UserMembership.STATUS_ACTIVE)
+        self.assertEqual((renewal.end_date - renewal.start_date).days, 365)
+        self.assertEqual(UserMembership.get_active_for_user(self.users[1]).pk, first.pk)
+
+    def test_cancel_only_pending_or_paid(self):
+        """Active memberships cannot be canceled in bulk"""
+        from apps.memberships.services import bulk_cancel_memberships
+
+        pending = self._request(self.users[0])
+        active = self._request(self.users[1], status=UserMembership.STATUS_ACTIVE)
+
+        result = bulk_cancel_memberships(UserMembership.objects.all())
+
+        self.assertEqual(result["updated"], 1)
+        self.assertEqual([failure["id"] for failure in result["failed"]], [active.pk])
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, UserMembership.STATUS_CANCELED)
@@ -0,0 +1,74 @@
+"""
+Process-local snapshot of the membership tier table (a handful of rows that rarely change).
+Loaded once per tier version (Membership.tiers_version, bumped on save/delete), so every
+worker reloads after a tier edit and tier lookups are otherwise plain dictionary reads.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+
+from apps.memberships.models import Membership
+
+
+@dataclass(frozen=True)
+class Tier:
+    """Immutable copy of a Membership row; same attribute names, so serializers accept it."""
+
+    id: int
+    name: str
+    price: int
+    max_order_price: int
+    description: str
+    is_available: bool
+    duration_days: int
+    created_at: datetime
+    updated_at: datetime
+
+    @property
+    def pk(self):
+        return self.id
+
+
+# (tier version, {id: Tier})
+_catalog = (None, MappingProxyType({}))
+
+
+def get_tier_catalog():
+    """Return a read-only {id: Tier} mapping of all tiers, reloading only when the version changes."""
+    global _catalog
+    # Read the version before loading: a concurrent bump then forces another reload
+    version = Membership.tiers_version()
+    loaded_version, tiers = _catalog
+    if loaded_version != version:
+        tiers = MappingProxyType(
+            {
+                row["id"]: Tier(**row)
+                for row in Membership.objects.values(
+                    "id",
+                    "name",
+                    "price",
+                    "max_order_price",
+                    "description",
+                    "is_available",
+                    "duration_days",
+                    "created_at",
+                    "updated_at",
+                )
+            }
+        )
+        _catalog = (version, tiers)
+    return tiers
+
+
+def get_tier(tier_id):
+    """Return the Tier with this id, or None."""
+    return get_tier_catalog().get(tier_id)
+
+
+def get_available_tiers():
+    """Available tiers ordered by price (cheapest first)."""
+    return sorted(
+        (tier for tier in get_tier_catalog().values() if tier.is_available),
+        key=lambda tier: (tier.price, tier.id),
+    )
@@ -1,10 +1,12 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema, extend_schema_view
 
+from apps.common.pagination import CreatedAtCursorPagination
 from apps.memberships.models import Membership, UserMembership
 from apps.memberships.serializers import (
     MembershipSerializer,
@@ -14,6 +16,7 @@ from apps.memberships.serializers import (
     UserMembershipUpdateSerializer,
 )
 from apps.memberships.permissions import IsOwnerOrAdmin, IsAuthenticatedClient
+from apps.memberships.tiers import get_available_tiers, get_tier
 
 
 # =========================
@@ -46,6 +49,28 @@ class MembershipViewSet(viewsets.ReadOnlyModelViewSet):
     ordering_fields = ["price", "duration_days", "created_at"]
     ordering = ["price"]
 
+    # Served from the in-process tier catalog (no DB query per request)
+
+    def list(self, request, *args, **kwargs):
+        tiers = get_available_tiers()
+        ordering = filters.OrderingFilter().get_ordering(request, self.queryset, self)
+        # Stable sorts applied last key first give multi-key ordering
+        for field in reversed(ordering or []):
+            tiers.sort(
+                key=lambda tier: getattr(tier, field.lstrip("-")),
+                reverse=field.startswith("-"),
+            )
+        return Response(self.get_serializer(tiers, many=True).data)
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            tier = get_tier(int(kwargs[self.lookup_field]))
+        except ValueError:
+            tier = None
+        if tier is None or not tier.is_available:
+            raise NotFound()
+        return Response(self.get_serializer(tier).data)
+
 
 # =========================
 # User Membership ViewSet
@@ -91,10 +116,38 @@ class UserMembershipViewSet(viewsets.ModelViewSet):
     """
 
     permission_classes = [IsAuthenticatedClient, IsOwnerOrAdmin]
+    pagination_class = CreatedAtCursorPagination
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ["status", "membership"]
-    ordering_fields = ["created_at", "start_date", "end_date"]
-    ordering = ["-created_at"]
+    # Cursor pagination needs a non-null, append-only ordering key
+    ordering_fields = ["created_at"]
+    ordering = ["-created_at", "-id"]
+
+    # Related rows each action's serializer reads (avoids one query per row)
+    list_actions = ("list", "pending", "history")
+    list_only_fields = (
+        "id",
+        "user__email",
+        "membership__name",
+        "membership__price",
+        "status",
+        "start_date",
+        "end_date",
+        "payment_mode",
+        "payment_reference",
+        "amount_paid",
+        "created_at",
+        "updated_at",
+    )
+    select_related_by_action = {
+        "list": ("user", "membership"),
+        "pending": ("user", "membership"),
+        "history": ("user", "membership"),
+        "retrieve": ("user", "membership", "payment_confirmed_by"),
+        "partial_update": ("membership",),
+        "update": ("membership",),
+        "destroy": ("membership",),
+    }
 
     def get_queryset(self):
         """
@@ -103,8 +156,19 @@ class UserMembershipViewSet(viewsets.ModelViewSet):
         """
         user = self.request.user
         if user.is_staff or user.is_superuser:
-            return UserMembership.objects.all()
-        return UserMembership.objects.filter(user=user)
+            queryset = UserMembership.objects.all()
+        else:
+            queryset = UserMembership.objects.filter(user=user)
+        return self.shape_queryset(queryset)
+
+    def shape_queryset(self, queryset):
+        """Apply select_related/only for the current action so serializers do not hit the DB per row."""
+        related = self.select_related_by_action.get(self.action)
+        if related:
+            queryset = queryset.select_related(*related)
+        if self.action in self.list_actions:
+            queryset = queryset.only(*self.list_only_fields)
+        return queryset
 
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
@@ -163,11 +227,13 @@ class UserMembershipViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"])
     def pending(self, request):
         """Get all pending membership requests"""
-        pending_memberships = self.get_queryset().filter(
-            status=UserMembership.STATUS_PENDING
+        # Paginated like the list: for staff this is every member's pending requests
+        pending_memberships = self.filter_queryset(
+            self.get_queryset().filter(status=UserMembership.STATUS_PENDING)
         )
-        serializer = UserMembershipListSerializer(pending_memberships, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(pending_memberships)
+        serializer = UserMembershipListSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @extend_schema(
         summary="Get membership history",
@@ -178,8 +244,14 @@ class UserMembershipViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"])
     def history(self, request):
         """Get membership history (expired and canceled)"""
-        history = self.get_queryset().filter(
-            status__in=[UserMembership.STATUS_EXPIRED, UserMembership.STATUS_CANCELED]
+        history = self.filter_queryset(
+            self.get_queryset().filter(
+                status__in=[
+                    UserMembership.STATUS_EXPIRED,
+                    UserMembership.STATUS_CANCELED,
+                ]
+            )
         )
-        serializer = UserMembershipListSerializer(history, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(history)
+        serializer = UserMembershipListSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
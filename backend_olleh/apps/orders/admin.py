@@ -1,12 +1,28 @@
-from django.contrib import admin, messages
-from .models import Layaway, LayawayImage
+from django.contrib import admin
+from django.urls import reverse
+from django.utils.html import format_html, format_html_join
+
+from apps.common.admin import report_bulk_result
+from apps.orders.services import bulk_activate_layaways, bulk_confirm_layaways
+from apps.orders.similarity import find_similar_for_layaway
 from apps.payments.models import LayawayPayment
 
+from .models import Layaway, LayawayExposure, LayawayImage, LayawayImageBlob
+
 
 class LayawayImageInline(admin.TabularInline):
     model = LayawayImage
     extra = 0
-    fields = ("image", "caption", "order")
+    fields = ("image", "thumbnail_preview", "caption", "order")
+    readonly_fields = ("thumbnail_preview",)
+
+    @admin.display(description="Thumbnail")
+    def thumbnail_preview(self, obj):
+        if not obj.thumbnail:
+            return "-"
+        return format_html(
+            '<img src="{}" style="max-height: 80px;">', obj.get_file_url("thumbnail")
+        )
 
 
 class LayawayPaymentInline(admin.TabularInline):
@@ -37,28 +53,81 @@ class LayawayAdmin(admin.ModelAdmin):
         "seller_phone",
     )
     raw_id_fields = ("user",)
-    readonly_fields = ("created_at", "updated_at", "confirmed_at", "cooling_off_until")
+    readonly_fields = (
+        "created_at",
+        "updated_at",
+        "confirmed_at",
+        "cooling_off_until",
+        "similar_images",
+    )
     inlines = [LayawayImageInline, LayawayPaymentInline]
     actions = ["confirm_layaways", "activate_layaways"]
 
+    @admin.display(description="Similar item images on other layaways")
+    def similar_images(self, obj):
+        if obj.pk is None:
+            return "-"
+        rows = [
+            (
+                other.get_file_url("thumbnail"),
+                reverse("admin:orders_layaway_change", args=[other.layaway_id]),
+                other.layaway_id,
+                other.layaway.user.email,
+                other.layaway.get_status_display(),
+                distance,
+            )
+            for _, matches in find_similar_for_layaway(obj)
+            for other, distance in matches
+        ]
+        if not rows:
+            return "None found (or images not hashed yet)."
+        return format_html(
+            "<table>{}</table>",
+            format_html_join(
+                "",
+                '<tr><td><img src="{}" style="max-height: 60px;"></td>'
+                '<td><a href="{}">Layaway #{}</a></td><td>{}</td><td>{}</td>'
+                "<td>distance {}</td></tr>",
+                rows,
+            ),
+        )
+
     @admin.action(description="Confirm selected (start cooling-off)")
     def confirm_layaways(self, request, queryset):
-        for obj in queryset:
-            try:
-                obj.confirm_by_olleh()
-            except Exception as e:
-                self.message_user(
-                    request, f"Layaway {obj.id}: {e}", level=messages.ERROR
-                )
-        self.message_user(request, "Selected layaways confirmed.")
+        result = bulk_confirm_layaways(queryset)
+        report_bulk_result(self, request, result, "layaway", "confirmed", "confirm")
 
     @admin.action(description="Activate selected (14–30 days)")
     def activate_layaways(self, request, queryset):
-        for obj in queryset:
-            try:
-                obj.activate()
-            except Exception as e:
-                self.message_user(
-                    request, f"Layaway {obj.id}: {e}", level=messages.ERROR
-                )
-        self.message_user(request, "Selected layaways activated.")
+        result = bulk_activate_layaways(queryset)
+        report_bulk_result(self, request, result, "layaway", "activated", "activate")
+
+
+@admin.register(LayawayExposure)
+class LayawayExposureAdmin(admin.ModelAdmin):
+    list_display = ("user", "open_count", "open_total_rwf", "limit_rwf", "updated_at")
+    search_fields = ("user__email",)
+    raw_id_fields = ("user",)
+    readonly_fields = ("open_total_rwf", "open_count", "limit_rwf", "updated_at")
+
+
+@admin.register(LayawayImageBlob)
+class LayawayImageBlobAdmin(admin.ModelAdmin):
+    """Stored image files; maintained by uploads and gc_layaway_image_blobs."""
+
+    list_display = ("sha256", "size", "ref_count", "created_at", "updated_at")
+    search_fields = ("sha256",)
+    readonly_fields = (
+        "sha256",
+        "file",
+        "size",
+        "ref_count",
+        "created_at",
+        "updated_at",
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,157 @@
+"""
+LayawayImage variants: a small thumbnail for lists and a display size for detail views,
+written next to the original (layaway_item_images/blobs/ab/{sha256}_thumb.webp, so images
+sharing a blob share variants). They are generated after commit in a small thread pool
+(Pillow releases the GIL while resizing and encoding), so uploads return as soon as the
+original is stored.
+"""
+
+import io
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from threading import Lock
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+from apps.orders.similarity import perceptual_hash, phash_fields
+
+logger = logging.getLogger("olleh.images")
+
+# field -> (suffix, longest edge in px, encoder quality)
+IMAGE_VARIANTS = {
+    "display": ("display", 1280, 82),
+    "thumbnail": ("thumb", 320, 75),
+}
+# WebP when this Pillow build has it, otherwise JPEG
+VARIANT_FORMAT, VARIANT_EXTENSION = (
+    ("WEBP", "webp") if features.check("webp") else ("JPEG", "jpg")
+)
+
+_executor = None
+_executor_lock = Lock()
+
+
+def variant_name(original_name, suffix):
+    """layaway_item_images/12/34.png -> layaway_item_images/12/34_thumb.webp"""
+    stem = posixpath.splitext(original_name)[0]
+    return f"{stem}_{suffix}.{VARIANT_EXTENSION}"
+
+
+def render_variant(image, max_edge, quality):
+    """Encode a copy of `image` fitted within max_edge x max_edge; returns bytes."""
+    variant = image.copy()
+    variant.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+    if VARIANT_FORMAT == "JPEG" and variant.mode != "RGB":
+        variant = variant.convert("RGB")
+    buffer = io.BytesIO()
+    variant.save(buffer, VARIANT_FORMAT, quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def _open_for_variants(file, max_edge):
+    image = Image.open(file)
+    # JPEG can decode at 1/2..1/8 scale directly: far less memory for phone photos
+    image.draft("RGB", (max_edge, max_edge))
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+    return image
+
+
+def generate_image_variants(image_id, overwrite=False):
+    """
+    Write the variants of one LayawayImage and record them, with the image's perceptual
+    hash, on the row. Returns the {field: name} written, or None when the row or its
+    file is gone. Variants already on storage (another image with the same blob) are
+    reused unless `overwrite`.
+    """
+    from apps.orders.models import LayawayImage
+
+    row = LayawayImage.objects.filter(pk=image_id).first()
+    if row is None or not row.image:
+        return None
+    storage = row.image.storage
+    names = {
+        field: variant_name(row.image.name, suffix)
+        for field, (suffix, _, _) in IMAGE_VARIANTS.items()
+    }
+    if overwrite or not all(storage.exists(name) for name in names.values()):
+        _write_variants(row.image, names, overwrite)
+    # From the thumbnail: cheap to decode and identical for images sharing a blob
+    with storage.open(names["thumbnail"], "rb") as file, Image.open(file) as thumbnail:
+        fields = phash_fields(perceptual_hash(thumbnail))
+
+    # Only if the original was not replaced meanwhile (that schedules a new run)
+    LayawayImage.objects.filter(pk=image_id, image=row.image.name).update(
+        variants_generated_at=timezone.now(), **names, **fields
+    )
+    return names
+
+
+def _write_variants(original, names, overwrite):
+    """
+    Write each variant under its deterministic name (the only one blob cleanup deletes).
+    Storage.save picks another name when the file already exists, i.e. when a run for an
+    image sharing the blob got there first: that copy is identical, so ours is dropped.
+    """
+    storage = original.storage
+    largest = max(edge for _, edge, _ in IMAGE_VARIANTS.values())
+    with original.open("rb") as file:
+        image = _open_for_variants(file, largest)
+        for field, (_, max_edge, quality) in IMAGE_VARIANTS.items():
+            name = names[field]
+            if storage.exists(name):
+                if not overwrite:
+                    continue
+                storage.delete(name)
+            saved = storage.save(
+                name, ContentFile(render_variant(image, max_edge, quality))
+            )
+            if saved != name:
+                storage.delete(saved)
+        image.close()
+
+
+def _generate_logged(image_id):
+    try:
+        generate_image_variants(image_id)
+    except Exception:
+        logger.exception("Could not generate variants for layaway image %s", image_id)
+
+
+def _generate_in_worker(image_id):
+    try:
+        _generate_logged(image_id)
+    finally:
+        # Pool threads outlive requests: drop this thread's connection when stale
+        close_old_connections()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.LAYAWAY_IMAGE_WORKERS,
+                thread_name_prefix="layaway-images",
+            )
+        return _executor
+
+
+def _submit(image_id):
+    if settings.LAYAWAY_IMAGE_WORKERS <= 0:
+        # Inline (tests, development)
+        _generate_logged(image_id)
+        return
+    _get_executor().submit(_generate_in_worker, image_id)
+
+
+def schedule_image_variants(image_id):
+    """Generate the variants once the current transaction commits."""
+    transaction.on_commit(partial(_submit, image_id))
@@ -0,0 +1,61 @@
+"""
+Remove deduplicated item image blobs (and their variants) no LayawayImage references
+any more. Blobs released within the last --grace-hours are kept, so an upload that is
+attaching one is never raced. --recount first rebuilds reference counts from the
+LayawayImage rows; --dry-run only reports.
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from apps.orders.services import (
+    DEFAULT_BLOB_GRACE,
+    collect_image_blobs,
+    recount_image_blob_references,
+)
+
+
+class Command(BaseCommand):
+    help = "Delete unreferenced LayawayImage blobs and their files."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-hours",
+            type=float,
+            default=DEFAULT_BLOB_GRACE.total_seconds() / 3600,
+            help="Keep blobs released more recently than this (default: 24).",
+        )
+        parser.add_argument(
+            "--recount",
+            action="store_true",
+            help="Recompute reference counts from LayawayImage rows first.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report what would be deleted.",
+        )
+
+    def handle(self, *args, **options):
+        if options["recount"] and not options["dry_run"]:
+            corrected = recount_image_blob_references()
+            self.stdout.write(f"Recounted references: {corrected} blob(s) corrected.")
+
+        result = collect_image_blobs(
+            grace=timedelta(hours=options["grace_hours"]),
+            dry_run=options["dry_run"],
+        )
+        if result["skipped"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{result['skipped']} blob(s) counted as unreferenced are still "
+                    "in use; run with --recount."
+                )
+            )
+
+        summary = f"{result['collected']} blob(s), {result['bytes'] / 2**20:.1f} MB"
+        if options["dry_run"]:
+            self.stdout.write(f"\nDry run. Would delete {summary}.")
+            return
+        self.stdout.write(self.style.SUCCESS(f"\nDone. Deleted {summary}."))
@@ -0,0 +1,49 @@
+"""
+Generate thumbnail/display variants and perceptual hashes for LayawayImage rows that have
+none yet (e.g. images uploaded before variants or hashes existed, or whose background run
+failed). --all regenerates every image, e.g. after changing the variant sizes. Runs
+inline, one image at a time.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from PIL import Image
+
+from apps.orders.images import generate_image_variants
+from apps.orders.models import LayawayImage
+
+
+class Command(BaseCommand):
+    help = "Generate missing LayawayImage thumbnail/display variants."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Regenerate variants for every image, not only missing ones.",
+        )
+
+    def handle(self, *args, **options):
+        images = LayawayImage.objects.exclude(image="")
+        if not options["all"]:
+            images = images.filter(
+                Q(variants_generated_at__isnull=True) | Q(phash__isnull=True)
+            )
+
+        generated = failed = 0
+        for image_id in images.order_by("pk").values_list("pk", flat=True).iterator():
+            try:
+                generate_image_variants(image_id, overwrite=options["all"])
+            # Unreadable or oversized files and storage errors (UnidentifiedImageError is
+            # an OSError); anything else is a bug and stops the command
+            except (OSError, ValueError, Image.DecompressionBombError) as e:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f"Image #{image_id}: {e}"))
+            else:
+                generated += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done. {generated} image(s) processed, {failed} failed."
+            )
+        )
@@ -0,0 +1,45 @@
+"""
+Rebuild LayawayExposure (per-member open layaway totals) from Layaway rows and
+report any drift. Idempotent. Use --dry-run to only report.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.orders.services import rebuild_layaway_exposure
+
+
+class Command(BaseCommand):
+    help = "Rebuild per-member layaway exposure from Layaway rows and report drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report drift; do not write.",
+        )
+
+    def handle(self, *args, **options):
+        result = rebuild_layaway_exposure(dry_run=options["dry_run"])
+
+        for row in result["drift"]:
+            stored_total, stored_count = row["stored"]
+            actual_total, actual_count = row["actual"]
+            self.stdout.write(
+                self.style.WARNING(
+                    f"User #{row['user_id']}: stored {stored_count} open / {stored_total:,} RWF, "
+                    f"actual {actual_count} open / {actual_total:,} RWF"
+                )
+            )
+
+        if options["dry_run"]:
+            self.stdout.write(
+                f"\nDry run. {result['checked']} member(s) checked, {len(result['drift'])} drifted."
+            )
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nDone. {result['checked']} member(s) checked, {len(result['drift'])} drifted, "
+                f"{result['created']} created, {result['updated']} updated."
+            )
+        )
@@ -0,0 +1,55 @@
+"""
+Advance layaways through their scheduled lifecycle in chunked set-based UPDATEs:
+cooling-off -> active once cooling_off_until passes, active -> defaulted (with the
+default penalty) once end_date passes with an unpaid balance.
+Safe to run every minute (cron); idempotent. Use --dry-run to only count.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.orders.services import DEFAULT_LIFECYCLE_CHUNK_SIZE, run_layaway_lifecycle
+
+
+class Command(BaseCommand):
+    help = "Activate layaways past cooling-off and default overdue unpaid layaways (batched)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_LIFECYCLE_CHUNK_SIZE,
+            help=f"Rows per UPDATE statement (default {DEFAULT_LIFECYCLE_CHUNK_SIZE}).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count due layaways; do not change anything.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            stats = run_layaway_lifecycle(
+                chunk_size=options["chunk_size"],
+                dry_run=options["dry_run"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if stats["dry_run"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Dry run as of {stats['cutoff']:%Y-%m-%d %H:%M}: "
+                    f"{stats['matched_activate']} layaway(s) due for activation, "
+                    f"{stats['matched_default']} overdue with an unpaid balance."
+                )
+            )
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done. {stats['activated']} of {stats['matched_activate']} activated, "
+                f"{stats['defaulted']} of {stats['matched_default']} defaulted "
+                f"({stats['penalties_rwf']:,} RWF in penalties) "
+                f"in {stats['chunks']} chunk(s), {stats['elapsed_seconds']}s."
+            )
+        )
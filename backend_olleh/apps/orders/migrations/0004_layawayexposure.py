@@ -0,0 +1,76 @@
+# Generated by Django 6.0.1 on 2026-10-17 00:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+OPEN_STATUSES = ("pending_confirmation", "cooling_off", "active")
+
+
+def backfill_exposure(apps, schema_editor):
+    Layaway = apps.get_model("orders", "Layaway")
+    LayawayExposure = apps.get_model("orders", "LayawayExposure")
+    rows = (
+        Layaway.objects.filter(status__in=OPEN_STATUSES)
+        .values("user_id")
+        .annotate(total=Sum("item_value_rwf"), count=Count("id"))
+        .order_by()
+    )
+    LayawayExposure.objects.bulk_create(
+        [
+            LayawayExposure(
+                user_id=row["user_id"],
+                open_total_rwf=row["total"],
+                open_count=row["count"],
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("orders", "0003_layawayimage"),
+        ("users", "0003_memberprofile_address_notes_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LayawayExposure",
+            fields=[
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="layaway_exposure",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "open_total_rwf",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Sum of item_value_rwf over open layaways"
+                    ),
+                ),
+                ("open_count", models.PositiveIntegerField(default=0)),
+                (
+                    "limit_rwf",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Layaway limit (active tier max_order_price) when last checked",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Layaway exposure",
+                "verbose_name_plural": "Layaway exposures",
+            },
+        ),
+        migrations.RunPython(backfill_exposure, migrations.RunPython.noop),
+    ]
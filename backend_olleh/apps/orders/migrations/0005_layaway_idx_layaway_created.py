@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 00:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("orders", "0004_layawayexposure"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="layaway",
+            index=models.Index(fields=["created_at", "id"], name="idx_layaway_created"),
+        ),
+    ]
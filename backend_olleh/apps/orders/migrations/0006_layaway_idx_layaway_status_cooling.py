@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-17 00:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("orders", "0005_layaway_idx_layaway_created"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="layaway",
+            index=models.Index(
+                fields=["status", "cooling_off_until"],
+                name="idx_layaway_status_cooling",
+            ),
+        ),
+    ]
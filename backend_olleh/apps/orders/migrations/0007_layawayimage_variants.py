@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("orders", "0006_layaway_idx_layaway_status_cooling"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="layawayimage",
+            name="display",
+            field=models.ImageField(
+                blank=True, editable=False, max_length=200, upload_to=""
+            ),
+        ),
+        migrations.AddField(
+            model_name="layawayimage",
+            name="thumbnail",
+            field=models.ImageField(
+                blank=True, editable=False, max_length=200, upload_to=""
+            ),
+        ),
+        migrations.AddField(
+            model_name="layawayimage",
+            name="variants_generated_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+import apps.orders.models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("orders", "0007_layawayimage_variants"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LayawayImageBlob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("sha256", models.CharField(max_length=64, unique=True)),
+                (
+                    "file",
+                    models.ImageField(
+                        max_length=200,
+                        upload_to=apps.orders.models.layaway_image_blob_upload_to,
+                    ),
+                ),
+                ("size", models.PositiveBigIntegerField(default=0)),
+                ("ref_count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Layaway image blob",
+                "verbose_name_plural": "Layaway image blobs",
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("ref_count", 0)),
+                        fields=["updated_at"],
+                        name="idx_image_blob_unreferenced",
+                    )
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name="layawayimage",
+            name="blob",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="images",
+                to="orders.layawayimageblob",
+            ),
+        ),
+    ]
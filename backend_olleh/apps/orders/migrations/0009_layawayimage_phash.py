@@ -0,0 +1,53 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("orders", "0008_layawayimageblob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="layawayimage",
+            name="phash",
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="layawayimage",
+            name="phash_0",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="layawayimage",
+            name="phash_1",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="layawayimage",
+            name="phash_2",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="layawayimage",
+            name="phash_3",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="layawayimage",
+            index=models.Index(fields=["phash_0"], name="idx_layaway_image_phash_0"),
+        ),
+        migrations.AddIndex(
+            model_name="layawayimage",
+            index=models.Index(fields=["phash_1"], name="idx_layaway_image_phash_1"),
+        ),
+        migrations.AddIndex(
+            model_name="layawayimage",
+            index=models.Index(fields=["phash_2"], name="idx_layaway_image_phash_2"),
+        ),
+        migrations.AddIndex(
+            model_name="layawayimage",
+            index=models.Index(fields=["phash_3"], name="idx_layaway_image_phash_3"),
+        ),
+    ]
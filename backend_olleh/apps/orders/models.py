@@ -1,13 +1,23 @@
+import hashlib
+import logging
 import uuid
 from datetime import timedelta
 
 from django.db import models, transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Now
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.urls import reverse
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 
 from apps.common.models import BaseModel
+from apps.memberships.models import UserMembership
 from users.models import User
 
+logger = logging.getLogger("olleh.orders")
+
 
 # ---------- Constants (OLLEH agreement) ----------
 LAYAWAY_MIN_DAYS = 14
@@ -49,6 +59,13 @@ class Layaway(BaseModel):
         (STATUS_DEFAULTED, "Defaulted"),
     ]
 
+    # Statuses that count toward the member's layaway limit
+    OPEN_STATUSES = (
+        STATUS_PENDING_CONFIRMATION,
+        STATUS_COOLING_OFF,
+        STATUS_ACTIVE,
+    )
+
     COLLECTION_PICKUP = "pickup"
     COLLECTION_DELIVERY = "delivery"
 
@@ -125,6 +142,13 @@ class Layaway(BaseModel):
         indexes = [
             models.Index(fields=["user", "status"], name="idx_layaway_user_status"),
             models.Index(fields=["status", "end_date"], name="idx_layaway_status_end"),
+            # Lifecycle sweep: cooling-off rows due for activation
+            models.Index(
+                fields=["status", "cooling_off_until"],
+                name="idx_layaway_status_cooling",
+            ),
+            # Staff list cursor pagination (-created_at, -id)
+            models.Index(fields=["created_at", "id"], name="idx_layaway_created"),
         ]
         verbose_name = "Layaway"
         verbose_name_plural = "Layaways"
@@ -132,6 +156,30 @@ class Layaway(BaseModel):
     def __str__(self):
         return f"Layaway #{self.id} – {self.user.email} – {self.total_rwf:,} RWF"
 
+    def _exposure_contribution(self):
+        """(open value, open count) this layaway adds to the member's exposure."""
+        if self.status in self.OPEN_STATUSES:
+            return self.item_value_rwf or 0, 1
+        return 0, 0
+
+    def _stored_exposure_contribution(self):
+        """
+        The contribution of the row as stored, read under a row lock: concurrent saves of
+        this layaway (a staff cancel racing the lifecycle sweep, two admin saves) then
+        apply their deltas one after the other instead of both from the same snapshot.
+        """
+        if self._state.adding:
+            return 0, 0
+        row = (
+            Layaway.objects.select_for_update()
+            .filter(pk=self.pk)
+            .values("status", "item_value_rwf")
+            .first()
+        )
+        if row is None or row["status"] not in self.OPEN_STATUSES:
+            return 0, 0
+        return row["item_value_rwf"] or 0, 1
+
     def save(self, *args, **kwargs):
         if self.item_value_rwf and not self.service_fee_rwf:
             self.service_fee_rwf = compute_service_fee_rwf(self.item_value_rwf)
@@ -139,7 +187,23 @@ class Layaway(BaseModel):
             self.total_rwf = (
                 self.item_value_rwf + self.service_fee_rwf + self.delivery_fee_rwf
             )
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and not {"status", "item_value_rwf"} & set(
+            update_fields
+        ):
+            super().save(*args, **kwargs)
+            return
+        # Keep the member's LayawayExposure in step with this row, in the same transaction
+        with transaction.atomic():
+            previous = self._stored_exposure_contribution()
+            super().save(*args, **kwargs)
+            current = self._exposure_contribution()
+            if current != previous:
+                LayawayExposure.apply_delta(
+                    self.user_id,
+                    total_delta=current[0] - previous[0],
+                    count_delta=current[1] - previous[1],
+                )
 
     @property
     def is_in_cooling_off(self):
@@ -223,13 +287,182 @@ class Layaway(BaseModel):
         self.save()
 
 
+@receiver(post_delete, sender=Layaway)
+def _release_exposure_on_delete(sender, instance, **kwargs):
+    total, count = instance._exposure_contribution()
+    if count:
+        LayawayExposure.apply_delta(
+            instance.user_id, total_delta=-total, count_delta=-count
+        )
+
+
+class LayawayExposure(BaseModel):
+    """
+    Denormalized per-member total of open layaways (pending, cooling-off, active).
+    Maintained by Layaway.save in the same transaction; eligibility reads this single
+    row instead of aggregating all layaways. Rebuild with reconcile_layaway_exposure.
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="layaway_exposure",
+    )
+    open_total_rwf = models.PositiveIntegerField(
+        default=0,
+        help_text="Sum of item_value_rwf over open layaways",
+    )
+    open_count = models.PositiveIntegerField(default=0)
+    limit_rwf = models.PositiveIntegerField(
+        default=0,
+        help_text="Layaway limit (active tier max_order_price) when last checked",
+    )
+
+    class Meta:
+        verbose_name = "Layaway exposure"
+        verbose_name_plural = "Layaway exposures"
+
+    def __str__(self):
+        return f"User #{self.user_id} – {self.open_count} open, {self.open_total_rwf:,} RWF"
+
+    @staticmethod
+    def active_limit_rwf():
+        """UPDATE expression: the member's active tier max_order_price (0 without one)."""
+        active = (
+            UserMembership.objects.filter(
+                user_id=OuterRef("user_id"),
+                status=UserMembership.STATUS_ACTIVE,
+                end_date__gt=Now(),
+            )
+            .order_by("-end_date")
+            .values("membership__max_order_price")[:1]
+        )
+        return Coalesce(Subquery(active), 0, output_field=models.PositiveIntegerField())
+
+    @classmethod
+    def apply_delta(cls, user_id, total_delta, count_delta):
+        """
+        Add deltas to the member's row with a single UPDATE (row created on first use),
+        refreshing limit_rwf from the active tier as it goes.
+        A delta that would take the row below zero means it has drifted: that is logged
+        and the row is rebuilt from the member's layaways instead.
+        """
+        updated = cls.objects.filter(
+            user_id=user_id,
+            open_total_rwf__gte=-total_delta,
+            open_count__gte=-count_delta,
+        ).update(
+            open_total_rwf=F("open_total_rwf") + total_delta,
+            open_count=F("open_count") + count_delta,
+            limit_rwf=cls.active_limit_rwf(),
+            updated_at=timezone.now(),
+        )
+        if updated:
+            return
+        if cls.objects.filter(user_id=user_id).exists():
+            from apps.orders.services import refresh_layaway_exposure
+
+            logger.warning(
+                "Layaway exposure of user %s drifted (delta %s RWF / %s open); "
+                "rebuilt from layaways",
+                user_id,
+                total_delta,
+                count_delta,
+            )
+            refresh_layaway_exposure([user_id])
+            return
+        _, created = cls.objects.get_or_create(
+            user_id=user_id,
+            defaults={
+                "open_total_rwf": max(0, total_delta),
+                "open_count": max(0, count_delta),
+            },
+        )
+        if created:
+            cls.objects.filter(user_id=user_id).update(limit_rwf=cls.active_limit_rwf())
+        else:
+            cls.apply_delta(user_id, total_delta, count_delta)
+
+
 def layaway_item_image_upload_to(instance, filename):
-    """Store layaway item images under layaway_item_images/{layaway_id}/"""
+    """
+    Store layaway item images under layaway_item_images/{layaway_id}/. Images saved
+    since deduplication point at a LayawayImageBlob file instead (see LayawayImage.save).
+    """
     ext = filename.split(".")[-1] if "." in filename else "jpg"
     name = str(instance.pk) if instance.pk else uuid.uuid4().hex[:12]
     return f"layaway_item_images/{instance.layaway_id}/{name}.{ext}"
 
 
+def layaway_image_blob_upload_to(instance, filename):
+    """Content-addressed: layaway_item_images/blobs/{sha256[:2]}/{sha256}.{ext}"""
+    ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else "jpg"
+    return f"layaway_item_images/blobs/{instance.sha256[:2]}/{instance.sha256}.{ext}"
+
+
+class LayawayImageBlob(BaseModel):
+    """
+    One stored image file, shared by every LayawayImage with the same bytes.
+    ref_count is kept by LayawayImage.save/delete; blobs at 0 are removed by
+    gc_layaway_image_blobs (which can also recount references).
+    """
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.ImageField(upload_to=layaway_image_blob_upload_to, max_length=200)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Layaway image blob"
+        verbose_name_plural = "Layaway image blobs"
+        indexes = [
+            models.Index(
+                fields=["updated_at"],
+                condition=models.Q(ref_count=0),
+                name="idx_image_blob_unreferenced",
+            ),
+        ]
+
+    def __str__(self):
+        return self.sha256[:12]
+
+    @staticmethod
+    def hash_file(file):
+        hasher = hashlib.sha256()
+        for chunk in file.chunks():
+            hasher.update(chunk)
+        file.seek(0)
+        return hasher.hexdigest()
+
+    @classmethod
+    def acquire(cls, file):
+        """
+        Blob for `file`'s bytes with one more reference; the file is written only if
+        these bytes are new. Uses file.sha256 when the upload path already hashed it.
+        Call inside a transaction.
+        """
+        digest = getattr(file, "sha256", None) or cls.hash_file(file)
+        # The row lock also holds off gc_layaway_image_blobs for this blob
+        blob, created = cls.objects.select_for_update().get_or_create(sha256=digest)
+        if created:
+            blob.file.save(file.name, file, save=False)
+            blob.size = blob.file.size
+            blob.ref_count = 1
+            blob.save(update_fields=["file", "size", "ref_count", "updated_at"])
+        else:
+            cls.objects.filter(pk=blob.pk).update(
+                ref_count=F("ref_count") + 1, updated_at=timezone.now()
+            )
+        return blob
+
+    @classmethod
+    def release(cls, blob_id):
+        cls.objects.filter(pk=blob_id, ref_count__gt=0).update(
+            ref_count=F("ref_count") - 1, updated_at=timezone.now()
+        )
+
+
 class LayawayImage(models.Model):
     """
     Image of the requested item for a layaway (e.g. screenshot or photo from seller).
@@ -244,17 +477,85 @@ class LayawayImage(models.Model):
         upload_to=layaway_item_image_upload_to,
         help_text="Photo or screenshot of the requested item",
     )
+    # Set for images stored since deduplication; `image` then names the blob's file
+    blob = models.ForeignKey(
+        LayawayImageBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="images",
+    )
     caption = models.CharField(max_length=150, blank=True)
     order = models.PositiveSmallIntegerField(
         default=0,
         help_text="Display order (lower first)",
     )
+    # Resized variants next to the original, written by apps.orders.images off the
+    # request thread; empty until generated (serializers fall back to the original)
+    thumbnail = models.ImageField(max_length=200, blank=True, editable=False)
+    display = models.ImageField(max_length=200, blank=True, editable=False)
+    variants_generated_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Perceptual hash (signed 64-bit) and its four 16-bit chunks, indexed for
+    # near-duplicate lookup (apps.orders.similarity); set with the variants
+    phash = models.BigIntegerField(null=True, blank=True, editable=False)
+    phash_0 = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    phash_1 = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    phash_2 = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    phash_3 = models.PositiveIntegerField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["order", "created_at"]
         verbose_name = "Layaway item image"
         verbose_name_plural = "Layaway item images"
+        indexes = [
+            models.Index(fields=[f"phash_{i}"], name=f"idx_layaway_image_phash_{i}")
+            for i in range(4)
+        ]
 
     def __str__(self):
         return f"Image for Layaway #{self.layaway_id}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets post_save tell a replaced upload from an edit to caption/order
+        instance._loaded_image_name = instance.__dict__.get("image")
+        return instance
+
+    def get_file_url(self, variant="original"):
+        """Authorized URL (owner or staff) for the original, display or thumbnail."""
+        return reverse(
+            "orders:layaway-image-file",
+            kwargs={"pk": self.layaway_id, "image_id": self.pk, "variant": variant},
+        )
+
+    def save(self, *args, **kwargs):
+        if not self.image or self.image._committed:
+            return super().save(*args, **kwargs)
+        # New file: reference the shared blob for these bytes instead of a copy
+        previous_blob_id = self.blob_id
+        with transaction.atomic():
+            self.blob = LayawayImageBlob.acquire(self.image.file)
+            self.image = self.blob.file.name
+            super().save(*args, **kwargs)
+            if previous_blob_id:
+                LayawayImageBlob.release(previous_blob_id)
+
+
+@receiver(post_save, sender=LayawayImage)
+def _schedule_image_variants(sender, instance, created, raw=False, **kwargs):
+    if raw or not instance.image:
+        return
+    if created or instance.image.name != getattr(instance, "_loaded_image_name", None):
+        from apps.orders.images import schedule_image_variants
+
+        schedule_image_variants(instance.pk)
+        instance._loaded_image_name = instance.image.name
+
+
+@receiver(post_delete, sender=LayawayImage)
+def _release_image_blob(sender, instance, **kwargs):
+    if instance.blob_id:
+        LayawayImageBlob.release(instance.blob_id)
@@ -8,39 +8,110 @@ from apps.orders.models import (
     LAYAWAY_MAX_DAYS,
 )
 from apps.orders.services import get_layaway_eligibility
+from apps.orders.uploads import process_uploaded_image
 from apps.payments.models import LayawayPayment
 
 
 class LayawayImageSerializer(serializers.ModelSerializer):
-    """Read-only serializer for layaway item images; image URL is absolute."""
+    """
+    Read-only serializer for layaway item images; URLs are absolute and point at the
+    authorized image view, not MEDIA_URL. thumbnail_url and display_url serve the
+    original until the variants have been generated.
+    """
 
     url = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
+    display_url = serializers.SerializerMethodField()
 
     class Meta:
         model = LayawayImage
-        fields = ["id", "url", "caption", "order", "created_at"]
+        fields = [
+            "id",
+            "url",
+            "thumbnail_url",
+            "display_url",
+            "caption",
+            "order",
+            "created_at",
+        ]
         read_only_fields = fields
 
     def get_url(self, obj):
+        return self.image_file_url(obj, "original")
+
+    def get_thumbnail_url(self, obj):
+        return self.image_file_url(obj, "thumbnail")
+
+    def get_display_url(self, obj):
+        return self.image_file_url(obj, "display")
+
+    def image_file_url(self, obj, variant):
         if not obj.image:
             return None
+        url = obj.get_file_url(variant)
+        base_url = self.get_absolute_base_url()
+        if base_url and url.startswith("/"):
+            return base_url + url
         request = self.context.get("request")
         if request:
-            return request.build_absolute_uri(obj.image.url)
-        return obj.image.url
+            return request.build_absolute_uri(url)
+        return url
+
+    def get_absolute_base_url(self):
+        """scheme://host for the current request, built once and shared by all rows via context."""
+        if "absolute_base_url" not in self.context:
+            request = self.context.get("request")
+            self.context["absolute_base_url"] = (
+                request.build_absolute_uri("/").rstrip("/") if request else None
+            )
+        return self.context["absolute_base_url"]
+
+
+class LayawayImageThumbnailSerializer(LayawayImageSerializer):
+    """For lists: url is the thumbnail (the original until it has been generated)."""
+
+    class Meta(LayawayImageSerializer.Meta):
+        fields = ["id", "url", "caption", "order", "created_at"]
+        read_only_fields = fields
+
+    def get_url(self, obj):
+        return self.get_thumbnail_url(obj)
+
+
+class SimilarImageMatchSerializer(serializers.Serializer):
+    """An image on another layaway that looks like one of this layaway's (staff)."""
+
+    distance = serializers.IntegerField(
+        help_text="Bits differing between perceptual hashes (0 = same picture)"
+    )
+    layaway_id = serializers.IntegerField(source="image.layaway_id")
+    layaway_status = serializers.CharField(source="image.layaway.status")
+    member_email = serializers.EmailField(source="image.layaway.user.email")
+    image = LayawayImageThumbnailSerializer()
+
+
+class LayawaySimilarImagesSerializer(serializers.Serializer):
+    """One of the layaway's images and its near-duplicates elsewhere, closest first."""
+
+    image = LayawayImageThumbnailSerializer()
+    matches = SimilarImageMatchSerializer(many=True)
 
 
 class LayawayImageUploadSerializer(serializers.ModelSerializer):
-    """Upload an item image for a layaway. Use multipart/form-data: image (file), caption (optional), order (optional)."""
+    """
+    Upload an item image for a layaway. Use multipart/form-data: image (file), caption (optional), order (optional).
+    The file is checked from its header and re-encoded without metadata (apps.orders.uploads)
+    instead of being decoded here.
+    """
+
+    image = serializers.FileField(
+        help_text="Image file (JPEG, PNG, GIF, WebP). Required."
+    )
 
     class Meta:
         model = LayawayImage
         fields = ["id", "image", "caption", "order"]
         extra_kwargs = {
-            "image": {
-                "required": True,
-                "help_text": "Image file (JPEG, PNG, GIF, WebP). Required.",
-            },
             "caption": {
                 "required": False,
                 "allow_blank": True,
@@ -53,6 +124,9 @@ class LayawayImageUploadSerializer(serializers.ModelSerializer):
             },
         }
 
+    def validate_image(self, value):
+        return process_uploaded_image(value)
+
 
 class LayawayPaymentSerializer(serializers.ModelSerializer):
     """Read-only serializer for a layaway payment."""
@@ -97,8 +171,13 @@ class LayawayPaymentCreateSerializer(serializers.ModelSerializer):
 
 
 class LayawayListSerializer(serializers.ModelSerializer):
+    """
+    Pass fields={...} to return only those fields (sparse fieldsets, e.g. ?fields=id,status
+    to skip item_images on mobile).
+    """
+
     can_cancel_without_penalty = serializers.BooleanField(read_only=True)
-    item_images = LayawayImageSerializer(many=True, read_only=True)
+    item_images = LayawayImageThumbnailSerializer(many=True, read_only=True)
 
     class Meta:
         model = Layaway
@@ -125,6 +204,12 @@ class LayawayListSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = fields
 
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
 
 class LayawayDetailSerializer(serializers.ModelSerializer):
     can_cancel_without_penalty = serializers.BooleanField(read_only=True)
@@ -1,14 +1,48 @@
 """
 Layaway eligibility and limits: from active membership tier only (no savings-based cap).
 Only one active membership per user (enforced by unique constraint).
+Also the scheduled lifecycle sweep (cooling-off -> active -> defaulted) in set-based batches,
+and reference recounting / garbage collection for deduplicated item image blobs.
 """
 
-from django.db.models import Sum
+import time
+from datetime import timedelta
+from functools import partial
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import (
+    Count,
+    DateTimeField,
+    Exists,
+    ExpressionWrapper,
+    F,
+    IntegerField,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 from apps.memberships.models import UserMembership
-from apps.orders.models import Layaway
+from apps.orders.models import (
+    COOLING_OFF_HOURS,
+    DEFAULT_PENALTY_RWF,
+    LAYAWAY_MAX_DAYS,
+    LAYAWAY_MIN_DAYS,
+    Layaway,
+    LayawayExposure,
+    LayawayImage,
+    LayawayImageBlob,
+)
 from apps.savings.models import SavingsAccount
 
+DEFAULT_LIFECYCLE_CHUNK_SIZE = 1000
+# Unreferenced blobs younger than this are kept: an upload may be attaching them
+DEFAULT_BLOB_GRACE = timedelta(hours=24)
+
 
 def get_member_savings_balance_rwf(user):
     """Return member's savings balance in RWF (0 if no account). Display only; not used for limit."""
@@ -31,6 +65,7 @@ def get_layaway_eligibility(user):
     Returns dict: has_active_membership, savings_balance_rwf, layaway_limit_rwf,
     current_layaway_total_rwf, available_layaway_rwf, can_request, message.
     Layaway limit comes from active membership tier max_order_price only (no savings cap).
+    Current total is read from the member's LayawayExposure row (no aggregate scan).
     """
     active_membership = get_active_membership_for_user(user)
     has_active_membership = active_membership is not None
@@ -41,14 +76,9 @@ def get_layaway_eligibility(user):
     savings_balance_rwf = get_member_savings_balance_rwf(user)
 
     current_layaway_total_rwf = (
-        Layaway.objects.filter(
-            user=user,
-            status__in=[
-                Layaway.STATUS_PENDING_CONFIRMATION,
-                Layaway.STATUS_COOLING_OFF,
-                Layaway.STATUS_ACTIVE,
-            ],
-        ).aggregate(total=Sum("item_value_rwf"))["total"]
+        LayawayExposure.objects.filter(user_id=user.pk)
+        .values_list("open_total_rwf", flat=True)
+        .first()
         or 0
     )
 
@@ -74,3 +104,348 @@ def get_layaway_eligibility(user):
         "can_request": can_request,
         "message": message,
     }
+
+
+def compute_open_layaway_exposure():
+    """Return {user_id: (open_total_rwf, open_count)} aggregated from Layaway rows."""
+    rows = (
+        Layaway.objects.filter(status__in=Layaway.OPEN_STATUSES)
+        .values("user_id")
+        .annotate(total=Sum("item_value_rwf"), count=Count("id"))
+        .order_by()
+    )
+    return {row["user_id"]: (row["total"], row["count"]) for row in rows}
+
+
+@transaction.atomic
+def rebuild_layaway_exposure(dry_run=False):
+    """
+    Recompute every LayawayExposure row from Layaway and report drift, then refresh every
+    row's limit_rwf from the active tiers.
+    Returns dict: checked, drift (list of {user_id, stored, actual}), created, updated.
+    With dry_run, only reports; nothing is written.
+    """
+    actual = compute_open_layaway_exposure()
+    stored = {e.user_id: e for e in LayawayExposure.objects.select_for_update()}
+
+    drift = []
+    to_create = []
+    to_update = []
+    for user_id in actual.keys() | stored.keys():
+        total, count = actual.get(user_id, (0, 0))
+        exposure = stored.get(user_id)
+        if exposure is None:
+            if count:
+                drift.append(
+                    {"user_id": user_id, "stored": (0, 0), "actual": (total, count)}
+                )
+                to_create.append(
+                    LayawayExposure(
+                        user_id=user_id, open_total_rwf=total, open_count=count
+                    )
+                )
+            continue
+        if (exposure.open_total_rwf, exposure.open_count) != (total, count):
+            drift.append(
+                {
+                    "user_id": user_id,
+                    "stored": (exposure.open_total_rwf, exposure.open_count),
+                    "actual": (total, count),
+                }
+            )
+            exposure.open_total_rwf = total
+            exposure.open_count = count
+            to_update.append(exposure)
+
+    if not dry_run:
+        LayawayExposure.objects.bulk_create(to_create, batch_size=1000)
+        LayawayExposure.objects.bulk_update(
+            to_update, ["open_total_rwf", "open_count"], batch_size=1000
+        )
+        LayawayExposure.objects.update(limit_rwf=LayawayExposure.active_limit_rwf())
+
+    return {
+        "checked": len(actual.keys() | stored.keys()),
+        "drift": sorted(drift, key=lambda d: d["user_id"]),
+        "created": 0 if dry_run else len(to_create),
+        "updated": 0 if dry_run else len(to_update),
+    }
+
+
+def refresh_layaway_exposure(user_ids):
+    """
+    Recompute the LayawayExposure rows (and limit_rwf) of these members from their open
+    layaways in one UPDATE (correlated subqueries). For set-based status changes that
+    bypass Layaway.save.
+    """
+    open_layaways = (
+        Layaway.objects.filter(
+            user_id=OuterRef("user_id"), status__in=Layaway.OPEN_STATUSES
+        )
+        .order_by()
+        .values("user_id")
+    )
+    return LayawayExposure.objects.filter(user_id__in=user_ids).update(
+        open_total_rwf=Coalesce(
+            Subquery(
+                open_layaways.annotate(total=Sum("item_value_rwf")).values("total")
+            ),
+            0,
+            output_field=IntegerField(),
+        ),
+        open_count=Coalesce(
+            Subquery(open_layaways.annotate(count=Count("id")).values("count")),
+            0,
+            output_field=IntegerField(),
+        ),
+        limit_rwf=LayawayExposure.active_limit_rwf(),
+        updated_at=timezone.now(),
+    )
+
+
+def _activation_fields(now, duration_days):
+    """UPDATE kwargs for -> active, matching Layaway.activate (start = confirmed_at or now)."""
+    start_date = Coalesce(F("confirmed_at"), Value(now))
+    return {
+        "status": Layaway.STATUS_ACTIVE,
+        "start_date": start_date,
+        "end_date": ExpressionWrapper(
+            start_date + Value(timedelta(days=duration_days)),
+            output_field=DateTimeField(),
+        ),
+        "duration_days": duration_days,
+        "cooling_off_until": Coalesce(
+            F("cooling_off_until"), Value(now + timedelta(hours=COOLING_OFF_HOURS))
+        ),
+        "updated_at": now,
+    }
+
+
+def _lock_chunk(queryset, order_by, chunk_size):
+    """
+    Next chunk of (pk, user_id), locked. skip_locked lets overlapping
+    runs (e.g. a slow run and the next minute's) take disjoint rows on PostgreSQL;
+    SQLite has no row locks and serializes writers instead.
+    """
+    return list(
+        queryset.select_for_update(skip_locked=True)
+        .order_by(*order_by)
+        .values_list("pk", "user_id")[:chunk_size]
+    )
+
+
+def run_layaway_lifecycle(
+    now=None, chunk_size=DEFAULT_LIFECYCLE_CHUNK_SIZE, dry_run=False
+):
+    """
+    Scheduled lifecycle sweep (safe to run every minute; idempotent):
+    - cooling-off layaways whose cooling_off_until has passed become active
+      (start = confirmed_at, end = start + LAYAWAY_MAX_DAYS, as Layaway.activate);
+    - active layaways past end_date with an unpaid balance are defaulted with
+      DEFAULT_PENALTY_RWF (walks idx_layaway_status_end) and the members'
+      LayawayExposure is recomputed in the same transaction.
+    Each chunk is one SELECT ... FOR UPDATE and one UPDATE that re-checks the condition.
+    Returns dict: matched_activate, activated, matched_default, defaulted,
+    penalties_rwf, chunks, dry_run, cutoff, elapsed_seconds.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive.")
+    now = now or timezone.now()
+    started = time.monotonic()
+
+    due_activation = Layaway.objects.filter(
+        status=Layaway.STATUS_COOLING_OFF,
+        cooling_off_until__lte=now,
+    )
+    due_default = Layaway.objects.filter(
+        status=Layaway.STATUS_ACTIVE,
+        end_date__lt=now,
+        amount_paid_rwf__lt=F("total_rwf"),
+    )
+    result = {
+        "matched_activate": due_activation.count(),
+        "activated": 0,
+        "matched_default": due_default.count(),
+        "defaulted": 0,
+        "penalties_rwf": 0,
+        "chunks": 0,
+        "dry_run": dry_run,
+        "cutoff": now,
+    }
+
+    if not dry_run:
+        while True:
+            with transaction.atomic():
+                rows = _lock_chunk(
+                    due_activation, ("cooling_off_until", "pk"), chunk_size
+                )
+                if not rows:
+                    break
+                # Cooling-off and active are both open: exposure is unchanged
+                result["activated"] += due_activation.filter(
+                    pk__in=[pk for pk, _ in rows]
+                ).update(**_activation_fields(timezone.now(), LAYAWAY_MAX_DAYS))
+            result["chunks"] += 1
+
+        while True:
+            with transaction.atomic():
+                rows = _lock_chunk(due_default, ("end_date", "pk"), chunk_size)
+                if not rows:
+                    break
+                defaulted = due_default.filter(pk__in=[pk for pk, _ in rows]).update(
+                    status=Layaway.STATUS_DEFAULTED,
+                    default_penalty_rwf=DEFAULT_PENALTY_RWF,
+                    updated_at=timezone.now(),
+                )
+                refresh_layaway_exposure({user_id for _, user_id in rows})
+            result["defaulted"] += defaulted
+            result["penalties_rwf"] += defaulted * DEFAULT_PENALTY_RWF
+            result["chunks"] += 1
+
+    result["elapsed_seconds"] = round(time.monotonic() - started, 3)
+    return result
+
+
+# =========================
+# Bulk transitions (admin actions)
+# =========================
+# Validate the whole selection up front (same rules as the Layaway methods), then move
+# every valid row with one UPDATE. Both transitions keep layaways open, so
+# LayawayExposure is unchanged. Returns dict: selected, updated, failed ([{id, reason}]).
+
+
+def _lock_layaway_selection(queryset):
+    return list(
+        Layaway.objects.filter(pk__in=queryset.order_by().values("pk"))
+        .select_for_update(of=("self",))
+        .order_by("pk")
+        .values_list("pk", "status")
+    )
+
+
+@transaction.atomic
+def bulk_confirm_layaways(queryset):
+    """Pending confirmation -> cooling-off (as Layaway.confirm_by_olleh)."""
+    rows = _lock_layaway_selection(queryset)
+    failed = [
+        {"id": pk, "reason": "Only pending layaways can be confirmed."}
+        for pk, status in rows
+        if status != Layaway.STATUS_PENDING_CONFIRMATION
+    ]
+    now = timezone.now()
+    updated = Layaway.objects.filter(
+        pk__in=[
+            pk for pk, status in rows if status == Layaway.STATUS_PENDING_CONFIRMATION
+        ],
+        status=Layaway.STATUS_PENDING_CONFIRMATION,
+    ).update(
+        status=Layaway.STATUS_COOLING_OFF,
+        confirmed_at=now,
+        cooling_off_until=now + timedelta(hours=COOLING_OFF_HOURS),
+        updated_at=now,
+    )
+    return {"selected": len(rows), "updated": updated, "failed": failed}
+
+
+@transaction.atomic
+def bulk_activate_layaways(queryset, duration_days=None):
+    """
+    Cooling-off or pending -> active (as Layaway.activate). An out-of-range duration
+    rejects the whole selection with ValidationError.
+    """
+    if duration_days is None:
+        duration_days = LAYAWAY_MAX_DAYS
+    if not (LAYAWAY_MIN_DAYS <= duration_days <= LAYAWAY_MAX_DAYS):
+        raise ValidationError(
+            f"Duration must be between {LAYAWAY_MIN_DAYS} and {LAYAWAY_MAX_DAYS} days."
+        )
+    activatable = (Layaway.STATUS_COOLING_OFF, Layaway.STATUS_PENDING_CONFIRMATION)
+    rows = _lock_layaway_selection(queryset)
+    failed = [
+        {
+            "id": pk,
+            "reason": "Layaway must be in cooling-off or pending to activate.",
+        }
+        for pk, status in rows
+        if status not in activatable
+    ]
+    updated = Layaway.objects.filter(
+        pk__in=[pk for pk, status in rows if status in activatable],
+        status__in=activatable,
+    ).update(**_activation_fields(timezone.now(), duration_days))
+    return {"selected": len(rows), "updated": updated, "failed": failed}
+
+
+def recount_image_blob_references():
+    """
+    Set every LayawayImageBlob.ref_count from the LayawayImage rows using it (repairs
+    counts skipped by queryset.update or raw SQL). Returns the number of blobs corrected.
+    """
+    actual = Coalesce(
+        Subquery(
+            LayawayImage.objects.filter(blob=OuterRef("pk"))
+            .order_by()
+            .values("blob")
+            .annotate(n=Count("pk"))
+            .values("n"),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+    return LayawayImageBlob.objects.exclude(ref_count=actual).update(
+        ref_count=actual, updated_at=timezone.now()
+    )
+
+
+def _delete_blob_files(names):
+    from apps.orders.images import IMAGE_VARIANTS, variant_name
+
+    storage = LayawayImageBlob._meta.get_field("file").storage
+    for name in names:
+        for path in (
+            name,
+            *(variant_name(name, s) for s, _, _ in IMAGE_VARIANTS.values()),
+        ):
+            storage.delete(path)
+
+
+def collect_image_blobs(
+    grace=DEFAULT_BLOB_GRACE, chunk_size=DEFAULT_LIFECYCLE_CHUNK_SIZE, dry_run=False
+):
+    """
+    Delete blobs with no references for longer than `grace`, then their files and
+    variants once each chunk commits. Blobs counted at 0 that still have images are
+    skipped (fix with recount_image_blob_references).
+    Returns dict: collected, bytes, skipped.
+    """
+    unreferenced = LayawayImageBlob.objects.filter(
+        ref_count=0, updated_at__lt=timezone.now() - grace
+    )
+    in_use = LayawayImage.objects.filter(blob=OuterRef("pk"))
+    skipped = unreferenced.filter(Exists(in_use)).count()
+    unreferenced = unreferenced.filter(~Exists(in_use))
+    if dry_run:
+        totals = unreferenced.aggregate(n=Count("pk"), size=Sum("size"))
+        return {
+            "collected": totals["n"],
+            "bytes": totals["size"] or 0,
+            "skipped": skipped,
+        }
+
+    collected = freed = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                unreferenced.select_for_update(skip_locked=True)
+                .order_by("pk")
+                .values_list("pk", "file", "size")[:chunk_size]
+            )
+            if not rows:
+                break
+            LayawayImageBlob.objects.filter(pk__in=[pk for pk, _, _ in rows]).delete()
+            transaction.on_commit(
+                partial(_delete_blob_files, [name for _, name, _ in rows if name])
+            )
+        collected += len(rows)
+        freed += sum(size for _, _, size in rows)
+    return {"collected": collected, "bytes": freed, "skipped": skipped}
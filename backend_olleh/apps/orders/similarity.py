@@ -0,0 +1,113 @@
+"""
+Near-duplicate item images across layaways. Each LayawayImage gets a 64-bit perceptual
+hash (dHash: brightness gradients of a 9x8 grayscale thumbnail), so re-encoded, resized or
+recompressed copies of a screenshot land within a few bits of each other.
+
+Lookup is multi-index hashing: the hash is split into four 16-bit chunks, each stored in
+its own indexed column. Two hashes within distance k agree to within k // 4 bits on at
+least one chunk (pigeonhole), so a search is a handful of index probes for the chunk
+values near the query's, followed by an exact Hamming check on those candidates only.
+"""
+
+from functools import reduce
+from itertools import combinations
+from operator import or_
+
+from django.db.models import Q
+from PIL import Image
+
+PHASH_BITS = 64
+PHASH_CHUNKS = 4
+CHUNK_BITS = PHASH_BITS // PHASH_CHUNKS
+# Distance at which two item photos are almost always the same item
+DEFAULT_MAX_DISTANCE = 8
+# Chunk radius 2: 137 probe values per chunk; beyond this matches are mostly noise
+MAX_DISTANCE = 3 * PHASH_CHUNKS - 1
+
+
+def perceptual_hash(image):
+    """Unsigned 64-bit dHash of a PIL image."""
+    gray = image.convert("L").resize((9, 8), Image.Resampling.LANCZOS)
+    pixels = gray.tobytes()
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left, right = pixels[row * 9 + col], pixels[row * 9 + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def to_signed(value):
+    """Unsigned 64-bit hash -> BigIntegerField value."""
+    return value - (1 << PHASH_BITS) if value >= 1 << (PHASH_BITS - 1) else value
+
+
+def to_unsigned(value):
+    return value & ((1 << PHASH_BITS) - 1)
+
+
+def hamming(a, b):
+    return (to_unsigned(a) ^ to_unsigned(b)).bit_count()
+
+
+def hash_chunks(value):
+    value = to_unsigned(value)
+    mask = (1 << CHUNK_BITS) - 1
+    return [(value >> (i * CHUNK_BITS)) & mask for i in range(PHASH_CHUNKS)]
+
+
+def phash_fields(value):
+    """LayawayImage field values for an unsigned hash (phash and its chunk columns)."""
+    fields = {"phash": to_signed(value)}
+    for i, chunk in enumerate(hash_chunks(value)):
+        fields[f"phash_{i}"] = chunk
+    return fields
+
+
+def chunk_neighbours(chunk, radius):
+    """Every CHUNK_BITS value within `radius` bits of `chunk` (itself included)."""
+    values = [chunk]
+    for flips in range(1, radius + 1):
+        for bits in combinations(range(CHUNK_BITS), flips):
+            values.append(chunk ^ sum(1 << bit for bit in bits))
+    return values
+
+
+def similar_images(queryset, phash, max_distance=DEFAULT_MAX_DISTANCE):
+    """
+    [(image, distance)] from `queryset` (LayawayImage) within max_distance of `phash`,
+    closest first. Only rows sharing a nearby chunk are read.
+    """
+    if not 0 <= max_distance <= MAX_DISTANCE:
+        raise ValueError(f"Distance must be between 0 and {MAX_DISTANCE}.")
+    radius = max_distance // PHASH_CHUNKS
+    probes = reduce(
+        or_,
+        (
+            Q(**{f"phash_{i}__in": chunk_neighbours(chunk, radius)})
+            for i, chunk in enumerate(hash_chunks(phash))
+        ),
+    )
+    matches = []
+    for image in queryset.filter(probes):
+        distance = hamming(image.phash, phash)
+        if distance <= max_distance:
+            matches.append((image, distance))
+    matches.sort(key=lambda match: (match[1], match[0].pk))
+    return matches
+
+
+def find_similar_for_layaway(layaway, max_distance=DEFAULT_MAX_DISTANCE):
+    """
+    [(image, [(other image, distance)])] for each hashed image of `layaway`, matching
+    images of other layaways only.
+    """
+    from apps.orders.models import LayawayImage
+
+    others = LayawayImage.objects.exclude(layaway=layaway).select_related(
+        "layaway__user"
+    )
+    return [
+        (image, similar_images(others, image.phash, max_distance))
+        for image in layaway.item_images.filter(phash__isnull=False)
+    ]
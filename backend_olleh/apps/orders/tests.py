@@ -1,3 +1,1011 @@
-from django.test import TestCase
+import io
+import posixpath
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from apps.memberships.models import Membership, UserMembership
+from apps.orders.models import Layaway, LayawayExposure
+from apps.orders.services import get_layaway_eligibility, rebuild_layaway_exposure
+from users.models import User
+
+
+class LayawayExposureTestCase(TestCase):
+    """Test cases for the denormalized per-member layaway exposure"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="member@example.com",
+            password="testpass123",
+        )
+        self.admin = User.objects.create_user(
+            email="admin@example.com",
+            password="adminpass123",
+            is_staff=True,
+        )
+        self.membership = Membership.objects.create(
+            name="Test Tier",
+            price=10_000,
+            max_order_price=100_000,
+            description="Test tier (annual)",
+            duration_days=365,
+            is_available=True,
+        )
+        user_membership = UserMembership.objects.create(
+            user=self.user,
+            membership=self.membership,
+            payment_mode=UserMembership.PAYMENT_CASH,
+            amount_paid=self.membership.price,
+            status=UserMembership.STATUS_PENDING,
+        )
+        user_membership.activate(self.admin)
+
+    def _layaway(self, item_value_rwf):
+        return Layaway.objects.create(
+            user=self.user,
+            item_value_rwf=item_value_rwf,
+            service_fee_rwf=0,
+        )
+
+    def test_exposure_follows_layaway_lifecycle(self):
+        """Creating adds to exposure; cancel and default release it"""
+        first = self._layaway(30_000)
+        second = self._layaway(20_000)
+        exposure = LayawayExposure.objects.get(user=self.user)
+        self.assertEqual(exposure.open_total_rwf, 50_000)
+        self.assertEqual(exposure.open_count, 2)
+
+        first.cancel()
+        second.activate()
+        second.mark_defaulted()
+        exposure.refresh_from_db()
+        self.assertEqual(exposure.open_total_rwf, 0)
+        self.assertEqual(exposure.open_count, 0)
+
+    def test_eligibility_reads_exposure_row(self):
+        """Available limit is limit minus open exposure"""
+        self._layaway(30_000)
+        eligibility = get_layaway_eligibility(self.user)
+        self.assertEqual(eligibility["current_layaway_total_rwf"], 30_000)
+        self.assertEqual(eligibility["available_layaway_rwf"], 70_000)
+        self.assertEqual(LayawayExposure.objects.get(user=self.user).limit_rwf, 100_000)
+
+    def test_eligibility_is_read_only(self):
+        """Eligibility only reads; limit_rwf follows the tier on the next exposure change"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self._layaway(30_000)
+        self.membership.max_order_price = 200_000
+        self.membership.save()
+        with CaptureQueriesContext(connection) as queries:
+            eligibility = get_layaway_eligibility(self.user)
+        self.assertEqual(eligibility["available_layaway_rwf"], 170_000)
+        self.assertFalse(
+            any(q["sql"].startswith("UPDATE") for q in queries.captured_queries)
+        )
+        self.assertEqual(LayawayExposure.objects.get(user=self.user).limit_rwf, 100_000)
+
+        self._layaway(10_000)
+        self.assertEqual(LayawayExposure.objects.get(user=self.user).limit_rwf, 200_000)
+
+    def test_stale_instances_apply_transition_once(self):
+        """Two copies loaded before either cancels release the exposure only once"""
+        self._layaway(40_000)
+        layaway = self._layaway(30_000)
+        stale = Layaway.objects.get(pk=layaway.pk)
+
+        layaway.cancel()
+        stale.cancel()
+        exposure = LayawayExposure.objects.get(user=self.user)
+        self.assertEqual(exposure.open_total_rwf, 40_000)
+        self.assertEqual(exposure.open_count, 1)
+
+    def test_drifted_exposure_is_logged_and_rebuilt(self):
+        """A delta that would go negative is reported and the row recomputed"""
+        layaway = self._layaway(30_000)
+        LayawayExposure.objects.filter(user=self.user).update(
+            open_total_rwf=10_000, open_count=1
+        )
+
+        with self.assertLogs("olleh.orders", level="WARNING"):
+            layaway.cancel()
+        exposure = LayawayExposure.objects.get(user=self.user)
+        self.assertEqual(exposure.open_total_rwf, 0)
+        self.assertEqual(exposure.open_count, 0)
+
+    def test_rebuild_reports_and_repairs_drift(self):
+        """Reconciliation detects a drifted row and rebuilds it"""
+        self._layaway(30_000)
+        LayawayExposure.objects.filter(user=self.user).update(open_total_rwf=1)
+
+        result = rebuild_layaway_exposure(dry_run=True)
+        self.assertEqual(len(result["drift"]), 1)
+        self.assertEqual(LayawayExposure.objects.get(user=self.user).open_total_rwf, 1)
+
+        result = rebuild_layaway_exposure()
+        self.assertEqual(result["updated"], 1)
+        self.assertEqual(
+            LayawayExposure.objects.get(user=self.user).open_total_rwf, 30_000
+        )
+
+
+TEST_MEDIA_ROOT = tempfile.mkdtemp(prefix="olleh-test-media-")
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class LayawayListAPITestCase(TestCase):
+    """Test cases for the layaway list endpoint"""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from rest_framework.test import APIClient
+
+        from apps.orders.models import LayawayImage
+
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="member@example.com",
+            password="testpass123",
+        )
+        for i in range(3):
+            layaway = Layaway.objects.create(
+                user=self.user, item_value_rwf=10_000, service_fee_rwf=0
+            )
+            LayawayImage.objects.create(
+                layaway=layaway,
+                image=SimpleUploadedFile(f"item{i}.jpg", b"x", "image/jpeg"),
+            )
+        self.client_api = APIClient()
+        self.client_api.force_authenticate(user=self.user)
+
+    def test_list_prefetches_images(self):
+        """Images for all rows come from a single prefetch query"""
+        from django.urls import reverse
+
+        url = reverse("orders:layaway-list")
+        with self.assertNumQueries(2):
+            response = self.client_api.get(url)
+        results = response.data["results"]
+        self.assertEqual(len(results), 3)
+        self.assertTrue(
+            results[0]["item_images"][0]["url"].startswith("http://testserver/")
+        )
+
+    def test_fields_param_skips_images(self):
+        """?fields= returns only the requested fields and skips the image query"""
+        from django.urls import reverse
+
+        url = reverse("orders:layaway-list") + "?fields=id,status"
+        with self.assertNumQueries(1):
+            response = self.client_api.get(url)
+        self.assertEqual(set(response.data["results"][0]), {"id", "status"})
+
+    def test_cursor_pagination_walks_all_rows(self):
+        """Following next links returns every layaway once, newest first"""
+        from django.urls import reverse
+
+        url = reverse("orders:layaway-list") + "?fields=id&page_size=2"
+        seen = []
+        while url:
+            response = self.client_api.get(url)
+            seen.extend(row["id"] for row in response.data["results"])
+            url = response.data["next"]
+        expected = list(
+            Layaway.objects.order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_cursor_pages_through_shared_timestamps(self):
+        """Rows sharing created_at are paged on id in both directions, without OFFSET"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from django.urls import reverse
+        from django.utils import timezone
+
+        for _ in range(4):
+            Layaway.objects.create(
+                user=self.user, item_value_rwf=10_000, service_fee_rwf=0
+            )
+        Layaway.objects.update(created_at=timezone.now())
+        expected = list(
+            Layaway.objects.order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+
+        url = reverse("orders:layaway-list") + "?fields=id&page_size=3"
+        seen, pages = [], []
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                pages.append(url)
+                response = self.client_api.get(url)
+                seen.extend(row["id"] for row in response.data["results"])
+                url = response.data["next"]
+        self.assertEqual(seen, expected)
+        self.assertFalse(any("OFFSET" in q["sql"] for q in queries.captured_queries))
+
+        previous = self.client_api.get(pages[-1]).data["previous"]
+        back = self.client_api.get(previous).data["results"]
+        self.assertEqual([row["id"] for row in back], expected[3:6])
+
+
+class LayawayLifecycleTestCase(TestCase):
+    """Test cases for the scheduled layaway lifecycle sweep"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="member@example.com",
+            password="testpass123",
+        )
+
+    def _layaway(self, **fields):
+        layaway = Layaway.objects.create(
+            user=self.user, item_value_rwf=20_000, service_fee_rwf=0
+        )
+        Layaway.objects.filter(pk=layaway.pk).update(**fields)
+        return layaway
+
+    def test_activates_and_defaults_in_batches(self):
+        """Due rows transition; others are untouched; exposure stays in sync"""
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from apps.orders.models import DEFAULT_PENALTY_RWF, LAYAWAY_MAX_DAYS
+        from apps.orders.services import run_layaway_lifecycle
+
+        now = timezone.now()
+        confirmed = now - timedelta(days=3)
+        due = self._layaway(
+            status=Layaway.STATUS_COOLING_OFF,
+            confirmed_at=confirmed,
+            cooling_off_until=now - timedelta(days=1),
+        )
+        cooling = self._layaway(
+            status=Layaway.STATUS_COOLING_OFF,
+            cooling_off_until=now + timedelta(days=1),
+        )
+        overdue = [
+            self._layaway(
+                status=Layaway.STATUS_ACTIVE, end_date=now - timedelta(days=1)
+            )
+            for _ in range(3)
+        ]
+        paid_up = self._layaway(
+            status=Layaway.STATUS_ACTIVE,
+            end_date=now - timedelta(days=1),
+            amount_paid_rwf=25_000,
+        )
+
+        dry = run_layaway_lifecycle(now=now, dry_run=True)
+        self.assertEqual((dry["matched_activate"], dry["matched_default"]), (1, 3))
+
+        result = run_layaway_lifecycle(now=now, chunk_size=2)
+        self.assertEqual(result["activated"], 1)
+        self.assertEqual(result["defaulted"], 3)
+        self.assertEqual(result["penalties_rwf"], 3 * DEFAULT_PENALTY_RWF)
+        self.assertEqual(result["chunks"], 3)
+
+        due.refresh_from_db()
+        self.assertEqual(due.status, Layaway.STATUS_ACTIVE)
+        self.assertEqual(due.start_date, confirmed)
+        self.assertEqual(due.end_date, confirmed + timedelta(days=LAYAWAY_MAX_DAYS))
+        cooling.refresh_from_db()
+        self.assertEqual(cooling.status, Layaway.STATUS_COOLING_OFF)
+        for layaway in overdue:
+            layaway.refresh_from_db()
+            self.assertEqual(layaway.status, Layaway.STATUS_DEFAULTED)
+            self.assertEqual(layaway.default_penalty_rwf, DEFAULT_PENALTY_RWF)
+        paid_up.refresh_from_db()
+        self.assertEqual(paid_up.status, Layaway.STATUS_ACTIVE)
+
+        # Remaining open: due (now active), cooling, paid_up
+        exposure = LayawayExposure.objects.get(user=self.user)
+        self.assertEqual((exposure.open_total_rwf, exposure.open_count), (60_000, 3))
+        self.assertEqual(rebuild_layaway_exposure(dry_run=True)["drift"], [])
+
+        again = run_layaway_lifecycle(now=now)
+        self.assertEqual((again["activated"], again["defaulted"]), (0, 0))
+
+
+class BulkLayawayActionsTestCase(TestCase):
+    """Test cases for the bulk admin confirm/activate transitions"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="member@example.com",
+            password="testpass123",
+        )
+
+    def _layaway(self, **fields):
+        layaway = Layaway.objects.create(
+            user=self.user, item_value_rwf=20_000, service_fee_rwf=0
+        )
+        if fields:
+            Layaway.objects.filter(pk=layaway.pk).update(**fields)
+        return layaway
+
+    def test_confirm_reports_failures_per_row(self):
+        """Pending rows start cooling-off; the rest are reported"""
+        from apps.orders.services import bulk_confirm_layaways
+
+        pending = [self._layaway() for _ in range(3)]
+        active = self._layaway(status=Layaway.STATUS_ACTIVE)
+
+        with self.assertNumQueries(4):
+            result = bulk_confirm_layaways(Layaway.objects.all())
+
+        self.assertEqual(result["selected"], 4)
+        self.assertEqual(result["updated"], 3)
+        self.assertEqual([failure["id"] for failure in result["failed"]], [active.pk])
+        for layaway in pending:
+            layaway.refresh_from_db()
+            self.assertEqual(layaway.status, Layaway.STATUS_COOLING_OFF)
+            self.assertIsNotNone(layaway.cooling_off_until)
+
+    def test_activate_sets_period_from_confirmation(self):
+        """Activation matches Layaway.activate and leaves exposure unchanged"""
+        from django.core.exceptions import ValidationError
+
+        from apps.orders.services import (
+            bulk_activate_layaways,
+            bulk_confirm_layaways,
+        )
+
+        layaway = self._layaway()
+        bulk_confirm_layaways(Layaway.objects.all())
+        completed = self._layaway(status=Layaway.STATUS_COMPLETED)
+        exposure = LayawayExposure.objects.get(user=self.user).open_count
+
+        with self.assertRaises(ValidationError):
+            bulk_activate_layaways(Layaway.objects.all(), duration_days=90)
+
+        result = bulk_activate_layaways(Layaway.objects.all(), duration_days=20)
+
+        self.assertEqual(result["updated"], 1)
+        self.assertEqual(
+            [failure["id"] for failure in result["failed"]], [completed.pk]
+        )
+        layaway.refresh_from_db()
+        self.assertEqual(layaway.status, Layaway.STATUS_ACTIVE)
+        self.assertEqual(layaway.start_date, layaway.confirmed_at)
+        self.assertEqual((layaway.end_date - layaway.start_date).days, 20)
+        self.assertEqual(
+            LayawayExposure.objects.get(user=self.user).open_count, exposure
+        )
+
+
+def make_image_file(name="item.jpg", size=(2000, 1500), format="JPEG"):
+    import io
+
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (200, 30, 30)).save(buffer, format)
+    return SimpleUploadedFile(name, buffer.getvalue(), f"image/{format.lower()}")
+
+
+@override_settings(
+    MEDIA_ROOT=TEST_MEDIA_ROOT,
+    LAYAWAY_IMAGE_WORKERS=0,
+    LAYAWAY_IMAGE_SANITIZE_WORKERS=0,
+)
+class LayawayImageVariantsTestCase(TestCase):
+    """Test cases for thumbnail/display variants of item images"""
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+
+        self.user = User.objects.create_user(
+            email="member@example.com",
+            password="testpass123",
+        )
+        self.layaway = Layaway.objects.create(
+            user=self.user, item_value_rwf=10_000, service_fee_rwf=0
+        )
+        self.client_api = APIClient()
+        self.client_api.force_authenticate(user=self.user)
+
+    def test_upload_generates_variants_after_commit(self):
+        """Variants are written next to the original; lists return the thumbnail"""
+        from django.urls import reverse
+        from PIL import Image
+
+        from apps.orders.images import VARIANT_EXTENSION
+        from apps.orders.models import LayawayImage
+
+        url = reverse("orders:layaway-add-image", kwargs={"pk": self.layaway.pk})
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.client_api.post(
+                url, {"image": make_image_file()}, format="multipart"
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(callbacks), 1)
+
+        image = LayawayImage.objects.get()
+        self.assertIsNotNone(image.variants_generated_at)
+        folder = posixpath.dirname(image.image.name)
+        self.assertEqual(posixpath.dirname(image.thumbnail.name), folder)
+        self.assertTrue(image.display.name.endswith(f"_display.{VARIANT_EXTENSION}"))
+        with Image.open(image.thumbnail.path) as thumbnail:
+            self.assertEqual(thumbnail.size, (320, 240))
+        with Image.open(image.display.path) as display:
+            self.assertEqual(max(display.size), 1280)
+
+        listed = self.client_api.get(reverse("orders:layaway-list"))
+        self.assertTrue(
+            listed.data["results"][0]["item_images"][0]["url"].endswith(
+                image.get_file_url("thumbnail")
+            )
+        )
+        detail = self.client_api.get(
+            reverse("orders:layaway-detail", kwargs={"pk": self.layaway.pk})
+        )
+        item = detail.data["item_images"][0]
+        self.assertTrue(item["url"].endswith(image.get_file_url("original")))
+        self.assertTrue(item["display_url"].endswith(image.get_file_url("display")))
+        served = self.client_api.get(image.get_file_url("thumbnail"))
+        with Image.open(io.BytesIO(b"".join(served.streaming_content))) as thumbnail:
+            self.assertEqual(thumbnail.size, (320, 240))
+
+    def test_caption_edit_does_not_regenerate(self):
+        """Only a new or replaced original schedules a run; bad files are logged"""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        from apps.orders.models import LayawayImage
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image = LayawayImage.objects.create(
+                layaway=self.layaway, image=make_image_file(size=(100, 80))
+            )
+        image = LayawayImage.objects.get(pk=image.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            image.caption = "Blue dress"
+            image.save()
+        self.assertEqual(callbacks, [])
+
+        with (
+            self.assertLogs("olleh.images", level="ERROR"),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            LayawayImage.objects.create(
+                layaway=self.layaway,
+                image=SimpleUploadedFile("bad.jpg", b"x", "image/jpeg"),
+            )
+
+    def test_command_counts_bad_files_and_surfaces_bugs(self):
+        """Undecodable images are counted as failed; other errors stop the command"""
+        from io import StringIO
+        from unittest import mock
+
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.core.management import call_command
+
+        from apps.orders.management.commands import generate_layaway_image_variants
+        from apps.orders.models import LayawayImage
+
+        # Variants are generated on commit, which never comes in this test
+        LayawayImage.objects.create(
+            layaway=self.layaway,
+            image=SimpleUploadedFile("bad.jpg", b"x", "image/jpeg"),
+        )
+        out = StringIO()
+        call_command("generate_layaway_image_variants", stdout=out)
+        self.assertIn("0 image(s) processed, 1 failed", out.getvalue())
+
+        with (
+            mock.patch.object(
+                generate_layaway_image_variants,
+                "generate_image_variants",
+                side_effect=KeyError("thumbnail"),
+            ),
+            self.assertRaises(KeyError),
+        ):
+            call_command("generate_layaway_image_variants", stdout=StringIO())
+
+    def test_concurrent_writer_leaves_no_suffixed_files(self):
+        """A variant written meanwhile by a run for the same blob is kept, ours dropped"""
+        from unittest import mock
+
+        from django.core.files.base import ContentFile
+
+        from apps.orders.images import generate_image_variants
+        from apps.orders.models import LayawayImage
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image = LayawayImage.objects.create(
+                layaway=self.layaway, image=make_image_file(size=(400, 300))
+            )
+        image.refresh_from_db()
+        storage = image.image.storage
+        folder = posixpath.dirname(image.image.name)
+        before = sorted(storage.listdir(folder)[1])
+        save = storage.save
+
+        def racing_save(name, content):
+            # The other run writes the same bytes to the deterministic name first
+            save(name, ContentFile(content.read()))
+            content.seek(0)
+            return save(name, content)
+
+        with mock.patch.object(storage, "save", side_effect=racing_save):
+            names = generate_image_variants(image.pk, overwrite=True)
+        self.assertEqual(sorted(storage.listdir(folder)[1]), before)
+        image.refresh_from_db()
+        self.assertEqual(image.thumbnail.name, names["thumbnail"])
+
+
+@override_settings(
+    MEDIA_ROOT=TEST_MEDIA_ROOT,
+    LAYAWAY_IMAGE_WORKERS=0,
+    LAYAWAY_IMAGE_SANITIZE_WORKERS=0,
+)
+class LayawayImageUploadTestCase(TestCase):
+    """Test cases for streamed, header-checked and re-encoded item image uploads"""
+
+    def setUp(self):
+        from django.urls import reverse
+        from rest_framework.test import APIClient
+
+        self.user = User.objects.create_user(
+            email="member@example.com",
+            password="testpass123",
+        )
+        self.layaway = Layaway.objects.create(
+            user=self.user, item_value_rwf=10_000, service_fee_rwf=0
+        )
+        self.client_api = APIClient()
+        self.client_api.force_authenticate(user=self.user)
+        self.url = reverse("orders:layaway-add-image", kwargs={"pk": self.layaway.pk})
+
+    def post(self, upload):
+        return self.client_api.post(self.url, {"image": upload}, format="multipart")
+
+    def test_upload_is_reencoded_without_metadata(self):
+        """EXIF is dropped, orientation applied and the longest edge capped"""
+        import io
+
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from PIL import Image
+
+        from apps.orders.models import LayawayImage
+
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90 CW
+        exif[0x010F] = "PhoneMaker"
+        buffer = io.BytesIO()
+        Image.new("RGB", (600, 300), (10, 120, 10)).save(buffer, "JPEG", exif=exif)
+        upload = SimpleUploadedFile("photo.jpeg", buffer.getvalue(), "image/jpeg")
+
+        with override_settings(LAYAWAY_IMAGE_MAX_EDGE=400):
+            response = self.post(upload)
+        self.assertEqual(response.status_code, 201, response.data)
+        image = LayawayImage.objects.get()
+        self.assertTrue(image.image.name.endswith(".jpg"))
+        with Image.open(image.image.path) as stored:
+            self.assertEqual(stored.size, (200, 400))
+            self.assertEqual(len(stored.getexif()), 0)
+
+    def test_non_image_rejected_while_streaming(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        response = self.post(
+            SimpleUploadedFile("item.jpg", b"<?php echo 1; ?>", "image/jpeg")
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("JPEG, PNG, GIF or WebP", response.data["image"][0])
+        self.assertFalse(self.layaway.item_images.exists())
+
+    def test_oversized_upload_rejected(self):
+        with override_settings(LAYAWAY_IMAGE_MAX_BYTES=1024):
+            response = self.post(make_image_file(format="PNG", name="item.png"))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("larger than", response.data["image"][0])
+        self.assertFalse(self.layaway.item_images.exists())
+
+    def test_decompression_bomb_rejected_before_decoding(self):
+        """Dimensions come from the header: the pixel data is never decoded"""
+        from unittest import mock
+
+        from apps.orders import uploads
+
+        with (
+            override_settings(LAYAWAY_IMAGE_MAX_PIXELS=1_000_000),
+            mock.patch.object(uploads, "sanitize_image") as sanitize,
+        ):
+            response = self.post(make_image_file(size=(2000, 1500)))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("megapixels", str(response.data["image"][0]))
+        sanitize.assert_not_called()
+
+    def test_timed_out_sanitize_holds_its_slot(self):
+        """A timed-out task keeps its queue slot until the worker is done with it"""
+        import threading
+        from concurrent.futures import Future
+        from unittest import mock
+
+        from apps.orders import uploads
+
+        future = Future()
+        pool = mock.Mock(**{"submit.return_value": future})
+        slots = threading.BoundedSemaphore(1)
+        with (
+            override_settings(LAYAWAY_IMAGE_SANITIZE_WORKERS=1),
+            mock.patch.object(uploads, "_get_pool", return_value=(pool, slots)),
+            mock.patch.object(uploads, "SANITIZE_TIMEOUT_SECONDS", 0.01),
+        ):
+            with self.assertRaises(uploads.ImageProcessingBusy):
+                uploads._run_sanitize("in", "out", 1, 1)
+            self.assertFalse(slots.acquire(blocking=False))
+            future.set_result(("PNG", "png", "0" * 64))
+            self.assertTrue(slots.acquire(blocking=False))
+
+
+@override_settings(
+    MEDIA_ROOT=TEST_MEDIA_ROOT,
+    LAYAWAY_IMAGE_WORKERS=0,
+    LAYAWAY_IMAGE_SANITIZE_WORKERS=0,
+)
+class LayawayImageBlobTestCase(TestCase):
+    """Test cases for content-addressed, reference-counted item image storage"""
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+
+        self.user = User.objects.create_user(
+            email="member@example.com",
+            password="testpass123",
+        )
+        self.first, self.second = (
+            Layaway.objects.create(
+                user=self.user, item_value_rwf=10_000, service_fee_rwf=0
+            )
+            for _ in range(2)
+        )
+        self.client_api = APIClient()
+        self.client_api.force_authenticate(user=self.user)
+
+    def upload(self, layaway, upload):
+        from django.urls import reverse
+
+        url = reverse("orders:layaway-add-image", kwargs={"pk": layaway.pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client_api.post(url, {"image": upload}, format="multipart")
+        self.assertEqual(response.status_code, 201, response.data)
+        return response
+
+    def test_identical_uploads_share_one_blob(self):
+        import hashlib
+
+        from apps.orders.models import LayawayImage, LayawayImageBlob
+
+        self.upload(self.first, make_image_file(size=(400, 300)))
+        self.upload(self.second, make_image_file(size=(400, 300)))
+
+        blob = LayawayImageBlob.objects.get()
+        self.assertEqual(blob.ref_count, 2)
+        images = LayawayImage.objects.all()
+        self.assertEqual({image.image.name for image in images}, {blob.file.name})
+        self.assertEqual(
+            {image.thumbnail.name for image in images}, {images[0].thumbnail.name}
+        )
+        with blob.file.open("rb") as file:
+            self.assertEqual(hashlib.sha256(file.read()).hexdigest(), blob.sha256)
+        self.assertTrue(
+            blob.file.name.startswith(f"layaway_item_images/blobs/{blob.sha256[:2]}/")
+        )
+
+        self.upload(self.second, make_image_file(size=(300, 300)))
+        self.assertEqual(LayawayImageBlob.objects.count(), 2)
+
+    def test_references_released_and_collected(self):
+        from datetime import timedelta
+
+        from django.core.management import call_command
+
+        from apps.orders.models import LayawayImageBlob
+        from apps.orders.services import collect_image_blobs
+
+        self.upload(self.first, make_image_file(size=(400, 300)))
+        self.upload(self.second, make_image_file(size=(400, 300)))
+        blob = LayawayImageBlob.objects.get()
+        storage, name, thumbnail = (
+            blob.file.storage,
+            blob.file.name,
+            self.first.item_images.get().thumbnail.name,
+        )
+
+        self.first.item_images.get().delete()
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 1)
+        self.second.delete()  # cascades to its image
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 0)
+
+        # Within the grace period nothing is collected
+        self.assertEqual(collect_image_blobs()["collected"], 0)
+        dry_run = collect_image_blobs(grace=timedelta(0), dry_run=True)
+        self.assertEqual(dry_run["collected"], 1)
+        self.assertEqual(dry_run["bytes"], blob.size)
+        self.assertTrue(storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("gc_layaway_image_blobs", grace_hours=0, stdout=io.StringIO())
+        self.assertFalse(LayawayImageBlob.objects.exists())
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(storage.exists(thumbnail))
+
+    def test_recount_repairs_counts(self):
+        from datetime import timedelta
+
+        from apps.orders.models import LayawayImageBlob
+        from apps.orders.services import (
+            collect_image_blobs,
+            recount_image_blob_references,
+        )
+
+        self.upload(self.first, make_image_file(size=(400, 300)))
+        LayawayImageBlob.objects.update(ref_count=0)
+
+        # Still referenced: never deleted, only reported
+        result = collect_image_blobs(grace=timedelta(0))
+        self.assertEqual((result["collected"], result["skipped"]), (0, 1))
+        self.assertEqual(recount_image_blob_references(), 1)
+        self.assertEqual(LayawayImageBlob.objects.get().ref_count, 1)
+        self.assertEqual(recount_image_blob_references(), 0)
+
+
+def make_pattern_file(seed, size=(256, 256), format="JPEG", quality=90):
+    """A random 8x8 block pattern scaled up: distinct perceptual hashes per seed."""
+    import random
+
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from PIL import Image
+
+    rng = random.Random(seed)
+    blocks = Image.new("L", (8, 8))
+    blocks.putdata([rng.randrange(256) for _ in range(64)])
+    buffer = io.BytesIO()
+    blocks.resize(size, Image.Resampling.NEAREST).convert("RGB").save(
+        buffer, format, quality=quality
+    )
+    return SimpleUploadedFile(
+        f"item.{format.lower()}", buffer.getvalue(), f"image/{format.lower()}"
+    )
+
+
+@override_settings(
+    MEDIA_ROOT=TEST_MEDIA_ROOT,
+    LAYAWAY_IMAGE_WORKERS=0,
+    LAYAWAY_IMAGE_SANITIZE_WORKERS=0,
+)
+class SimilarImagesTestCase(TestCase):
+    """Test cases for the perceptual-hash index of item images"""
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+
+        self.member = User.objects.create_user(
+            email="member@example.com",
+            password="testpass123",
+        )
+        self.other = User.objects.create_user(
+            email="other@example.com",
+            password="testpass123",
+        )
+        self.staff = User.objects.create_user(
+            email="staff@example.com",
+            password="staffpass123",
+            is_staff=True,
+            is_superuser=True,
+        )
+        self.client_api = APIClient()
+
+    def layaway_with_image(self, user, upload):
+        from apps.orders.models import LayawayImage
+
+        layaway = Layaway.objects.create(
+            user=user, item_value_rwf=10_000, service_fee_rwf=0
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            LayawayImage.objects.create(layaway=layaway, image=upload)
+        return layaway
+
+    def test_index_matches_brute_force(self):
+        """Chunk probes find exactly the images a full scan would"""
+        import random
+
+        from apps.orders.models import LayawayImage
+        from apps.orders.similarity import (
+            MAX_DISTANCE,
+            hamming,
+            phash_fields,
+            similar_images,
+        )
+
+        layaway = Layaway.objects.create(
+            user=self.member, item_value_rwf=10_000, service_fee_rwf=0
+        )
+        rng = random.Random(7)
+        query = rng.getrandbits(64)
+        hashes = [rng.getrandbits(64) for _ in range(300)]
+        # Planted near neighbours at every distance up to the maximum
+        hashes += [
+            query ^ sum(1 << bit for bit in rng.sample(range(64), distance))
+            for distance in range(MAX_DISTANCE + 2)
+        ]
+        LayawayImage.objects.bulk_create(
+            LayawayImage(layaway=layaway, image=f"x/{i}.jpg", **phash_fields(value))
+            for i, value in enumerate(hashes)
+        )
+
+        for distance in (0, 3, 4, 8, MAX_DISTANCE):
+            found = similar_images(LayawayImage.objects.all(), query, distance)
+            distances = (hamming(value, query) for value in hashes)
+            expected = sorted(d for d in distances if d <= distance)
+            self.assertEqual([d for _, d in found], expected)
+        with self.assertRaises(ValueError):
+            similar_images(LayawayImage.objects.all(), query, MAX_DISTANCE + 1)
+
+    def test_staff_endpoint_and_admin_panel(self):
+        from django.urls import reverse
+
+        layaway = self.layaway_with_image(self.member, make_pattern_file(1))
+        # Same picture, resized and recompressed, on another member's layaway
+        copy = self.layaway_with_image(
+            self.other, make_pattern_file(1, size=(640, 640), quality=60)
+        )
+        unrelated = self.layaway_with_image(self.other, make_pattern_file(2))
+        url = reverse("orders:layaway-similar-images", kwargs={"pk": layaway.pk})
+
+        self.client_api.force_authenticate(user=self.member)
+        self.assertEqual(self.client_api.get(url).status_code, 403)
+
+        self.client_api.force_authenticate(user=self.staff)
+        response = self.client_api.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+        matches = response.data[0]["matches"]
+        self.assertEqual([m["layaway_id"] for m in matches], [copy.pk])
+        self.assertEqual(matches[0]["member_email"], "other@example.com")
+        self.assertLessEqual(matches[0]["distance"], 4)
+        self.assertNotIn(
+            unrelated.pk,
+            [
+                m["layaway_id"]
+                for m in self.client_api.get(url, {"distance": 11}).data[0]["matches"]
+            ],
+        )
+        self.assertEqual(self.client_api.get(url, {"distance": 40}).status_code, 400)
+
+        self.client.force_login(self.staff)
+        page = self.client.get(
+            reverse("admin:orders_layaway_change", args=[layaway.pk])
+        )
+        self.assertContains(page, f"Layaway #{copy.pk}")
+        self.assertNotContains(page, f"Layaway #{unrelated.pk}<")
+
+
+@override_settings(
+    MEDIA_ROOT=TEST_MEDIA_ROOT,
+    LAYAWAY_IMAGE_WORKERS=0,
+    LAYAWAY_IMAGE_SANITIZE_WORKERS=0,
+    MEDIA_DELIVERY="python",
+)
+class ProtectedImageFileTestCase(TestCase):
+    """Test cases for the authorized item image file view"""
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+
+        from apps.orders.models import LayawayImage
+
+        self.member = User.objects.create_user(
+            email="member@example.com",
+            password="testpass123",
+        )
+        self.other = User.objects.create_user(
+            email="other@example.com",
+            password="testpass123",
+        )
+        self.staff = User.objects.create_user(
+            email="staff@example.com",
+            password="staffpass123",
+            is_staff=True,
+        )
+        self.layaway = Layaway.objects.create(
+            user=self.member, item_value_rwf=10_000, service_fee_rwf=0
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.image = LayawayImage.objects.create(
+                layaway=self.layaway, image=make_image_file(size=(400, 300))
+            )
+        self.image.refresh_from_db()
+        self.url = self.image.get_file_url("original")
+        with self.image.image.open("rb") as file:
+            self.content = file.read()
+        self.client_api = APIClient()
+        self.client_api.force_authenticate(user=self.member)
+
+    def test_owner_and_staff_only(self):
+        response = self.client_api.get(self.url, HTTP_ACCEPT="image/avif,image/*")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+
+        self.client_api.force_authenticate(user=self.other)
+        self.assertEqual(self.client_api.get(self.url).status_code, 404)
+        self.client_api.force_authenticate(user=None)
+        self.assertEqual(self.client_api.get(self.url).status_code, 401)
+
+        # Session authentication, as the admin's previews use
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_range_and_conditional_requests(self):
+        size = len(self.content)
+        response = self.client_api.get(self.url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{size}")
+        self.assertEqual(b"".join(response.streaming_content), self.content[10:20])
+
+        response = self.client_api.get(self.url, HTTP_RANGE="bytes=-5")
+        self.assertEqual(b"".join(response.streaming_content), self.content[-5:])
+        response = self.client_api.get(self.url, HTTP_RANGE=f"bytes={size}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{size}")
+
+        etag = response["ETag"]
+        response = self.client_api.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.client_api.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, 304)
+        # A stale If-Range sends the whole file
+        response = self.client_api.get(
+            self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"stale"'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_web_server_delivery(self):
+        with override_settings(MEDIA_DELIVERY="x-accel-redirect"):
+            response = self.client_api.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response["X-Accel-Redirect"], f"/protected-media/{self.image.image.name}"
+        )
+        self.assertEqual(response.content, b"")
+
+        with override_settings(MEDIA_DELIVERY="x-sendfile"):
+            response = self.client_api.get(self.image.get_file_url("thumbnail"))
+        self.assertEqual(response["X-Sendfile"], self.image.thumbnail.path)
+
+    def test_development_media_route_refuses_item_images(self):
+        """The DEBUG MEDIA_URL view 404s item images however the path is spelled"""
+        from django.http import Http404
+        from django.test import RequestFactory
+
+        from apps.common.media import serve_public_media
+
+        request = RequestFactory().get("/media/")
+        name = self.image.image.name
+        for path in (name, f"/{name}", f"./{name}", f"other/../{name}"):
+            with self.assertRaises(Http404, msg=path):
+                serve_public_media(request, path, document_root=TEST_MEDIA_ROOT)
+
+        with open(f"{TEST_MEDIA_ROOT}/public.txt", "w") as file:
+            file.write("public")
+        response = serve_public_media(
+            request, "public.txt", document_root=TEST_MEDIA_ROOT
+        )
+        self.assertEqual(b"".join(response.streaming_content), b"public")
@@ -0,0 +1,200 @@
+"""
+Memory-bounded item image uploads. The upload handler streams the request body to a
+temporary file in 64 KB chunks (never into memory), rejects non-image bytes from the first
+chunk and stops writing past LAYAWAY_IMAGE_MAX_BYTES. The header is then sniffed for format
+and dimensions without decoding, so decompression bombs are refused before any pixel is
+touched. Decoding, EXIF stripping and re-encoding run in a small process pool with a bounded
+queue: a burst of uploads costs pool memory, not web worker RSS, and is refused with 503
+once the queue is full.
+"""
+
+import hashlib
+import io
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import SkipFile, TemporaryFileUploadHandler
+from PIL import Image, ImageOps
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+
+# Sniffed format -> (output format, extension, save options)
+ALLOWED_IMAGE_FORMATS = {
+    "JPEG": ("JPEG", "jpg", {"quality": 90, "optimize": True}),
+    "PNG": ("PNG", "png", {"optimize": True}),
+    "WEBP": ("WEBP", "webp", {"quality": 90}),
+    # First frame only
+    "GIF": ("PNG", "png", {"optimize": True}),
+}
+# Leading bytes of the accepted formats; anything else is refused at the first chunk
+_MAGIC_NUMBERS = (b"\xff\xd8\xff", b"\x89PNG\r\n\x1a\n", b"GIF87a", b"GIF89a")
+
+SANITIZE_TIMEOUT_SECONDS = 60
+
+_pool = None
+_pool_slots = None
+_pool_lock = threading.Lock()
+
+
+class ImageProcessingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Image processing is busy. Please retry shortly."
+    default_code = "image_processing_busy"
+
+
+def looks_like_image(head):
+    if head.startswith(_MAGIC_NUMBERS):
+        return True
+    return head[:4] == b"RIFF" and head[8:12] == b"WEBP"
+
+
+class LayawayImageUploadHandler(TemporaryFileUploadHandler):
+    """
+    Streams each file to a temporary file; skips it (recording why in `rejected`) when
+    the first chunk is not an accepted image or the size passes LAYAWAY_IMAGE_MAX_BYTES.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.rejected = None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        if start == 0 and not looks_like_image(raw_data[:12]):
+            self.rejected = "Upload a JPEG, PNG, GIF or WebP image."
+            raise SkipFile()
+        self.received += len(raw_data)
+        if self.received > settings.LAYAWAY_IMAGE_MAX_BYTES:
+            self.rejected = (
+                f"Image is larger than {settings.LAYAWAY_IMAGE_MAX_BYTES // 2**20} MB."
+            )
+            raise SkipFile()
+        return super().receive_data_chunk(raw_data, start)
+
+
+def sniff_image(path, max_pixels):
+    """
+    (format, width, height) from the file header only (Image.open does not decode).
+    Raises ValueError for unreadable, unsupported or oversized images.
+    """
+    try:
+        with Image.open(path) as image:
+            image_format, (width, height) = image.format, image.size
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError("File is not a readable image.") from e
+    if image_format not in ALLOWED_IMAGE_FORMATS:
+        raise ValueError("Upload a JPEG, PNG, GIF or WebP image.")
+    if width * height > max_pixels:
+        raise ValueError(
+            f"Image is {width}x{height}; at most {max_pixels // 1_000_000} megapixels."
+        )
+    return image_format, width, height
+
+
+def sanitize_image(source_path, target_path, max_pixels, max_edge):
+    """
+    Decode, apply EXIF orientation, cap the longest edge and re-encode without metadata.
+    Runs in a pool process. Returns (format, extension, sha256 of the written bytes).
+    """
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    source_format, _, _ = sniff_image(source_path, max_pixels)
+    output_format, extension, options = ALLOWED_IMAGE_FORMATS[source_format]
+    with Image.open(source_path) as image:
+        image.draft("RGB", (max_edge, max_edge))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA", "L", "LA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        if output_format == "JPEG" and image.mode != "RGB":
+            image = image.convert("RGB")
+        image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+        # A fresh encode carries no EXIF/XMP/ICC text chunks from the upload
+        buffer = io.BytesIO()
+        image.save(buffer, output_format, **options)
+    # Hashed on the way to disk: the blob key for LayawayImageBlob, no second read
+    digest = hashlib.sha256(buffer.getbuffer()).hexdigest()
+    with open(target_path, "wb") as target:
+        target.write(buffer.getbuffer())
+    return output_format, extension, digest
+
+
+def _get_pool():
+    global _pool, _pool_slots
+    with _pool_lock:
+        if _pool is None:
+            workers = settings.LAYAWAY_IMAGE_SANITIZE_WORKERS
+            # spawn: forking a threaded web worker is unsafe; recycle children to
+            # return Pillow's memory to the OS
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=50,
+            )
+            _pool_slots = threading.BoundedSemaphore(
+                workers + settings.LAYAWAY_IMAGE_SANITIZE_QUEUE
+            )
+        return _pool, _pool_slots
+
+
+def _run_sanitize(*args):
+    if settings.LAYAWAY_IMAGE_SANITIZE_WORKERS <= 0:
+        # Inline (tests, development)
+        return sanitize_image(*args)
+    pool, slots = _get_pool()
+    if not slots.acquire(timeout=1):
+        raise ImageProcessingBusy()
+    try:
+        future = pool.submit(sanitize_image, *args)
+    except BaseException:
+        slots.release()
+        raise
+    # The slot belongs to the task, not to this request: a timed-out task keeps its
+    # worker busy until it finishes, so it must keep counting against the queue
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout=SANITIZE_TIMEOUT_SECONDS)
+    except FutureTimeoutError:
+        raise ImageProcessingBusy()
+
+
+def process_uploaded_image(upload):
+    """
+    Validate an upload streamed by LayawayImageUploadHandler and return a re-encoded
+    temporary file to store instead, with its content hash in `.sha256`. Raises
+    serializers.ValidationError.
+    """
+    max_pixels = settings.LAYAWAY_IMAGE_MAX_PIXELS
+    if not hasattr(upload, "temporary_file_path"):
+        raise serializers.ValidationError("Upload could not be streamed to disk.")
+    try:
+        sniff_image(upload.temporary_file_path(), max_pixels)
+    except ValueError as e:
+        raise serializers.ValidationError(str(e))
+
+    sanitized = TemporaryUploadedFile("upload", "application/octet-stream", 0, None)
+    try:
+        output_format, extension, digest = _run_sanitize(
+            upload.temporary_file_path(),
+            sanitized.temporary_file_path(),
+            max_pixels,
+            settings.LAYAWAY_IMAGE_MAX_EDGE,
+        )
+    except ValueError as e:
+        sanitized.close()
+        raise serializers.ValidationError(str(e))
+    except OSError:
+        sanitized.close()
+        raise serializers.ValidationError("File is not a readable image.")
+    sanitized.name = f"item.{extension}"
+    sanitized.sha256 = digest
+    sanitized.content_type = Image.MIME[output_format]
+    sanitized.seek(0, 2)
+    sanitized.size = sanitized.tell()
+    sanitized.seek(0)
+    return sanitized
@@ -1,9 +1,14 @@
+from django.db.models import Prefetch
 from rest_framework import status, viewsets
+from rest_framework.authentication import SessionAuthentication
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser
-from drf_spectacular.utils import extend_schema, extend_schema_view
+from rest_framework.settings import api_settings
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
 
+from apps.common.media import serve_protected_file
+from apps.common.pagination import CreatedAtCursorPagination
 from apps.orders.models import Layaway, LayawayImage
 from apps.orders.serializers import (
     LayawayListSerializer,
@@ -14,8 +19,15 @@ from apps.orders.serializers import (
     LayawayImageUploadSerializer,
     LayawayPaymentSerializer,
     LayawayPaymentCreateSerializer,
+    LayawaySimilarImagesSerializer,
 )
 from apps.orders.services import get_layaway_eligibility
+from apps.orders.similarity import (
+    DEFAULT_MAX_DISTANCE,
+    MAX_DISTANCE,
+    find_similar_for_layaway,
+)
+from apps.orders.uploads import LayawayImageUploadHandler
 from apps.memberships.permissions import IsAuthenticatedClient, IsOwnerOrAdmin
 from apps.payments.models import LayawayPayment
 from apps.payments.services import confirm_layaway_payment
@@ -24,8 +36,16 @@ from apps.payments.services import confirm_layaway_payment
 @extend_schema_view(
     list=extend_schema(
         summary="List my layaways",
-        description="List all layaways for the authenticated member.",
+        description="List all layaways for the authenticated member. "
+        "Use ?fields=id,status,... to return only those fields (omit item_images to skip images).",
         tags=["Client - Layaways"],
+        parameters=[
+            OpenApiParameter(
+                "fields",
+                str,
+                description="Comma-separated fields to return (default: all).",
+            )
+        ],
     ),
     retrieve=extend_schema(
         summary="Get layaway details",
@@ -34,13 +54,48 @@ from apps.payments.services import confirm_layaway_payment
 )
 class LayawayViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticatedClient, IsOwnerOrAdmin]
+    pagination_class = CreatedAtCursorPagination
     http_method_names = ["get", "post", "delete", "head", "options"]
 
     def get_queryset(self):
         user = self.request.user
         if user.is_staff or user.is_superuser:
-            return Layaway.objects.all()
-        return Layaway.objects.filter(user=user)
+            queryset = Layaway.objects.all()
+        else:
+            queryset = Layaway.objects.filter(user=user)
+        if self.action in ("list", "retrieve") and self.includes_field("item_images"):
+            # One query for all rows' images instead of one per layaway
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "item_images",
+                    queryset=LayawayImage.objects.order_by("order", "created_at"),
+                )
+            )
+        return queryset
+
+    def perform_content_negotiation(self, request, force=False):
+        # Image files are served whatever the Accept header (img tags send image/*)
+        force = force or self.action == "image_file"
+        return super().perform_content_negotiation(request, force=force)
+
+    def get_requested_fields(self):
+        """Sparse fieldset from ?fields=a,b,c on list; None means all fields."""
+        if self.action != "list":
+            return None
+        raw = self.request.query_params.get("fields")
+        if not raw:
+            return None
+        return {name.strip() for name in raw.split(",") if name.strip()}
+
+    def includes_field(self, name):
+        fields = self.get_requested_fields()
+        return fields is None or name in fields
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs["fields"] = fields
+        return super().get_serializer(*args, **kwargs)
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -81,13 +136,25 @@ class LayawayViewSet(viewsets.ModelViewSet):
     )
     @action(detail=True, methods=["post"], url_path="images")
     def add_image(self, request, pk=None):
+        # Before request.data is parsed: stream the file to disk, never into memory
+        upload_handler = LayawayImageUploadHandler(request._request)
+        request._request.upload_handlers = [upload_handler]
         layaway = self.get_object()
         serializer = LayawayImageUploadSerializer(
             data=request.data,
             context={"request": request},
         )
+        if upload_handler.rejected:
+            return Response(
+                {"image": [upload_handler.rejected]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         serializer.is_valid(raise_exception=True)
-        serializer.save(layaway=layaway)
+        try:
+            serializer.save(layaway=layaway)
+        finally:
+            # The re-encoded temporary file is not one of request.FILES: close it here
+            serializer.validated_data["image"].close()
         # Return with full URL
         out = LayawayImageSerializer(
             serializer.instance,
@@ -95,6 +162,39 @@ class LayawayViewSet(viewsets.ModelViewSet):
         )
         return Response(out.data, status=status.HTTP_201_CREATED)
 
+    @extend_schema(
+        summary="Get item image file",
+        description="The original image or its display/thumbnail variant (the original until "
+        "variants exist), for the layaway's owner or staff. Supports Range and conditional "
+        "requests; in production the web server sends the bytes (MEDIA_DELIVERY).",
+        tags=["Client - Layaways"],
+        responses={(200, "image/*"): bytes},
+    )
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path=r"images/(?P<image_id>[0-9]+)/(?P<variant>original|display|thumbnail)",
+        # Session too, so the admin's previews load
+        authentication_classes=[
+            *api_settings.DEFAULT_AUTHENTICATION_CLASSES,
+            SessionAuthentication,
+        ],
+    )
+    def image_file(self, request, pk=None, image_id=None, variant=None):
+        layaway = self.get_object()
+        image = layaway.item_images.filter(pk=image_id).first()
+        if image is None or not image.image:
+            return Response(
+                {"detail": "Image not found."}, status=status.HTTP_404_NOT_FOUND
+            )
+        file = {"display": image.display, "thumbnail": image.thumbnail}.get(variant)
+        try:
+            return serve_protected_file(request, file or image.image)
+        except FileNotFoundError:
+            return Response(
+                {"detail": "Image file not found."}, status=status.HTTP_404_NOT_FOUND
+            )
+
     @extend_schema(
         summary="List layaway payments",
         description="List all payments reported for this layaway.",
@@ -135,10 +235,63 @@ class LayawayViewSet(viewsets.ModelViewSet):
         out = LayawayPaymentSerializer(payment)
         return Response(out.data, status=status.HTTP_201_CREATED)
 
+    @extend_schema(
+        summary="Similar item images (staff)",
+        description="For each image of this layaway, images on other layaways whose perceptual hash is "
+        "within ?distance bits: the same item photo or screenshot, even resized or recompressed.",
+        tags=["Staff - Layaways"],
+        parameters=[
+            OpenApiParameter(
+                "distance",
+                int,
+                description=f"Maximum Hamming distance, 0-{MAX_DISTANCE} (default {DEFAULT_MAX_DISTANCE}).",
+            )
+        ],
+        responses={200: LayawaySimilarImagesSerializer(many=True)},
+    )
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path="similar-images",
+        permission_classes=[IsAuthenticatedClient, IsOwnerOrAdmin, IsAdminUser],
+    )
+    def similar_images(self, request, pk=None):
+        layaway = self.get_object()
+        try:
+            distance = int(request.query_params.get("distance", DEFAULT_MAX_DISTANCE))
+            results = find_similar_for_layaway(layaway, distance)
+        except ValueError:
+            return Response(
+                {"detail": f"distance must be an integer from 0 to {MAX_DISTANCE}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        data = [
+            {
+                "image": image,
+                "matches": [{"image": other, "distance": d} for other, d in matches],
+            }
+            for image, matches in results
+        ]
+        return Response(
+            LayawaySimilarImagesSerializer(
+                data, many=True, context={"request": request}
+            ).data
+        )
+
     @extend_schema(
         summary="Confirm a payment (staff)",
-        description="Confirm a reported payment. Amount is applied to the layaway; if paid in full, layaway is marked completed.",
+        description="Confirm a reported payment. Amount is applied to the layaway; if paid in full, layaway is marked completed. "
+        "Send an Idempotency-Key header to make retries safe: repeating the call with the same key returns the current layaway.",
         tags=["Staff - Layaways"],
+        parameters=[
+            OpenApiParameter(
+                "Idempotency-Key",
+                str,
+                location=OpenApiParameter.HEADER,
+                required=False,
+                description="Client-generated key (max 64 chars) identifying this confirmation.",
+            )
+        ],
         responses={200: LayawayDetailSerializer},
     )
     @action(
@@ -156,8 +309,18 @@ class LayawayViewSet(viewsets.ModelViewSet):
                 {"detail": "Payment not found."},
                 status=status.HTTP_404_NOT_FOUND,
             )
+        idempotency_key = request.headers.get("Idempotency-Key", "")
+        if len(idempotency_key) > 64:
+            return Response(
+                {"detail": "Idempotency-Key must be at most 64 characters."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         try:
-            confirm_layaway_payment(payment, confirmed_by=request.user)
+            layaway = confirm_layaway_payment(
+                payment,
+                confirmed_by=request.user,
+                idempotency_key=idempotency_key,
+            )
         except Exception as e:
             return Response(
                 {"detail": str(e)},
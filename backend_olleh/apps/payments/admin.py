@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Payment, LayawayPayment
+
+from .models import LayawayPayment, Payment
 
 
 @admin.register(Payment)
@@ -25,4 +26,4 @@ class LayawayPaymentAdmin(admin.ModelAdmin):
     list_filter = ["confirmed_at"]
     search_fields = ["layaway__id", "reference"]
     raw_id_fields = ["layaway", "confirmed_by"]
-    readonly_fields = ["created_at", "confirmed_at"]
+    readonly_fields = ["created_at", "confirmed_at", "confirmation_key"]
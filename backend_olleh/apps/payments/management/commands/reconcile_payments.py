@@ -0,0 +1,104 @@
+"""
+Reconcile a mobile-money/bank statement CSV (reference, amount, timestamp) against
+unconfirmed layaway payments, pending membership payments and pending Payments.
+Exact matches are confirmed in batches; everything else is reported.
+"""
+
+import csv
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.payments.services import (
+    STATEMENT_BATCH_SIZE,
+    iter_statement_rows,
+    reconcile_statement,
+)
+from users.models import User
+
+REPORT_FIELDS = [
+    "line",
+    "reference",
+    "amount_rwf",
+    "status",
+    "matched",
+    "object_id",
+    "error",
+]
+
+
+class Command(BaseCommand):
+    help = "Confirm payments from a statement CSV (reference, amount, timestamp) and report mismatches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("statement", help="Path to the statement CSV file.")
+        parser.add_argument(
+            "--staff-email",
+            help="Staff user recorded as confirming the payments (required unless --dry-run).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=STATEMENT_BATCH_SIZE,
+            help=f"Rows per lookup/transaction batch (default {STATEMENT_BATCH_SIZE}).",
+        )
+        parser.add_argument(
+            "--report",
+            help="Write rows that were not confirmed to this CSV file.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Match only; do not confirm anything.",
+        )
+
+    def handle(self, *args, **options):
+        staff = None
+        if options["staff_email"]:
+            try:
+                staff = User.objects.get(email=options["staff_email"], is_staff=True)
+            except User.DoesNotExist:
+                raise CommandError(
+                    f"No staff user with email {options['staff_email']}."
+                )
+        elif not options["dry_run"]:
+            raise CommandError("--staff-email is required unless --dry-run is given.")
+        if options["batch_size"] <= 0:
+            raise CommandError("--batch-size must be positive.")
+
+        try:
+            with open(options["statement"], newline="", encoding="utf-8-sig") as f:
+                result = reconcile_statement(
+                    iter_statement_rows(f),
+                    confirmed_by=staff,
+                    batch_size=options["batch_size"],
+                    dry_run=options["dry_run"],
+                )
+        except OSError as e:
+            raise CommandError(str(e))
+        except ValidationError as e:
+            raise CommandError("; ".join(e.messages))
+
+        if options["report"]:
+            with open(options["report"], "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+                writer.writeheader()
+                writer.writerows(result["issues"])
+        else:
+            for issue in result["issues"]:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"Line {issue['line']} {issue['reference'] or '-'}: "
+                        f"{issue['status']} {issue['error']}".rstrip()
+                    )
+                )
+
+        summary = ", ".join(
+            f"{count} {status}" for status, count in sorted(result["counts"].items())
+        )
+        prefix = "Dry run" if result["dry_run"] else "Done"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\n{prefix}. {result['total']} row(s): {summary or 'none'}."
+            )
+        )
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-17 00:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("payments", "0002_layawaypayment"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="layawaypayment",
+            name="confirmation_key",
+            field=models.CharField(
+                blank=True,
+                help_text="Idempotency-Key of the confirming request; a retry with the same key is a no-op",
+                max_length=64,
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-17 00:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("orders", "0005_layaway_idx_layaway_created"),
+        ("payments", "0003_layawaypayment_confirmation_key"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="layawaypayment",
+            index=models.Index(fields=["reference"], name="idx_layaway_payment_ref"),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-17 00:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("orders", "0006_layaway_idx_layaway_status_cooling"),
+        ("payments", "0004_layawaypayment_idx_layaway_payment_ref"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="layawaypayment",
+            index=models.Index(
+                fields=["created_at", "id"], name="idx_layaway_payment_created"
+            ),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
-from users.models import User
+
 from apps.memberships.models import UserMembership
+from users.models import User
 
 
 class Payment(models.Model):
@@ -73,11 +74,24 @@ class LayawayPayment(models.Model):
         blank=True,
         related_name="confirmed_layaway_payments",
     )
+    confirmation_key = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="Idempotency-Key of the confirming request; a retry with the same key is a no-op",
+    )
 
     class Meta:
         ordering = ["-created_at"]
         verbose_name = "Layaway payment"
         verbose_name_plural = "Layaway payments"
+        indexes = [
+            # Statement reconciliation lookups
+            models.Index(fields=["reference"], name="idx_layaway_payment_ref"),
+            # Staff exports by date range
+            models.Index(
+                fields=["created_at", "id"], name="idx_layaway_payment_created"
+            ),
+        ]
 
     def __str__(self):
         return f"Layaway #{self.layaway_id} – {self.amount_rwf:,} RWF"
@@ -0,0 +1,28 @@
+from rest_framework import serializers
+
+
+class StatementUploadSerializer(serializers.Serializer):
+    file = serializers.FileField(
+        help_text="Statement CSV with reference, amount and (optional) timestamp columns."
+    )
+    dry_run = serializers.BooleanField(
+        default=False,
+        help_text="Match only; do not confirm anything.",
+    )
+
+
+class StatementIssueSerializer(serializers.Serializer):
+    line = serializers.IntegerField()
+    reference = serializers.CharField()
+    amount_rwf = serializers.IntegerField(allow_null=True)
+    status = serializers.CharField()
+    matched = serializers.CharField()
+    object_id = serializers.IntegerField(allow_null=True)
+    error = serializers.CharField()
+
+
+class StatementReconciliationSerializer(serializers.Serializer):
+    total = serializers.IntegerField()
+    counts = serializers.DictField(child=serializers.IntegerField())
+    issues = StatementIssueSerializer(many=True)
+    dry_run = serializers.BooleanField()
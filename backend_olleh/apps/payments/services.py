@@ -1,39 +1,291 @@
+import csv
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.exceptions import ValidationError
 from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
-from django.core.exceptions import ValidationError
+from django.utils.dateparse import parse_datetime
 
-from apps.payments.models import LayawayPayment
+from apps.memberships.models import UserMembership
 from apps.orders.models import Layaway
+from apps.payments.models import LayawayPayment, Payment
 
 
 @transaction.atomic
-def confirm_layaway_payment(payment: LayawayPayment, confirmed_by) -> Layaway:
+def confirm_layaway_payment(
+    payment: LayawayPayment, confirmed_by, idempotency_key=""
+) -> Layaway:
     """
     Staff confirms a layaway payment: add amount to layaway.amount_paid_rwf,
     set confirmed_at/confirmed_by. If layaway is now paid in full, mark it completed.
+
+    Layaway and payment rows are locked (SELECT ... FOR UPDATE, always layaway first)
+    so concurrent confirmations cannot double-apply or overshoot total_rwf; confirmations
+    for different layaways proceed in parallel. If the payment was already confirmed with
+    the same idempotency_key, the current layaway is returned instead of an error.
     """
+    layaway = Layaway.objects.select_for_update().get(pk=payment.layaway_id)
+    payment = LayawayPayment.objects.select_for_update().get(pk=payment.pk)
+
     if payment.confirmed_at is not None:
+        if idempotency_key and payment.confirmation_key == idempotency_key:
+            return layaway
         raise ValidationError("This payment is already confirmed.")
-    layaway = payment.layaway
     if layaway.status not in (Layaway.STATUS_ACTIVE, Layaway.STATUS_COOLING_OFF):
         raise ValidationError(
             "Payments can only be confirmed for active or cooling-off layaways."
         )
-    new_total_paid = layaway.amount_paid_rwf + payment.amount_rwf
-    if new_total_paid > layaway.total_rwf:
+    # Conditional increment: only applies if it keeps amount_paid_rwf <= total_rwf
+    applied = Layaway.objects.filter(
+        pk=layaway.pk,
+        amount_paid_rwf__lte=F("total_rwf") - payment.amount_rwf,
+    ).update(
+        amount_paid_rwf=F("amount_paid_rwf") + payment.amount_rwf,
+        updated_at=timezone.now(),
+    )
+    if not applied:
         raise ValidationError(
             f"Confirming {payment.amount_rwf:,} RWF would exceed layaway total "
             f"({layaway.total_rwf:,} RWF). Current amount paid: {layaway.amount_paid_rwf:,} RWF."
         )
-    now = timezone.now()
-    payment.confirmed_at = now
+    payment.confirmed_at = timezone.now()
     payment.confirmed_by = confirmed_by
-    payment.save(update_fields=["confirmed_at", "confirmed_by"])
-    layaway.amount_paid_rwf = new_total_paid
-    layaway.save(update_fields=["amount_paid_rwf"])
+    payment.confirmation_key = idempotency_key
+    payment.save(update_fields=["confirmed_at", "confirmed_by", "confirmation_key"])
+
+    layaway.refresh_from_db(fields=["amount_paid_rwf", "updated_at"])
     if (
         layaway.status == Layaway.STATUS_ACTIVE
         and layaway.amount_paid_rwf >= layaway.total_rwf
     ):
         layaway.mark_completed()
     return layaway
+
+
+# =========================
+# Statement reconciliation
+# =========================
+
+STATEMENT_BATCH_SIZE = 500
+
+# Accepted CSV header names (case-insensitive) for MTN/Airtel-style statements
+STATEMENT_COLUMNS = {
+    "reference": ("reference", "ref", "transaction_id", "txn_id", "external_id"),
+    "amount": ("amount", "amount_rwf"),
+    "timestamp": ("timestamp", "date", "datetime", "time"),
+}
+
+MATCH_CONFIRMED = "confirmed"
+MATCH_UNMATCHED = "unmatched"
+MATCH_AMOUNT_MISMATCH = "amount_mismatch"
+MATCH_AMBIGUOUS = "ambiguous"
+MATCH_DUPLICATE = "duplicate"
+MATCH_REJECTED = "rejected"
+MATCH_INVALID = "invalid"
+
+
+def _parse_amount_rwf(value):
+    """'10,000' / '10000.00' -> 10000; None if not a whole, finite number of RWF."""
+    try:
+        amount = Decimal(value.replace(",", ""))
+    except InvalidOperation:
+        return None
+    if not amount.is_finite() or amount != amount.to_integral_value():
+        return None
+    return int(amount)
+
+
+def _statement_column(values, positions, key):
+    position = positions[key]
+    if position is None or position >= len(values):
+        return ""
+    return values[position].strip()
+
+
+def iter_statement_rows(text_stream):
+    """
+    Yield dicts (line, reference, amount_rwf, timestamp, error) from a CSV statement,
+    one row at a time, so arbitrarily large statements are never held in memory.
+    """
+    reader = csv.reader(text_stream)
+    header = next(reader, None)
+    if header is None:
+        return
+    normalized = [name.strip().lower() for name in header]
+    positions = {}
+    for key, aliases in STATEMENT_COLUMNS.items():
+        positions[key] = next(
+            (normalized.index(alias) for alias in aliases if alias in normalized),
+            None,
+        )
+    if positions["reference"] is None or positions["amount"] is None:
+        raise ValidationError(
+            "Statement must have reference and amount columns "
+            f"(got: {', '.join(header)})."
+        )
+
+    for line, values in enumerate(reader, start=2):
+        if not any(value.strip() for value in values):
+            continue
+        row = {"line": line, "error": ""}
+        reference, amount, timestamp = (
+            _statement_column(values, positions, key)
+            for key in ("reference", "amount", "timestamp")
+        )
+        row["reference"] = reference
+        row["amount_rwf"] = _parse_amount_rwf(amount)
+        if row["amount_rwf"] is None:
+            row["error"] = f"Invalid amount: {amount!r}"
+        timestamp = parse_datetime(timestamp) if timestamp else None
+        if timestamp is not None and timezone.is_naive(timestamp):
+            timestamp = timezone.make_aware(timestamp)
+        row["timestamp"] = timestamp
+        if not row["reference"] and not row["error"]:
+            row["error"] = "Missing reference"
+        yield row
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _index_by(objects, attr):
+    index = defaultdict(list)
+    for obj in objects:
+        index[getattr(obj, attr)].append(obj)
+    return index
+
+
+def _reconcile_batch(rows, confirmed_by, seen, dry_run):
+    """Match one batch with three indexed IN lookups and confirm matches in one transaction."""
+    references = {row["reference"] for row in rows if not row["error"]}
+    layaway_payments = _index_by(
+        LayawayPayment.objects.filter(
+            reference__in=references, confirmed_at__isnull=True
+        ),
+        "reference",
+    )
+    memberships = _index_by(
+        UserMembership.objects.filter(
+            payment_reference__in=references,
+            status=UserMembership.STATUS_PENDING,
+        ).select_related("membership"),
+        "payment_reference",
+    )
+    payments = _index_by(
+        Payment.objects.filter(reference__in=references, status="pending"),
+        "reference",
+    )
+
+    results = []
+    with transaction.atomic():
+        for row in rows:
+            result = {**row, "matched": "", "object_id": None}
+            results.append(result)
+            if row["error"]:
+                result["status"] = MATCH_INVALID
+                continue
+            reference = row["reference"]
+            if reference in seen:
+                result["status"] = MATCH_DUPLICATE
+                result["error"] = f"Reference already on line {seen[reference]}"
+                continue
+            seen[reference] = row["line"]
+
+            candidates = [
+                ("layaway_payment", obj, obj.amount_rwf)
+                for obj in layaway_payments.get(reference, ())
+            ]
+            candidates += [
+                ("membership", obj, obj.amount_paid)
+                for obj in memberships.get(reference, ())
+            ]
+            candidates += [
+                ("payment", obj, obj.amount) for obj in payments.get(reference, ())
+            ]
+            if not candidates:
+                result["status"] = MATCH_UNMATCHED
+                continue
+            if len(candidates) > 1:
+                result["status"] = MATCH_AMBIGUOUS
+                result["error"] = (
+                    f"{len(candidates)} unconfirmed records share this reference"
+                )
+                continue
+
+            kind, obj, expected_amount = candidates[0]
+            result["matched"] = kind
+            result["object_id"] = obj.pk
+            if expected_amount is None:
+                # e.g. a pending membership whose amount was never recorded
+                result["status"] = MATCH_AMOUNT_MISMATCH
+                result["error"] = "No amount recorded on the matched record"
+                continue
+            if expected_amount != row["amount_rwf"]:
+                result["status"] = MATCH_AMOUNT_MISMATCH
+                result["error"] = f"Expected {expected_amount:,} RWF"
+                continue
+            if dry_run:
+                result["status"] = MATCH_CONFIRMED
+                continue
+            try:
+                # Savepoint per row: one rejected match does not roll back the batch
+                with transaction.atomic():
+                    if kind == "layaway_payment":
+                        confirm_layaway_payment(
+                            obj,
+                            confirmed_by=confirmed_by,
+                            idempotency_key=f"statement:{reference}"[:64],
+                        )
+                    elif kind == "membership":
+                        obj.mark_as_paid(confirmed_by)
+                    else:
+                        obj.status = "completed"
+                        obj.paid_at = row["timestamp"] or timezone.now()
+                        obj.save(update_fields=["status", "paid_at"])
+            except ValidationError as e:
+                result["status"] = MATCH_REJECTED
+                result["error"] = "; ".join(e.messages)
+                continue
+            result["status"] = MATCH_CONFIRMED
+    return results
+
+
+def reconcile_statement(
+    rows, confirmed_by, batch_size=STATEMENT_BATCH_SIZE, dry_run=False
+):
+    """
+    Match statement rows against unconfirmed LayawayPayment.reference,
+    pending UserMembership.payment_reference and pending Payment.reference, and
+    confirm exact (reference + amount) matches, one transaction per batch.
+    Returns dict: counts (per status), total, issues (every row not confirmed), dry_run.
+    """
+    counts = defaultdict(int)
+    issues = []
+    seen = {}
+    for batch in _batched(rows, batch_size):
+        for result in _reconcile_batch(batch, confirmed_by, seen, dry_run):
+            counts[result["status"]] += 1
+            if result["status"] != MATCH_CONFIRMED:
+                issues.append(
+                    {
+                        "line": result["line"],
+                        "reference": result["reference"],
+                        "amount_rwf": result["amount_rwf"],
+                        "status": result["status"],
+                        "matched": result["matched"],
+                        "object_id": result["object_id"],
+                        "error": result["error"],
+                    }
+                )
+    return {
+        "total": sum(counts.values()),
+        "counts": dict(counts),
+        "issues": issues,
+        "dry_run": dry_run,
+    }
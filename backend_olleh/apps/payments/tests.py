@@ -1,3 +1,170 @@
+import io
+
+from django.core.exceptions import ValidationError
 from django.test import TestCase
 
-# Create your tests here.
+from apps.memberships.models import Membership, UserMembership
+from apps.orders.models import Layaway
+from apps.payments.models import LayawayPayment
+from apps.payments.services import (
+    confirm_layaway_payment,
+    iter_statement_rows,
+    reconcile_statement,
+)
+from users.models import User
+
+
+class ConfirmLayawayPaymentTestCase(TestCase):
+    """Test cases for staff confirmation of layaway payments"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="member@example.com",
+            password="testpass123",
+        )
+        self.staff = User.objects.create_user(
+            email="staff@example.com",
+            password="staffpass123",
+            is_staff=True,
+        )
+        self.layaway = Layaway.objects.create(
+            user=self.user,
+            item_value_rwf=20_000,
+            service_fee_rwf=0,
+        )
+        self.layaway.confirm_by_olleh()
+        self.layaway.activate()
+
+    def test_confirm_applies_amount_and_completes(self):
+        """Full payment is applied atomically and completes the layaway"""
+        payment = LayawayPayment.objects.create(
+            layaway=self.layaway, amount_rwf=self.layaway.total_rwf
+        )
+        layaway = confirm_layaway_payment(payment, confirmed_by=self.staff)
+        self.assertEqual(layaway.amount_paid_rwf, self.layaway.total_rwf)
+        self.assertEqual(layaway.status, Layaway.STATUS_COMPLETED)
+
+    def test_retry_with_same_idempotency_key_is_noop(self):
+        """Same key returns the prior result; no key or another key is rejected"""
+        payment = LayawayPayment.objects.create(layaway=self.layaway, amount_rwf=5_000)
+        confirm_layaway_payment(payment, self.staff, idempotency_key="abc")
+        layaway = confirm_layaway_payment(payment, self.staff, idempotency_key="abc")
+        self.assertEqual(layaway.amount_paid_rwf, 5_000)
+        with self.assertRaises(ValidationError):
+            confirm_layaway_payment(payment, self.staff)
+        with self.assertRaises(ValidationError):
+            confirm_layaway_payment(payment, self.staff, idempotency_key="other")
+
+    def test_confirm_cannot_exceed_total(self):
+        """A payment that would overshoot total_rwf is rejected and nothing changes"""
+        Layaway.objects.filter(pk=self.layaway.pk).update(
+            amount_paid_rwf=self.layaway.total_rwf - 1_000
+        )
+        payment = LayawayPayment.objects.create(layaway=self.layaway, amount_rwf=5_000)
+        with self.assertRaises(ValidationError):
+            confirm_layaway_payment(payment, self.staff)
+        payment.refresh_from_db()
+        self.assertIsNone(payment.confirmed_at)
+
+
+class ReconcileStatementTestCase(TestCase):
+    """Test cases for bulk statement reconciliation"""
+
+    def setUp(self):
+        self.staff = User.objects.create_user(
+            email="staff@example.com",
+            password="staffpass123",
+            is_staff=True,
+        )
+        member = User.objects.create_user(
+            email="member@example.com",
+            password="testpass123",
+        )
+        layaway = Layaway.objects.create(
+            user=member, item_value_rwf=20_000, service_fee_rwf=0
+        )
+        layaway.confirm_by_olleh()
+        layaway.activate()
+        self.layaway_payment = LayawayPayment.objects.create(
+            layaway=layaway, amount_rwf=5_000, reference="MP001"
+        )
+        self.other_payment = LayawayPayment.objects.create(
+            layaway=layaway, amount_rwf=3_000, reference="MP002"
+        )
+        tier = Membership.objects.create(
+            name="Test Tier",
+            price=10_000,
+            max_order_price=100_000,
+            description="Test tier (annual)",
+        )
+        self.user_membership = UserMembership.objects.create(
+            user=member,
+            membership=tier,
+            payment_mode=UserMembership.PAYMENT_MOBILE_MONEY,
+            payment_reference="MP003",
+            amount_paid=10_000,
+        )
+
+    def _statement(self):
+        return io.StringIO(
+            "Reference,Amount,Timestamp\n"
+            "MP001,5000,2026-01-05 10:00:00\n"
+            "MP002,2500,2026-01-05 10:05:00\n"
+            'MP003,"10,000",2026-01-05 10:10:00\n'
+            "MP001,5000,2026-01-05 10:20:00\n"
+            "UNKNOWN,1000,2026-01-05 10:30:00\n"
+        )
+
+    def test_confirms_exact_matches_and_reports_the_rest(self):
+        """Matching reference + amount confirms; others are reported"""
+        result = reconcile_statement(
+            iter_statement_rows(self._statement()),
+            confirmed_by=self.staff,
+            batch_size=2,
+        )
+        self.assertEqual(result["total"], 5)
+        self.assertEqual(
+            result["counts"],
+            {"confirmed": 2, "amount_mismatch": 1, "duplicate": 1, "unmatched": 1},
+        )
+        self.layaway_payment.refresh_from_db()
+        self.assertTrue(self.layaway_payment.is_confirmed)
+        self.other_payment.refresh_from_db()
+        self.assertFalse(self.other_payment.is_confirmed)
+        self.user_membership.refresh_from_db()
+        self.assertEqual(self.user_membership.status, UserMembership.STATUS_PAID)
+
+    def test_fractional_amount_is_invalid(self):
+        """1000.75 is not silently truncated to a 1000 RWF match"""
+        rows = list(
+            iter_statement_rows(
+                io.StringIO("Reference,Amount\nMP001,5000.75\nMP002,3000.00\n")
+            )
+        )
+        self.assertIsNone(rows[0]["amount_rwf"])
+        self.assertIn("Invalid amount", rows[0]["error"])
+        self.assertEqual(rows[1]["amount_rwf"], 3_000)
+
+    def test_membership_without_amount_is_reported(self):
+        """A pending membership with no amount_paid is a mismatch, not a crash"""
+        UserMembership.objects.filter(pk=self.user_membership.pk).update(
+            amount_paid=None
+        )
+        result = reconcile_statement(
+            iter_statement_rows(io.StringIO("Reference,Amount\nMP003,10000\n")),
+            confirmed_by=self.staff,
+        )
+        self.assertEqual(result["counts"], {"amount_mismatch": 1})
+        self.user_membership.refresh_from_db()
+        self.assertEqual(self.user_membership.status, UserMembership.STATUS_PENDING)
+
+    def test_dry_run_changes_nothing(self):
+        """Dry run reports matches without confirming them"""
+        result = reconcile_statement(
+            iter_statement_rows(self._statement()),
+            confirmed_by=None,
+            dry_run=True,
+        )
+        self.assertEqual(result["counts"]["confirmed"], 2)
+        self.layaway_payment.refresh_from_db()
+        self.assertFalse(self.layaway_payment.is_confirmed)
@@ -0,0 +1,13 @@
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+
+from apps.payments.views import StatementReconciliationViewSet
+
+app_name = "payments"
+
+router = DefaultRouter()
+router.register(r"reconcile", StatementReconciliationViewSet, basename="reconcile")
+
+urlpatterns = [
+    path("", include(router.urls)),
+]
@@ -1,3 +1,46 @@
-from django.shortcuts import render
+import io
 
-# Create your views here.
+from django.core.exceptions import ValidationError
+from drf_spectacular.utils import extend_schema
+from rest_framework import status
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.viewsets import GenericViewSet
+
+from apps.payments.serializers import (
+    StatementReconciliationSerializer,
+    StatementUploadSerializer,
+)
+from apps.payments.services import iter_statement_rows, reconcile_statement
+
+
+class StatementReconciliationViewSet(GenericViewSet):
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    @extend_schema(
+        summary="Reconcile a payment statement (staff)",
+        description="Upload a mobile-money/bank statement CSV (reference, amount, timestamp). "
+        "Unconfirmed layaway payments, pending membership payments and pending payments whose "
+        "reference and amount match are confirmed; all other rows are returned as issues.",
+        tags=["Staff - Payments"],
+        request=StatementUploadSerializer,
+        responses={200: StatementReconciliationSerializer},
+    )
+    def create(self, request):
+        serializer = StatementUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data["file"]
+        # Read the upload line by line (large uploads are spooled to a temp file)
+        text_stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        try:
+            result = reconcile_statement(
+                iter_statement_rows(text_stream),
+                confirmed_by=request.user,
+                dry_run=serializer.validated_data["dry_run"],
+            )
+        except (ValidationError, UnicodeDecodeError) as e:
+            detail = "; ".join(e.messages) if isinstance(e, ValidationError) else str(e)
+            return Response({"detail": detail}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(StatementReconciliationSerializer(result).data)
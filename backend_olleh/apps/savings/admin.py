@@ -1,5 +1,11 @@
 from django.contrib import admin
-from .models import SavingsAccount, SavingsTransaction, RefundRequest
+from .models import (
+    SavingsAccount,
+    SavingsLedgerRepair,
+    SavingsMonthlySnapshot,
+    SavingsTransaction,
+    RefundRequest,
+)
 
 
 @admin.register(SavingsAccount)
@@ -17,6 +23,53 @@ class SavingsTransactionAdmin(admin.ModelAdmin):
     readonly_fields = ("created_at",)
 
 
+@admin.register(SavingsMonthlySnapshot)
+class SavingsMonthlySnapshotAdmin(admin.ModelAdmin):
+    list_display = (
+        "account",
+        "period",
+        "opening_balance_rwf",
+        "credits_rwf",
+        "debits_rwf",
+        "closing_balance_rwf",
+        "transaction_count",
+    )
+    list_filter = ("period",)
+    search_fields = ("account__user__email",)
+    raw_id_fields = ("account",)
+    readonly_fields = ("created_at", "updated_at")
+
+    # Written by rollup_savings_snapshots only; edits would break the chained openings
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(SavingsLedgerRepair)
+class SavingsLedgerRepairAdmin(admin.ModelAdmin):
+    list_display = (
+        "account",
+        "stored_balance_rwf",
+        "ledger_balance_rwf",
+        "created_at",
+    )
+    search_fields = ("account__user__email",)
+    raw_id_fields = ("account",)
+    readonly_fields = ("created_at",)
+
+    # Audit trail: written by verify_savings_ledger --repair only
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(RefundRequest)
 class RefundRequestAdmin(admin.ModelAdmin):
     list_display = ("account", "amount_rwf", "status", "created_at")
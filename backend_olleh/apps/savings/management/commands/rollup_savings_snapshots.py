@@ -0,0 +1,61 @@
+"""
+Roll the savings ledger up into monthly snapshots (opening, closing, credits, debits per
+account and month with activity), one grouped pass per month. Statements start from these
+snapshots instead of summing the whole ledger.
+Run daily or after month end (cron); idempotent. By default continues after the latest
+snapshot through the last complete month; --since YYYY-MM re-rolls from that month.
+"""
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.savings.services import rollup_savings_snapshots
+
+
+def _month(value):
+    try:
+        return datetime.strptime(value, "%Y-%m").date()
+    except ValueError:
+        raise CommandError(f"Expected a month as YYYY-MM, got {value!r}.")
+
+
+class Command(BaseCommand):
+    help = "Write monthly savings snapshots for complete months (incremental)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            type=_month,
+            help="First month to (re)build, YYYY-MM (default: after the latest snapshot).",
+        )
+        parser.add_argument(
+            "--through",
+            type=_month,
+            help="Last month to build, YYYY-MM (default: last complete month).",
+        )
+
+    def handle(self, *args, **options):
+        def progress(period, written):
+            if options["verbosity"] >= 2:
+                self.stdout.write(f"  {period:%Y-%m}: {written:,} snapshot(s)")
+
+        try:
+            stats = rollup_savings_snapshots(
+                since=options["since"],
+                through=options["through"],
+                progress=progress,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if not stats["months"]:
+            self.stdout.write(self.style.SUCCESS("Done. Snapshots are up to date."))
+            return
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done. {stats['snapshots']:,} snapshot(s) for {stats['months']} month(s) "
+                f"({stats['since']:%Y-%m} to {stats['through']:%Y-%m}) "
+                f"in {stats['elapsed_seconds']}s."
+            )
+        )
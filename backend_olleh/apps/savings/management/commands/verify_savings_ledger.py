@@ -0,0 +1,82 @@
+"""
+Check every SavingsAccount.balance_rwf against the sum of its SavingsTransaction rows, in
+chunks of account ids (one grouped aggregate per chunk). Safe to run nightly (cron) while
+the app is live. --workers N spreads chunks over forked processes; --start-id/--end-id
+split the id space between hosts. --repair sets drifted balances to the ledger sum and
+records each correction in SavingsLedgerRepair.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.savings.services import DEFAULT_VERIFY_CHUNK_SIZE, verify_savings_ledger
+
+
+class Command(BaseCommand):
+    help = "Verify savings balances against the ledger; optionally repair (audited)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_VERIFY_CHUNK_SIZE,
+            help=f"Account ids per chunk (default {DEFAULT_VERIFY_CHUNK_SIZE}).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes to verify chunks in parallel (default 1; use 1 on SQLite).",
+        )
+        parser.add_argument(
+            "--start-id", type=int, help="First account id (inclusive)."
+        )
+        parser.add_argument("--end-id", type=int, help="Last account id (exclusive).")
+        parser.add_argument(
+            "--repair",
+            action="store_true",
+            help="Set drifted balances to the ledger sum and record an audit row.",
+        )
+
+    def handle(self, *args, **options):
+        def progress(result):
+            if options["verbosity"] >= 2:
+                self.stdout.write(
+                    f"  {result['checked']:,} account(s), "
+                    f"{len(result['mismatches'])} mismatch(es)"
+                )
+
+        try:
+            stats = verify_savings_ledger(
+                chunk_size=options["chunk_size"],
+                start_id=options["start_id"],
+                end_id=options["end_id"],
+                workers=options["workers"],
+                repair=options["repair"],
+                progress=progress,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for row in stats["mismatches"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Account #{row['account_id']}: stored {row['stored']:,} RWF, "
+                    f"ledger {row['ledger']:,} RWF"
+                )
+            )
+
+        summary = (
+            f"{stats['checked']:,} account(s) and {stats['transactions']:,} "
+            f"transaction(s) checked in {stats['chunks']} chunk(s), "
+            f"{len(stats['mismatches'])} mismatch(es)"
+        )
+        if options["repair"]:
+            summary += f", {stats['repaired']} repaired"
+        self.stdout.write(
+            self.style.SUCCESS(f"\nDone. {summary} in {stats['elapsed_seconds']}s.")
+        )
+        if stats["mismatches"] and not options["repair"]:
+            # Non-zero exit so a nightly cron job surfaces drift
+            raise CommandError(
+                f"{len(stats['mismatches'])} balance(s) disagree with the ledger."
+            )
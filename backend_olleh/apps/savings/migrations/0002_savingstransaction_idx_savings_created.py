@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-17 00:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("orders", "0006_layaway_idx_layaway_status_cooling"),
+        ("savings", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="savingstransaction",
+            index=models.Index(fields=["created_at", "id"], name="idx_savings_created"),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 6.0.1 on 2026-10-17 00:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("savings", "0002_savingstransaction_idx_savings_created"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SavingsMonthlySnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "period",
+                    models.DateField(
+                        help_text="First day of the month (Africa/Kigali)"
+                    ),
+                ),
+                ("opening_balance_rwf", models.IntegerField()),
+                ("closing_balance_rwf", models.IntegerField()),
+                ("credits_rwf", models.PositiveBigIntegerField(default=0)),
+                (
+                    "debits_rwf",
+                    models.PositiveBigIntegerField(
+                        default=0,
+                        help_text="Sum of debits in the month, as a positive amount",
+                    ),
+                ),
+                ("transaction_count", models.PositiveIntegerField(default=0)),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="monthly_snapshots",
+                        to="savings.savingsaccount",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Savings monthly snapshot",
+                "verbose_name_plural": "Savings monthly snapshots",
+                "ordering": ["account", "-period"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("account", "period"),
+                        name="unique_savings_snapshot_period",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0.1 on 2026-10-17 00:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("savings", "0003_savingsmonthlysnapshot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SavingsLedgerRepair",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("stored_balance_rwf", models.BigIntegerField()),
+                ("ledger_balance_rwf", models.BigIntegerField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="ledger_repairs",
+                        to="savings.savingsaccount",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Savings ledger repair",
+                "verbose_name_plural": "Savings ledger repairs",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
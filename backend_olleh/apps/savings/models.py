@@ -1,4 +1,6 @@
 from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
 from django.core.exceptions import ValidationError
 
 from apps.common.models import BaseModel
@@ -28,37 +30,65 @@ class SavingsAccount(BaseModel):
     def __str__(self):
         return f"{self.user.email} – {self.balance_rwf:,} RWF"
 
+    @classmethod
     @transaction.atomic
-    def credit(self, amount_rwf, transaction_type, reference="", layaway=None):
-        if amount_rwf <= 0:
-            raise ValidationError("Credit amount must be positive.")
-        self.balance_rwf += amount_rwf
-        self.save(update_fields=["balance_rwf", "updated_at"])
+    def post_entry(cls, user_id, amount_rwf, kind, reference="", layaway=None):
+        """
+        Ledger posting: apply a signed amount to the member's balance and log it.
+        The balance moves with one conditional UPDATE (balance = balance + x, and for
+        debits WHERE balance >= -x), so concurrent postings never lose updates and no
+        row has to be loaded first. The account is created on the first credit.
+        Returns the new balance in RWF.
+        """
+        if amount_rwf == 0:
+            raise ValidationError("Amount must not be zero.")
+        accounts = cls.objects.filter(user_id=user_id)
+        while True:
+            target = accounts
+            if amount_rwf < 0:
+                target = target.filter(balance_rwf__gte=-amount_rwf)
+            if target.update(
+                balance_rwf=F("balance_rwf") + amount_rwf,
+                updated_at=timezone.now(),
+            ):
+                # Row is locked by our UPDATE until commit, so this read is consistent
+                account_id, balance = accounts.values_list("pk", "balance_rwf").get()
+                break
+            if amount_rwf < 0:
+                available = accounts.values_list("balance_rwf", flat=True).first() or 0
+                raise ValidationError(
+                    f"Insufficient balance. Available: {available:,} RWF."
+                )
+            account, created = cls.objects.get_or_create(
+                user_id=user_id, defaults={"balance_rwf": amount_rwf}
+            )
+            if created:
+                account_id, balance = account.pk, account.balance_rwf
+                break
+            # Created concurrently: retry the UPDATE
+
         SavingsTransaction.objects.create(
-            account=self,
-            kind=transaction_type,
+            account_id=account_id,
+            kind=kind,
             amount_rwf=amount_rwf,
             reference=reference,
             layaway=layaway,
         )
+        return balance
+
+    def credit(self, amount_rwf, transaction_type, reference="", layaway=None):
+        if amount_rwf <= 0:
+            raise ValidationError("Credit amount must be positive.")
+        self.balance_rwf = self.post_entry(
+            self.user_id, amount_rwf, transaction_type, reference, layaway
+        )
         return self.balance_rwf
 
-    @transaction.atomic
     def debit(self, amount_rwf, transaction_type, reference="", layaway=None):
         if amount_rwf <= 0:
             raise ValidationError("Debit amount must be positive.")
-        if amount_rwf > self.balance_rwf:
-            raise ValidationError(
-                f"Insufficient balance. Available: {self.balance_rwf:,} RWF."
-            )
-        self.balance_rwf -= amount_rwf
-        self.save(update_fields=["balance_rwf", "updated_at"])
-        SavingsTransaction.objects.create(
-            account=self,
-            kind=transaction_type,
-            amount_rwf=-amount_rwf,
-            reference=reference,
-            layaway=layaway,
+        self.balance_rwf = self.post_entry(
+            self.user_id, -amount_rwf, transaction_type, reference, layaway
         )
         return self.balance_rwf
 
@@ -114,13 +144,79 @@ class SavingsTransaction(BaseModel):
         indexes = [
             models.Index(
                 fields=["account", "created_at"], name="idx_savings_acc_created"
-            )
+            ),
+            # Staff exports by date range
+            models.Index(fields=["created_at", "id"], name="idx_savings_created"),
         ]
 
     def __str__(self):
         return f"{self.account.user.email} {self.kind} {self.amount_rwf} RWF"
 
 
+class SavingsMonthlySnapshot(BaseModel):
+    """
+    Month-end rollup of one account's ledger (written by `rollup_savings_snapshots`).
+    Only months with activity get a row; the balance carries over unchanged otherwise.
+    Statements start from the nearest snapshot instead of summing the whole ledger.
+    """
+
+    account = models.ForeignKey(
+        SavingsAccount,
+        on_delete=models.PROTECT,
+        related_name="monthly_snapshots",
+    )
+    period = models.DateField(help_text="First day of the month (Africa/Kigali)")
+    opening_balance_rwf = models.IntegerField()
+    closing_balance_rwf = models.IntegerField()
+    credits_rwf = models.PositiveBigIntegerField(default=0)
+    debits_rwf = models.PositiveBigIntegerField(
+        default=0, help_text="Sum of debits in the month, as a positive amount"
+    )
+    transaction_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["account", "-period"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "period"], name="unique_savings_snapshot_period"
+            )
+        ]
+        verbose_name = "Savings monthly snapshot"
+        verbose_name_plural = "Savings monthly snapshots"
+
+    def __str__(self):
+        return (
+            f"{self.account_id} {self.period:%Y-%m}: {self.closing_balance_rwf:,} RWF"
+        )
+
+
+class SavingsLedgerRepair(models.Model):
+    """
+    Audit row for a balance corrected by `verify_savings_ledger --repair`: the stored
+    balance that disagreed with the ledger and the ledger sum it was set to.
+    """
+
+    account = models.ForeignKey(
+        SavingsAccount,
+        on_delete=models.PROTECT,
+        related_name="ledger_repairs",
+    )
+    stored_balance_rwf = models.BigIntegerField()
+    ledger_balance_rwf = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Savings ledger repair"
+        verbose_name_plural = "Savings ledger repairs"
+
+    def __str__(self):
+        return (
+            f"{self.account_id}: {self.stored_balance_rwf:,} -> "
+            f"{self.ledger_balance_rwf:,} RWF"
+        )
+
+
 class RefundRequest(BaseModel):
     """
     Member requests withdrawal of savings. Processed within 7 working days per agreement.
@@ -1,6 +1,8 @@
+from django.utils import timezone
 from rest_framework import serializers
 
 from apps.savings.models import SavingsAccount, SavingsTransaction, RefundRequest
+from apps.savings.services import STATEMENT_MAX_DAYS
 
 
 class SavingsBalanceSerializer(serializers.Serializer):
@@ -41,6 +43,34 @@ class SavingsTransactionSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
+class SavingsStatementQuerySerializer(serializers.Serializer):
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        # Default: the current month to date
+        end = attrs.get("end") or timezone.localdate()
+        start = attrs.get("start") or end.replace(day=1)
+        if start > end:
+            raise serializers.ValidationError("start must not be after end.")
+        if (end - start).days >= STATEMENT_MAX_DAYS:
+            raise serializers.ValidationError(
+                f"A statement covers at most {STATEMENT_MAX_DAYS} days."
+            )
+        return {"start": start, "end": end}
+
+
+class SavingsStatementSerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    opening_balance_rwf = serializers.IntegerField()
+    closing_balance_rwf = serializers.IntegerField()
+    credits_rwf = serializers.IntegerField()
+    debits_rwf = serializers.IntegerField()
+    currency = serializers.CharField(default="RWF", read_only=True)
+    transactions = SavingsTransactionSerializer(many=True)
+
+
 class RefundRequestSerializer(serializers.ModelSerializer):
     class Meta:
         model = RefundRequest
@@ -0,0 +1,389 @@
+"""
+Savings statements from monthly snapshots: a rollup writes one SavingsMonthlySnapshot per
+account and month with activity, so a balance as of any moment is the nearest snapshot plus
+the (at most one month, plus any not yet rolled up) tail of ledger rows after it.
+Also the ledger verifier: SavingsAccount.balance_rwf against the sum of its transactions.
+"""
+
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from itertools import islice
+
+from django.db import connections, transaction
+from django.db.models import Count, Max, Min, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.savings.models import (
+    SavingsAccount,
+    SavingsLedgerRepair,
+    SavingsMonthlySnapshot,
+    SavingsTransaction,
+)
+
+logger = logging.getLogger("olleh.savings")
+
+SNAPSHOT_BATCH_SIZE = 1000
+STATEMENT_MAX_DAYS = 366
+DEFAULT_VERIFY_CHUNK_SIZE = 10_000  # account ids per range
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(period, months):
+    index = period.year * 12 + period.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def day_start(day):
+    """Start of a calendar day in the current timezone."""
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def period_bounds(period):
+    """[start, end) of a month as aware datetimes."""
+    return day_start(period), day_start(add_months(period, 1))
+
+
+# =========================
+# Rollup
+# =========================
+
+
+def _rollup_month(period):
+    """(Re)write the snapshots of one month; returns the number written."""
+    start, end = period_bounds(period)
+    activity = (
+        SavingsTransaction.objects.filter(created_at__gte=start, created_at__lt=end)
+        .values("account_id")
+        .annotate(
+            credits=Coalesce(Sum("amount_rwf", filter=Q(amount_rwf__gt=0)), 0),
+            debits=Coalesce(Sum("amount_rwf", filter=Q(amount_rwf__lt=0)), 0),
+            count=Count("id"),
+        )
+        .order_by("account_id")
+    )
+    previous_closing = Subquery(
+        SavingsMonthlySnapshot.objects.filter(
+            account_id=OuterRef("pk"), period__lt=period
+        )
+        .order_by("-period")
+        .values("closing_balance_rwf")[:1]
+    )
+
+    written = 0
+    SavingsMonthlySnapshot.objects.filter(period=period).delete()
+    rows = activity.iterator(chunk_size=SNAPSHOT_BATCH_SIZE)
+    while batch := list(islice(rows, SNAPSHOT_BATCH_SIZE)):
+        openings = dict(
+            SavingsAccount.objects.filter(pk__in=[row["account_id"] for row in batch])
+            .annotate(opening=Coalesce(previous_closing, 0))
+            .values_list("pk", "opening")
+        )
+        snapshots = []
+        for row in batch:
+            opening = openings[row["account_id"]]
+            snapshots.append(
+                SavingsMonthlySnapshot(
+                    account_id=row["account_id"],
+                    period=period,
+                    opening_balance_rwf=opening,
+                    closing_balance_rwf=opening + row["credits"] + row["debits"],
+                    credits_rwf=row["credits"],
+                    debits_rwf=-row["debits"],
+                    transaction_count=row["count"],
+                )
+            )
+        written += len(
+            SavingsMonthlySnapshot.objects.bulk_create(
+                snapshots, batch_size=SNAPSHOT_BATCH_SIZE
+            )
+        )
+    return written
+
+
+def rollup_savings_snapshots(since=None, through=None, progress=None):
+    """
+    Snapshot every month from `since` through `through` (first-of-month dates), one
+    grouped pass over the ledger per month. Defaults: the month after the latest
+    snapshot (or the first ledger month) through the last complete month. Re-running a
+    month rewrites it and every later month, so openings stay chained; `since` may not
+    skip past a month that has never been rolled up.
+    Returns dict: months, snapshots, since, through, elapsed_seconds.
+    """
+    started = time.monotonic()
+    last_complete = add_months(month_start(timezone.localdate()), -1)
+    through = month_start(through) if through else last_complete
+    if through > last_complete:
+        raise ValueError("Only complete months can be rolled up.")
+
+    latest = SavingsMonthlySnapshot.objects.order_by("-period").values_list(
+        "period", flat=True
+    )[:1]
+    latest = latest[0] if latest else None
+    if latest is not None:
+        next_month = add_months(latest, 1)
+    else:
+        first = SavingsTransaction.objects.order_by("created_at").values_list(
+            "created_at", flat=True
+        )[:1]
+        next_month = month_start(timezone.localtime(first[0]).date()) if first else None
+    if since is None:
+        since = next_month
+    else:
+        since = month_start(since)
+        if next_month is not None and since > next_month:
+            raise ValueError(
+                f"Months from {next_month:%Y-%m} have not been rolled up yet; "
+                "start there or earlier."
+            )
+    if latest is not None and since <= latest and through < latest:
+        raise ValueError(
+            f"Re-rolling past months must run through {latest:%Y-%m} so later "
+            "openings stay chained."
+        )
+
+    months = snapshots = 0
+    period = since
+    while period is not None and period <= through:
+        with transaction.atomic():
+            written = _rollup_month(period)
+        months += 1
+        snapshots += written
+        if progress:
+            progress(period, written)
+        period = add_months(period, 1)
+
+    return {
+        "months": months,
+        "snapshots": snapshots,
+        "since": since,
+        "through": through,
+        "elapsed_seconds": round(time.monotonic() - started, 3),
+    }
+
+
+# =========================
+# Balances and statements
+# =========================
+
+
+def balance_as_of(account_id, at):
+    """
+    Balance just before `at`: the nearest snapshot at or before that month, plus the
+    ledger rows between it and `at`.
+    """
+    period = month_start(timezone.localtime(at).date())
+    snapshot = (
+        SavingsMonthlySnapshot.objects.filter(account_id=account_id, period__lte=period)
+        .order_by("-period")
+        .values_list("period", "opening_balance_rwf", "closing_balance_rwf")
+        .first()
+    )
+    tail = SavingsTransaction.objects.filter(account_id=account_id, created_at__lt=at)
+    if snapshot is None:
+        base = 0
+    elif snapshot[0] == period:
+        base = snapshot[1]
+        tail = tail.filter(created_at__gte=period_bounds(period)[0])
+    else:
+        base = snapshot[2]
+        tail = tail.filter(created_at__gte=period_bounds(snapshot[0])[1])
+    return base + (tail.aggregate(total=Sum("amount_rwf"))["total"] or 0)
+
+
+def build_statement(account, start, end):
+    """
+    Statement for the calendar days start..end (inclusive): opening and closing balance,
+    credit/debit totals and the transactions in the range, oldest first.
+    """
+    range_start, range_end = day_start(start), day_start(end + timedelta(days=1))
+    opening = balance_as_of(account.pk, range_start)
+    transactions = list(
+        account.transactions.filter(
+            created_at__gte=range_start, created_at__lt=range_end
+        ).order_by("created_at", "id")
+    )
+    credits = sum(tx.amount_rwf for tx in transactions if tx.amount_rwf > 0)
+    debits = -sum(tx.amount_rwf for tx in transactions if tx.amount_rwf < 0)
+    return {
+        "start": start,
+        "end": end,
+        "opening_balance_rwf": opening,
+        "closing_balance_rwf": opening + credits - debits,
+        "credits_rwf": credits,
+        "debits_rwf": debits,
+        "transactions": transactions,
+    }
+
+
+# =========================
+# Ledger verification
+# =========================
+
+
+def _ledger_sums(account_ids=None, id_range=None):
+    """{account_id: (sum, count)} in one grouped pass over the ledger."""
+    transactions = SavingsTransaction.objects.all()
+    if id_range is not None:
+        transactions = transactions.filter(
+            account_id__gte=id_range[0], account_id__lt=id_range[1]
+        )
+    if account_ids is not None:
+        transactions = transactions.filter(account_id__in=account_ids)
+    return {
+        account_id: (total, count)
+        for account_id, total, count in transactions.values("account_id")
+        .annotate(total=Sum("amount_rwf"), count=Count("id"))
+        .order_by()
+        .values_list("account_id", "total", "count")
+    }
+
+
+def verify_ledger_range(start_id, end_id, repair=False):
+    """
+    Check accounts with start_id <= id < end_id: two range scans (accounts, grouped
+    ledger sums). Mismatches are re-checked with the accounts locked, so postings in
+    flight are not reported; with repair, balances are set to the ledger sum and each
+    correction is recorded in SavingsLedgerRepair. Negative ledger sums cannot be
+    stored and are reported only.
+    Returns dict: checked, transactions, mismatches ([{account_id, stored, ledger}]),
+    repaired.
+    """
+    balances = dict(
+        SavingsAccount.objects.filter(pk__gte=start_id, pk__lt=end_id).values_list(
+            "pk", "balance_rwf"
+        )
+    )
+    sums = _ledger_sums(id_range=(start_id, end_id))
+    suspects = [
+        account_id
+        for account_id, balance in balances.items()
+        if balance != sums.get(account_id, (0, 0))[0]
+    ]
+
+    mismatches = []
+    repaired = 0
+    if suspects:
+        with transaction.atomic():
+            locked = dict(
+                SavingsAccount.objects.select_for_update()
+                .filter(pk__in=suspects)
+                .order_by("pk")
+                .values_list("pk", "balance_rwf")
+            )
+            locked_sums = _ledger_sums(account_ids=suspects)
+            repairs = []
+            for account_id, stored in locked.items():
+                ledger = locked_sums.get(account_id, (0, 0))[0]
+                if stored == ledger:
+                    continue
+                mismatches.append(
+                    {"account_id": account_id, "stored": stored, "ledger": ledger}
+                )
+                if repair and ledger >= 0:
+                    repairs.append(
+                        SavingsLedgerRepair(
+                            account_id=account_id,
+                            stored_balance_rwf=stored,
+                            ledger_balance_rwf=ledger,
+                        )
+                    )
+            if repairs:
+                now = timezone.now()
+                SavingsAccount.objects.bulk_update(
+                    [
+                        SavingsAccount(
+                            pk=audit.account_id,
+                            balance_rwf=audit.ledger_balance_rwf,
+                            updated_at=now,
+                        )
+                        for audit in repairs
+                    ],
+                    ["balance_rwf", "updated_at"],
+                )
+                for audit in repairs:
+                    logger.warning(
+                        "Savings account %s balance repaired: %s -> %s RWF",
+                        audit.account_id,
+                        audit.stored_balance_rwf,
+                        audit.ledger_balance_rwf,
+                    )
+                SavingsLedgerRepair.objects.bulk_create(repairs)
+                repaired = len(repairs)
+
+    return {
+        "checked": len(balances),
+        "transactions": sum(count for _, count in sums.values()),
+        "mismatches": mismatches,
+        "repaired": repaired,
+    }
+
+
+def _verify_ledger_range_task(args):
+    # Worker process entry point: each child opens its own DB connection
+    return verify_ledger_range(*args)
+
+
+def verify_savings_ledger(
+    chunk_size=DEFAULT_VERIFY_CHUNK_SIZE,
+    start_id=None,
+    end_id=None,
+    workers=1,
+    repair=False,
+    progress=None,
+):
+    """
+    Verify every account (or ids in [start_id, end_id)) in chunks of `chunk_size`
+    account ids, optionally across `workers` forked processes. Separate hosts can split
+    the work with start_id/end_id. Returns dict: checked, transactions, chunks,
+    mismatches, repaired, elapsed_seconds.
+    """
+    if chunk_size < 1 or workers < 1:
+        raise ValueError("chunk_size and workers must be positive.")
+    started = time.monotonic()
+    bounds = SavingsAccount.objects.aggregate(low=Min("pk"), high=Max("pk"))
+    low = start_id if start_id is not None else bounds["low"]
+    high = end_id if end_id is not None else (bounds["high"] or 0) + 1
+    ranges = (
+        [
+            (lo, min(lo + chunk_size, high), repair)
+            for lo in range(low, high, chunk_size)
+        ]
+        if low is not None
+        else []
+    )
+
+    if workers > 1 and len(ranges) > 1:
+        # Children must not share the parent's connection
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("fork")
+        ) as pool:
+            results = pool.map(_verify_ledger_range_task, ranges)
+            totals = _merge_verify_results(results, progress)
+    else:
+        totals = _merge_verify_results(
+            (verify_ledger_range(*args) for args in ranges), progress
+        )
+
+    totals["chunks"] = len(ranges)
+    totals["elapsed_seconds"] = round(time.monotonic() - started, 3)
+    return totals
+
+
+def _merge_verify_results(results, progress=None):
+    totals = {"checked": 0, "transactions": 0, "mismatches": [], "repaired": 0}
+    for result in results:
+        totals["checked"] += result["checked"]
+        totals["transactions"] += result["transactions"]
+        totals["mismatches"].extend(result["mismatches"])
+        totals["repaired"] += result["repaired"]
+        if progress:
+            progress(result)
+    return totals
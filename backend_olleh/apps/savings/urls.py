@@ -4,6 +4,7 @@ from rest_framework.routers import DefaultRouter
 from apps.savings.views import (
     SavingsBalanceViewSet,
     SavingsDepositViewSet,
+    SavingsStatementViewSet,
     SavingsTransactionViewSet,
     RefundRequestViewSet,
 )
@@ -14,6 +15,7 @@ router.register(r"deposit", SavingsDepositViewSet, basename="savings-deposit")
 router.register(
     r"transactions", SavingsTransactionViewSet, basename="savings-transactions"
 )
+router.register(r"statement", SavingsStatementViewSet, basename="savings-statement")
 router.register(
     r"refund-requests", RefundRequestViewSet, basename="savings-refund-request"
 )
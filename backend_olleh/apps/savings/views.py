@@ -3,13 +3,17 @@ from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 from drf_spectacular.utils import extend_schema
 
+from apps.common.pagination import CreatedAtCursorPagination
 from apps.savings.models import SavingsAccount, RefundRequest, SavingsTransaction
 from apps.savings.serializers import (
     SavingsBalanceSerializer,
     SavingsDepositSerializer,
+    SavingsStatementQuerySerializer,
+    SavingsStatementSerializer,
     SavingsTransactionSerializer,
     RefundRequestSerializer,
 )
+from apps.savings.services import build_statement
 from apps.memberships.permissions import IsAuthenticatedClient
 
 
@@ -37,9 +41,6 @@ class SavingsBalanceViewSet(GenericViewSet):
 class SavingsDepositViewSet(GenericViewSet):
     permission_classes = [IsAuthenticatedClient]
 
-    def get_account(self):
-        return SavingsAccount.get_or_create_for_user(self.request.user)
-
     @extend_schema(
         summary="Deposit to savings",
         request=SavingsDepositSerializer,
@@ -49,11 +50,11 @@ class SavingsDepositViewSet(GenericViewSet):
     def create(self, request):
         serializer = SavingsDepositSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        account = self.get_account()
         try:
-            account.credit(
+            balance_rwf = SavingsAccount.post_entry(
+                user_id=request.user.pk,
                 amount_rwf=serializer.validated_data["amount_rwf"],
-                transaction_type=SavingsTransaction.KIND_DEPOSIT,
+                kind=SavingsTransaction.KIND_DEPOSIT,
                 reference=serializer.validated_data.get("reference", ""),
             )
         except Exception as e:
@@ -62,28 +63,53 @@ class SavingsDepositViewSet(GenericViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
         return Response(
-            SavingsBalanceSerializer({"balance_rwf": account.balance_rwf}).data,
+            SavingsBalanceSerializer({"balance_rwf": balance_rwf}).data,
             status=status.HTTP_200_OK,
         )
 
 
 class SavingsTransactionViewSet(GenericViewSet):
     permission_classes = [IsAuthenticatedClient]
+    pagination_class = CreatedAtCursorPagination
 
     @extend_schema(
         summary="List savings transactions",
+        description="Newest first, cursor-paginated (follow `next`; ?page_size= up to 200).",
         tags=["Client - Savings"],
         responses={200: SavingsTransactionSerializer(many=True)},
     )
     def list(self, request):
         account = SavingsAccount.get_or_create_for_user(request.user)
-        qs = account.transactions.all()[:100]
-        serializer = SavingsTransactionSerializer(qs, many=True)
-        return Response(serializer.data)
+        # (account, created_at) walks idx_savings_acc_created
+        page = self.paginate_queryset(account.transactions.all())
+        serializer = SavingsTransactionSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class SavingsStatementViewSet(GenericViewSet):
+    permission_classes = [IsAuthenticatedClient]
+
+    @extend_schema(
+        summary="Get my savings statement",
+        description="Opening/closing balance, credit and debit totals and the transactions for "
+        "?start=&end= (YYYY-MM-DD, inclusive, at most 366 days; default: this month to date). "
+        "The opening balance comes from the nearest monthly snapshot, so cost grows with the "
+        "transactions in the range, not the account's history.",
+        tags=["Client - Savings"],
+        parameters=[SavingsStatementQuerySerializer],
+        responses={200: SavingsStatementSerializer},
+    )
+    def list(self, request):
+        query = SavingsStatementQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        account = SavingsAccount.get_or_create_for_user(request.user)
+        statement = build_statement(account, **query.validated_data)
+        return Response(SavingsStatementSerializer(statement).data)
 
 
 class RefundRequestViewSet(GenericViewSet):
     permission_classes = [IsAuthenticatedClient]
+    pagination_class = CreatedAtCursorPagination
 
     @extend_schema(
         summary="Request savings refund",
@@ -119,5 +145,7 @@ class RefundRequestViewSet(GenericViewSet):
     )
     def list(self, request):
         account = SavingsAccount.get_or_create_for_user(request.user)
-        qs = account.refund_requests.all()
-        return Response(RefundRequestSerializer(qs, many=True).data)
+        page = self.paginate_queryset(account.refund_requests.all())
+        return self.get_paginated_response(
+            RefundRequestSerializer(page, many=True).data
+        )
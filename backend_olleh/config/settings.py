@@ -56,6 +56,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "apps.common.middleware.RequestTimingMiddleware",  # no-op unless REQUEST_TIMING_ENABLED
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",  # CORS middleware should be early
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -97,6 +98,43 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# Used for active-membership lookups. LocMem is per-process: use a shared backend
+# (e.g. Redis) in multi-worker deployments so invalidation reaches every worker.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "olleh-default",
+    }
+}
+
+
+# Threads generating LayawayImage thumbnail/display variants after upload
+# (apps.orders.images); 0 generates them inline at commit.
+LAYAWAY_IMAGE_WORKERS = 2
+
+# Item image uploads (apps.orders.uploads): streamed to disk, header-checked, then
+# re-encoded without metadata in a process pool (0 workers re-encodes inline).
+LAYAWAY_IMAGE_MAX_BYTES = 15 * 2**20
+LAYAWAY_IMAGE_MAX_PIXELS = 40_000_000
+LAYAWAY_IMAGE_MAX_EDGE = 4096  # longest edge kept after re-encoding
+LAYAWAY_IMAGE_SANITIZE_WORKERS = 2
+LAYAWAY_IMAGE_SANITIZE_QUEUE = 8  # uploads waiting for a worker before 503
+
+
+# Request instrumentation (apps.common.middleware.RequestTimingMiddleware)
+# Adds Server-Timing headers (db, serialize, view, total) and logs requests over either
+# threshold to "olleh.request_timing" with their SQL grouped by fingerprint.
+# Enabling it also wraps DRF Serializer.data / ListSerializer.data process-wide to time
+# serialization; with it off, DRF is left untouched.
+
+REQUEST_TIMING_ENABLED = DEBUG
+REQUEST_TIMING_SLOW_MS = 500
+REQUEST_TIMING_MAX_QUERIES = 50
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -137,6 +175,16 @@ STATIC_URL = "static/"
 MEDIA_URL = "media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Item images are served by an authorized view (apps.common.media), not MEDIA_URL.
+# "python" streams them from Django; in production use "x-accel-redirect" (nginx:
+# location /protected-media/ { internal; alias <MEDIA_ROOT>/; }) or "x-sendfile"
+# (Apache/lighttpd) so the web server copies the bytes after the permission check.
+MEDIA_DELIVERY = "python"
+MEDIA_ACCEL_REDIRECT_PREFIX = "/protected-media/"
+# MEDIA_ROOT subdirectories the DEBUG MEDIA_URL route refuses (404), so item images are
+# never reachable without the authorized view
+MEDIA_PROTECTED_PREFIXES = ("layaway_item_images/",)
+
 
 # CUSTOM USER FOR AUTH
 AUTH_USER_MODEL = "users.User"
@@ -149,9 +197,7 @@ AUTHENTICATION_BACKENDS = (
 
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
-    "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-    ),
+    "DEFAULT_AUTHENTICATION_CLASSES": ("users.authentication.CachedJWTAuthentication",),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.DjangoModelPermissionsOrAnonReadOnly"
     ],
@@ -25,7 +25,8 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 
-from apps.common.views import PoliciesViewSet
+from apps.common.media import serve_public_media
+from apps.common.views import ExportViewSet, PoliciesViewSet
 from users.views import MemberProfileViewSet, MemberMeasurementsViewSet
 
 urlpatterns = [
@@ -36,11 +37,17 @@ urlpatterns = [
     path("api/", include("apps.memberships.urls")),
     path("api/savings/", include("apps.savings.urls")),
     path("api/", include("apps.orders.urls")),
+    path("api/payments/", include("apps.payments.urls")),
     path(
         "api/policies/",
         PoliciesViewSet.as_view(actions={"get": "list"}),
         name="policies-list",
     ),
+    path(
+        "api/exports/<slug:dataset>.<slug:extension>",
+        ExportViewSet.as_view(actions={"get": "list"}),
+        name="exports",
+    ),
     path(
         "api/me/profile/",
         MemberProfileViewSet.as_view(
@@ -66,5 +73,6 @@ urlpatterns = [
 if settings.DEBUG:
     urlpatterns += static(
         settings.MEDIA_URL,
+        view=serve_public_media,
         document_root=settings.MEDIA_ROOT,
     )
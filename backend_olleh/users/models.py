@@ -1,10 +1,17 @@
 import uuid
 
-from django.db import models
+from django.core.cache import cache
+from django.db import models, router
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.utils.translation import gettext_lazy as _
 
+# Minimal user record cached for token authentication (users.authentication)
+AUTH_CACHE_FIELDS = ("id", "email", "is_staff", "is_superuser", "is_active")
+AUTH_CACHE_TIMEOUT = 60  # seconds; bounds staleness after queryset.update() on users
+
 
 class CustomUserManager(BaseUserManager):
     use_in_migrations = True
@@ -44,6 +51,45 @@ class User(AbstractUser):
     def __str__(self):
         return self.email
 
+    # =========================
+    # Authentication Cache
+    # =========================
+
+    @staticmethod
+    def auth_cache_key(user_id):
+        return f"user:auth:{user_id}"
+
+    @classmethod
+    def invalidate_auth_cache(cls, *user_ids):
+        cache.delete_many([cls.auth_cache_key(user_id) for user_id in user_ids])
+
+    @classmethod
+    def get_for_auth(cls, user_id):
+        """
+        The user with only AUTH_CACHE_FIELDS loaded (from the cache when possible), or
+        None. Other fields are deferred: reading one loads it, and save() only writes the
+        loaded fields.
+        """
+        key = cls.auth_cache_key(user_id)
+        values = cache.get(key)
+        if values is None:
+            values = (
+                cls.objects.filter(pk=user_id).values_list(*AUTH_CACHE_FIELDS).first()
+            )
+            if values is None:
+                return None
+            cache.set(key, values, AUTH_CACHE_TIMEOUT)
+        # from_db expects the loaded values in concrete field order
+        record = dict(zip(AUTH_CACHE_FIELDS, values))
+        field_names = [
+            f.attname for f in cls._meta.concrete_fields if f.attname in record
+        ]
+        return cls.from_db(
+            router.db_for_read(cls),
+            field_names,
+            [record[name] for name in field_names],
+        )
+
 
 # ---------- Reputation (OLLEH agreement) ----------
 class MemberProfile(models.Model):
@@ -144,3 +190,8 @@ class MemberMeasurements(models.Model):
 
     def __str__(self):
         return f"Measurements – {self.user.email}"
+
+
+@receiver([post_save, post_delete], sender=User)
+def _invalidate_auth_cache(sender, instance, **kwargs):
+    User.invalidate_auth_cache(instance.pk)
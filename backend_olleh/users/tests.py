@@ -1,3 +1,58 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from users.authentication import CachedJWTAuthentication
+from users.models import User
+
+
+class CachedJWTAuthenticationTestCase(TestCase):
+    """Test cases for token authentication from the cached user record"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="member@example.com",
+            password="testpass123",
+            first_name="Aline",
+        )
+        self.request = RequestFactory().get(
+            "/", HTTP_AUTHORIZATION=f"JWT {AccessToken.for_user(self.user)}"
+        )
+
+    def authenticate(self):
+        return CachedJWTAuthentication().authenticate(self.request)[0]
+
+    def test_user_is_cached_until_saved(self):
+        """Only the first request loads the user; saving the user invalidates it"""
+        with self.assertNumQueries(1):
+            self.authenticate()
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        self.assertEqual(user, self.user)
+        self.assertEqual(user.email, "member@example.com")
+        self.assertFalse(user.is_staff)
+
+        self.user.is_staff = True
+        self.user.save()
+        with self.assertNumQueries(1):
+            self.assertTrue(self.authenticate().is_staff)
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_uncached_fields_load_on_access_and_are_not_overwritten(self):
+        """The partial user is deferred, not blank: save() keeps the other fields"""
+        user = self.authenticate()
+        with self.assertNumQueries(1):
+            self.assertEqual(user.first_name, "Aline")
+        user = self.authenticate()
+        user.email = "renamed@example.com"
+        user.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, "renamed@example.com")
+        self.assertEqual(self.user.first_name, "Aline")
+        self.assertTrue(self.user.check_password("testpass123"))
@@ -260,23 +260,25 @@ export function MembershipStatus() {
   });
 
   // Fetch pending memberships
-  const { data: pendingMemberships, isLoading: pendingLoading } = useQuery({
+  const { data: pendingPage, isLoading: pendingLoading } = useQuery({
     queryKey: ['memberships', 'pending'],
-    queryFn: membershipApi.getPendingMemberships,
+    queryFn: () => membershipApi.getPendingMemberships(),
     enabled: isAuthenticated,
     retry: false,
   });
+  const pendingMemberships = pendingPage?.results;
 
   // Fetch all user memberships to check for paid status
   const { data: allMemberships, isLoading: allMembershipsLoading } = useQuery({
     queryKey: ['memberships', 'all'],
-    queryFn: membershipApi.getUserMemberships,
+    queryFn: () => membershipApi.getUserMemberships(),
     enabled: isAuthenticated && !activeMembership && (!pendingMemberships || pendingMemberships.length === 0),
     retry: false,
   });
 
   // Find paid memberships (status is 'paid' but not yet active)
-  const paidMembership = allMemberships?.find(
+  // Newest page is enough: a paid request awaiting activation is recent
+  const paidMembership = allMemberships?.results.find(
     (m) => m.status === 'paid' && !m.is_active
   );
 
@@ -1,5 +1,6 @@
 import { api } from './api-client';
 import type {
+  CursorPage,
   Membership,
   UserMembershipList,
   UserMembershipDetail,
@@ -7,6 +8,10 @@ import type {
   UserMembershipUpdate,
 } from './schemas/membership';
 
+function withCursor(endpoint: string, cursor?: string): string {
+  return cursor ? `${endpoint}?cursor=${encodeURIComponent(cursor)}` : endpoint;
+}
+
 /**
  * Membership API functions
  */
@@ -42,24 +47,31 @@ export const membershipApi = {
   },
 
   /**
-   * Get user's pending memberships
+   * Get one page of user's pending memberships, newest first
    */
-  getPendingMemberships: async (): Promise<UserMembershipList[]> => {
-    return api.get<UserMembershipList[]>('/api/user-memberships/pending/');
+  getPendingMemberships: async (cursor?: string): Promise<CursorPage<UserMembershipList>> => {
+    return api.get<CursorPage<UserMembershipList>>(
+      withCursor('/api/user-memberships/pending/', cursor)
+    );
   },
 
   /**
-   * Get all user memberships
+   * Get one page of user memberships, newest first
+   * (`cursor` is the `cursor` query value of a page's `next`/`previous` URL)
    */
-  getUserMemberships: async (): Promise<UserMembershipList[]> => {
-    return api.get<UserMembershipList[]>('/api/user-memberships/');
+  getUserMemberships: async (cursor?: string): Promise<CursorPage<UserMembershipList>> => {
+    return api.get<CursorPage<UserMembershipList>>(
+      withCursor('/api/user-memberships/', cursor)
+    );
   },
 
   /**
-   * Get user membership history (expired and canceled)
+   * Get one page of user membership history (expired and canceled)
    */
-  getMembershipHistory: async (): Promise<UserMembershipList[]> => {
-    return api.get<UserMembershipList[]>('/api/user-memberships/history/');
+  getMembershipHistory: async (cursor?: string): Promise<CursorPage<UserMembershipList>> => {
+    return api.get<CursorPage<UserMembershipList>>(
+      withCursor('/api/user-memberships/history/', cursor)
+    );
   },
 
   /**
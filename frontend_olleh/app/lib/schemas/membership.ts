@@ -52,6 +52,16 @@ export const userMembershipListSchema = z.object({
 
 export type UserMembershipList = z.infer<typeof userMembershipListSchema>;
 
+/**
+ * Cursor-paginated list response (list and history endpoints).
+ * Follow `next` for older rows; cursors are opaque.
+ */
+export type CursorPage<T> = {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+};
+
 /**
  * User Membership Detail schema (detailed view)
  */